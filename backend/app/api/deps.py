@@ -1,14 +1,82 @@
-from fastapi import Depends, HTTPException, status
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.core.security import get_current_user_token
+from app.db import session as db_session
+from app.db.replica import recent_writers
+from app.db.session import get_db, get_async_db
+from app.core.security import decode_token, get_current_user_token
+
+
+def _token_subject(request: Request) -> Optional[str]:
+    auth = request.headers.get("authorization")
+    if not auth or not auth.startswith("Bearer "):
+        return None
+    payload = decode_token(auth[7:])
+    return payload.get("sub") if payload else None
+
+
+def db_dep(request: Request, db: Session = Depends(get_db)) -> Session:
+    # Writes committed by this session send the user to the primary for a while (see app.db.replica)
+    db.info["writer"] = _token_subject(request)
+    return db
 
 
-def db_dep(db: Session = Depends(get_db)) -> Session:
+async def async_db_dep(db: AsyncSession = Depends(get_async_db)) -> AsyncSession:
+    """Async session for ``async def`` routes. Sync services run through ``await db.run_sync(fn, ...)``."""
     return db
 
 
+def _use_replica(request: Request) -> bool:
+    return db_session.replica_enabled and not recent_writers.wrote_recently(_token_subject(request))
+
+
+def read_db_dep(request: Request) -> Iterator[Session]:
+    """Read-only session: the replica, unless the user wrote something in the last few seconds."""
+    factory = db_session.ReplicaSessionLocal if _use_replica(request) else db_session.SessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def async_read_db_dep(request: Request) -> AsyncIterator[AsyncSession]:
+    """Async variant of ``read_db_dep``."""
+    factory = db_session.AsyncReplicaSessionLocal if _use_replica(request) else db_session.AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+
+def etag(obj: Any) -> str:
+    """ETag of a versioned row (orders, products, inventory counts; see app.db.versioning)."""
+    return f'"{obj.version}"'
+
+
+def set_etag(response: Response, obj: Any) -> None:
+    response.headers["ETag"] = etag(obj)
+
+
+def check_if_match(request: Request, obj: Any) -> None:
+    """409 when ``If-Match`` is sent and does not name the current version of ``obj``.
+
+    Without the header the write still fails with 409 if the row changes
+    between loading it and the flush (``StaleDataError``).
+    """
+    header = request.headers.get("if-match")
+    if header is None:
+        return
+    candidates = [tag.strip() for tag in header.split(",")]
+    if "*" not in candidates and etag(obj) not in candidates:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Modified by another request; reload it and try again",
+            headers={"ETag": etag(obj)},
+        )
+
+
 def require_role(required: str):
     def _checker(payload: dict = Depends(get_current_user_token)):
         role = payload.get("role")
@@ -1,12 +1,10 @@
 from __future__ import annotations
-from typing import Callable
+from typing import Any, Callable, Dict
 from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from app.db.session import get_db
-from app.services.audit import AuditService
+from app.services.audit_writer import audit_entry, audit_writer
 from app.models.audit_log import AuditResource
 from app.core.security import decode_token
 
@@ -23,9 +21,6 @@ class AuditMiddleware(BaseHTTPMiddleware):
         if request.url.path in self.exclude_paths:
             return await call_next(request)
 
-        # Get database session
-        db: Session = next(get_db())
-
         try:
             # Extract user info from JWT token in Authorization header
             user_id = None
@@ -48,8 +43,8 @@ class AuditMiddleware(BaseHTTPMiddleware):
 
             # Log successful requests for sensitive endpoints
             if self._should_audit_request(request):
-                await self._audit_request(
-                    db, request, response, user_id, session_id, ip_address, user_agent
+                await self._record(
+                    self._audit_request(request, response, user_id, session_id, ip_address, user_agent)
                 )
 
             return response
@@ -57,11 +52,21 @@ class AuditMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             # Log failed requests
             if self._should_audit_request(request):
-                await self._audit_failed_request(
-                    db, request, user_id, session_id, ip_address, user_agent, str(e)
+                await self._record(
+                    self._audit_failed_request(request, user_id, session_id, ip_address, user_agent, str(e))
                 )
             raise
 
+    async def _record(self, entry: Dict[str, Any]) -> None:
+        """Hand the entry to the batched background writer (written in place if its queue is full)"""
+        # that INSERT is blocking: keep it off the event loop
+        await run_in_threadpool(audit_writer.record, entry)
+
+    def _entry(self, **values: Any) -> Dict[str, Any]:
+        """audit_log row; every entry has the same columns so the writer can batch them"""
+        resource = values.pop("resource")
+        return audit_entry(resource=getattr(resource, "value", resource), **values)
+
     def _get_client_ip(self, request: Request) -> str:
         """Extract client IP address from request"""
         # Check for forwarded headers first
@@ -96,19 +101,16 @@ class AuditMiddleware(BaseHTTPMiddleware):
 
         return False
 
-    async def _audit_request(
+    def _audit_request(
         self,
-        db: Session,
         request: Request,
         response: Response,
         user_id: int = None,
         session_id: str = None,
         ip_address: str = None,
         user_agent: str = None
-    ):
-        """Audit successful requests"""
-        audit_service = AuditService(db)
-
+    ) -> Dict[str, Any]:
+        """Audit entry for a completed request"""
         # Determine action based on HTTP method
         method = request.method
         path = request.url.path
@@ -129,9 +131,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
         # Determine resource
         resource = self._get_resource_from_path(path)
 
-        # Create audit log
-        audit_service.create_audit_log(
-            db=db,
+        return self._entry(
             user_id=user_id,
             action=action,
             resource=resource,
@@ -148,24 +148,20 @@ class AuditMiddleware(BaseHTTPMiddleware):
             }
         )
 
-    async def _audit_failed_request(
+    def _audit_failed_request(
         self,
-        db: Session,
         request: Request,
         user_id: int = None,
         session_id: str = None,
         ip_address: str = None,
         user_agent: str = None,
         error_message: str = None
-    ):
-        """Audit failed requests"""
-        audit_service = AuditService(db)
-
+    ) -> Dict[str, Any]:
+        """Audit entry for a request that raised"""
         path = request.url.path
         resource = self._get_resource_from_path(path)
 
-        audit_service.create_audit_log(
-            db=db,
+        return self._entry(
             user_id=user_id,
             action="REQUEST_FAILED",
             resource=resource,
@@ -0,0 +1,40 @@
+from __future__ import annotations
+import time
+
+from app.core.metrics import http_request_duration, http_requests_in_flight
+
+
+class MetricsMiddleware:
+    """Request latency per route template and in-flight requests.
+
+    Plain ASGI middleware (no BaseHTTPMiddleware task per request) to keep the
+    overhead on every request minimal.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            # Route template (/orders/{order_id}); unmatched paths share one label to bound cardinality
+            route = scope.get("route")
+            http_request_duration.labels(
+                scope["method"], route.path if route is not None else "unmatched", str(status_code)
+            ).observe(time.perf_counter() - start)
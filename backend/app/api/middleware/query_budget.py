@@ -0,0 +1,42 @@
+from __future__ import annotations
+import logging
+from typing import Callable
+
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.db.profiling import route_profiles
+from app.db.query_stats import QueryStats, budget_for_path, current_query_stats
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware(BaseHTTPMiddleware):
+    """Tracks the queries of each request against the budget of its endpoint category
+    and records them in the per-route profile"""
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        stats = QueryStats(budget_for_path(request.url.path), route=f"{request.method} {request.url.path}")
+        token = current_query_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            current_query_stats.reset(token)
+
+        exceeded = stats.over_budget()
+        if exceeded:
+            logger.warning(
+                "Query budget exceeded (%s) on %s %s: %s",
+                stats.budget.category, request.method, request.url.path, exceeded,
+            )
+        if stats.count:
+            # Aggregate by route template (/orders/{order_id}), not by concrete path
+            route = request.scope.get("route")
+            name = f"{request.method} {route.path}" if route is not None else stats.route
+            route_profiles.record(name, stats.count, stats.db_time, stats.slowest)
+        if settings.debug:
+            response.headers["Server-Timing"] = f'db;dur={stats.db_ms:.1f};desc="{stats.count} queries"'
+            response.headers["X-DB-Queries"] = str(stats.count)
+            response.headers["X-DB-Commits"] = str(stats.commits)
+        return response
@@ -1,13 +1,18 @@
-from datetime import datetime, timedelta
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import select, desc, and_, or_, func
+from sqlalchemy import select, desc, and_
 
-from app.api.deps import db_dep, require_role
+from app.api.deps import read_db_dep, require_role
+from app.core.serialization import fast_response
 from app.models.audit_log import AuditLog, AuditAction, AuditResource
 from app.models.user import User
 from app.schemas.audit import AuditLogRead, AuditLogFilter
+from app.services.audit_counters import grouped_counts
+from app.services import archive
+from app.services.audit_search import metadata_document, metadata_filter, query_param_filters, row_filter, search_filter
 
 
 router = APIRouter(prefix="/audit", tags=["audit"])
@@ -15,7 +20,8 @@ router = APIRouter(prefix="/audit", tags=["audit"])
 
 @router.get("", response_model=List[AuditLogRead])
 def get_audit_logs(
-    db: Session = Depends(db_dep),
+    request: Request,
+    db: Session = Depends(read_db_dep),
     _admin=Depends(require_role("ADM")),
     # Filters
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
@@ -31,6 +37,9 @@ def get_audit_logs(
     limit: int = Query(50, ge=1, le=1000, description="Number of records to return"),
     # Search
     search: Optional[str] = Query(None, description="Search in error messages and metadata"),
+    # Request metadata (query_params.<name>=<value> filters on a query parameter)
+    path: Optional[str] = Query(None, description="Filter by request path"),
+    status_code: Optional[int] = Query(None, description="Filter by response status code"),
 ):
     """
     Get audit logs with filtering and pagination.
@@ -56,21 +65,20 @@ def get_audit_logs(
     
     # Date filtering with 7-day default
     if start_date:
-        filters.append(AuditLog.timestamp >= start_date)
+        since = start_date
     else:
         # Default: last 7 days
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        filters.append(AuditLog.timestamp >= seven_days_ago)
+        since = datetime.utcnow() - timedelta(days=7)
+    filters.append(AuditLog.timestamp >= since)
     
     if end_date:
         filters.append(AuditLog.timestamp <= end_date)
     if search:
         # Search in error messages and metadata
-        search_filter = or_(
-            AuditLog.error_message.ilike(f"%{search}%"),
-            AuditLog.extra_metadata.cast(str).ilike(f"%{search}%")
-        )
-        filters.append(search_filter)
+        filters.append(search_filter(search))
+    metadata = metadata_document(path, status_code, query_param_filters(request.query_params))
+    if metadata:
+        filters.append(metadata_filter(metadata))
 
     if filters:
         query = query.where(and_(*filters))
@@ -78,8 +86,11 @@ def get_audit_logs(
     # Order by timestamp descending (most recent first)
     query = query.order_by(desc(AuditLog.timestamp))
 
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+    # Months moved to the archive (app.services.archive) that the range reaches
+    segments = archive.segments_for("audit_log", since, end_date)
+
+    # Apply pagination (merged with the archived rows below when there are any)
+    query = query.limit(skip + limit) if segments else query.offset(skip).limit(limit)
 
     # Execute query
     results = db.execute(query).all()
@@ -106,49 +117,54 @@ def get_audit_logs(
         }
         audit_logs.append(AuditLogRead(**audit_log_dict))
 
-    return audit_logs
+    if segments:
+        match = row_filter(
+            user_id=user_id, action=action, resource=resource, resource_id=resource_id,
+            success=success, search=search, metadata=metadata,
+        )
+        archived = archive.audit_rows(segments, since, end_date, match, skip + limit)
+        user_ids = {row["user_id"] for row in archived if row.get("user_id") is not None}
+        names = dict(db.execute(select(User.id, User.name).where(User.id.in_(user_ids))).all()) if user_ids else {}
+        audit_logs += [
+            AuditLogRead(**{**row, "user_name": names.get(row.get("user_id"))})
+            for row in archived
+        ]
+        audit_logs.sort(key=lambda log: log.timestamp, reverse=True)
+        audit_logs = audit_logs[skip:skip + limit]
+
+    return fast_response(List[AuditLogRead], audit_logs, trusted=True)
 
 
 @router.get("/stats")
 def get_audit_stats(
-    db: Session = Depends(db_dep),
+    db: Session = Depends(read_db_dep),
     _admin=Depends(require_role("ADM")),
+    start_ms: Optional[int] = Query(None, ge=0, description="Start of the range (epoch milliseconds, inclusive)"),
+    end_ms: Optional[int] = Query(None, ge=0, description="End of the range (epoch milliseconds, exclusive)"),
 ):
     """
     Get audit statistics summary.
+    Counts come from the daily audit counters; without a range they cover every day.
     """
+    start = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc) if start_ms is not None else None
+    end = datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc) if end_ms is not None else None
 
-    # Total logs
-    total_logs = db.scalar(select(func.count(AuditLog.id)))
-
-    # Logs by action
-    action_stats = db.execute(
-        select(AuditLog.action, func.count(AuditLog.id))
-        .group_by(AuditLog.action)
-    ).all()
-
-    # Logs by resource
-    resource_stats = db.execute(
-        select(AuditLog.resource, func.count(AuditLog.id))
-        .group_by(AuditLog.resource)
-    ).all()
-
-    # Success/failure ratio
-    success_stats = db.execute(
-        select(AuditLog.success, func.count(AuditLog.id))
-        .group_by(AuditLog.success)
-    ).all()
+    action_stats, resource_stats, success_stats = Counter(), Counter(), Counter()
+    for action, resource, success, count in grouped_counts(db, start, end):
+        action_stats[action] += count
+        resource_stats[resource] += count
+        success_stats[success] += count
 
     # Recent failed operations
-    recent_failures = db.scalars(
-        select(AuditLog)
-        .where(AuditLog.success == False)
-        .order_by(desc(AuditLog.timestamp))
-        .limit(10)
-    ).all()
+    failures = select(AuditLog).where(AuditLog.success == False)
+    if start is not None:
+        failures = failures.where(AuditLog.timestamp >= start)
+    if end is not None:
+        failures = failures.where(AuditLog.timestamp < end)
+    recent_failures = db.scalars(failures.order_by(desc(AuditLog.timestamp)).limit(10)).all()
 
     return {
-        "total_logs": total_logs,
+        "total_logs": sum(success_stats.values()),
         "action_stats": dict(action_stats),
         "resource_stats": dict(resource_stats),
         "success_stats": dict(success_stats),
@@ -168,7 +184,7 @@ def get_audit_stats(
 @router.get("/{audit_id}", response_model=AuditLogRead)
 def get_audit_log(
     audit_id: int,
-    db: Session = Depends(db_dep),
+    db: Session = Depends(read_db_dep),
     _admin=Depends(require_role("ADM")),
 ):
     """
@@ -111,6 +111,6 @@ def change_password(req: ChangePasswordRequest, db: Session = Depends(db_dep), c
     # Update password
     from app.core.security import get_password_hash
     user.password_hash = get_password_hash(req.new_password)
-    db.commit()
+    db.flush()
     
     return {"status": "ok", "message": "Password changed successfully"}
@@ -0,0 +1,44 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from app.api.deps import db_dep
+from app.schemas.catalog import CatalogSnapshot
+from app.services import catalog as catalog_service
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+@router.get("", response_model=CatalogSnapshot)
+def get_catalog(
+    request: Request,
+    response: Response,
+    since: Optional[int] = Query(default=None, ge=0),
+    db: Session = Depends(db_dep),
+):
+    """Products, categories and churches changed since catalog version ``since``.
+
+    Without ``since`` (or with a version newer than the server's, e.g. after a
+    restore) the full catalog is returned. Clients keep the returned
+    ``version`` and send it back as ``since``; ``If-None-Match`` with the
+    previous ``ETag`` answers 304 when nothing changed.
+    """
+    version, tag = catalog_service.begin_snapshot(db)
+    if since is not None and since > version:
+        since = None
+    
+    etag = catalog_service.catalog_etag(tag, since)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    response.headers.update(headers)
+    return catalog_service.get_catalog(db, version=version, since=since)
@@ -1,8 +1,9 @@
 from typing import List
 from fastapi import APIRouter, Depends, status, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import db_dep, require_role
+from app.api.deps import async_read_db_dep, db_dep, require_role
 from app.schemas.category import CategoryCreate, CategoryRead, CategoryUpdate
 from app.services.categories import list_categories, create_category, update_category, delete_category
 
@@ -10,8 +11,8 @@ router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 @router.get("", response_model=List[CategoryRead])
-def get_categories(db: Session = Depends(db_dep)):
-    return list_categories(db)
+async def get_categories(db: AsyncSession = Depends(async_read_db_dep)):
+    return await db.run_sync(list_categories)
 
 
 @router.post("", response_model=CategoryRead, status_code=status.HTTP_201_CREATED)
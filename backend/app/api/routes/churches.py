@@ -1,8 +1,9 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import db_dep, require_role
+from app.api.deps import async_read_db_dep, db_dep, require_role
 from app.models.church import Church
 from app.schemas.church import ChurchCreate, ChurchRead
 from app.services.churches import list_churches, list_cities, create_church, update_church, delete_church
@@ -16,13 +17,13 @@ router = APIRouter(prefix="/churches", tags=["churches"])
 
 
 @router.get("", response_model=List[ChurchRead])
-def get_churches(db: Session = Depends(db_dep)):
-    return list_churches(db)
+async def get_churches(db: AsyncSession = Depends(async_read_db_dep)):
+    return await db.run_sync(list_churches)
 
 
 @router.get("/cities", response_model=List[str])
-def get_cities(db: Session = Depends(db_dep)):
-    return list_cities(db)
+async def get_cities(db: AsyncSession = Depends(async_read_db_dep)):
+    return await db.run_sync(list_cities)
 
 
 @router.get("/mine", response_model=List[ChurchRead])
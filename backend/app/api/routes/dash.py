@@ -1,20 +1,20 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import db_dep, require_role, get_current_user_token
+from app.api.deps import async_read_db_dep, require_role, get_current_user_token
 from app.services.dash import overview, user_overview
 
 router = APIRouter(prefix="/dash", tags=["dash"]) 
 
 
 @router.get("/overview")
-def get_overview(db: Session = Depends(db_dep), _adm=Depends(require_role("ADM"))):
-    return overview(db)
+async def get_overview(db: AsyncSession = Depends(async_read_db_dep), _adm=Depends(require_role("ADM"))):
+    return await db.run_sync(overview)
 
 
 @router.get("/user-overview")
-def get_user_overview(
-    db: Session = Depends(db_dep),
+async def get_user_overview(
+    db: AsyncSession = Depends(async_read_db_dep),
     current_user: dict = Depends(get_current_user_token)
 ):
-    return user_overview(db, current_user["user_id"])
+    return await db.run_sync(user_overview, current_user["user_id"])
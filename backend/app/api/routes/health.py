@@ -1,4 +1,12 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse
+
+from app.api.deps import require_role
+from app.core.config import settings
+from app.db.pool import pool_stats, recommended_pool_settings
+from app.db.profiling import route_profiles
+from app.db.session import pool_options
+from app.services import health as health_checks
 
 router = APIRouter(prefix="/health", tags=["health"]) 
 
@@ -6,3 +14,41 @@ router = APIRouter(prefix="/health", tags=["health"])
 @router.get("")
 def health():
     return {"status": "healthy"}
+
+
+def _probe_response(result: dict) -> JSONResponse:
+    return JSONResponse(result, status_code=503 if result["status"] == health_checks.FAIL else 200)
+
+
+@router.get("/ready")
+def ready():
+    """Readiness: database round trip, pool saturation and audit queue backlog (cached)."""
+    return _probe_response(health_checks.readiness())
+
+
+@router.get("/deep")
+def deep():
+    """Readiness checks plus storage (S3) and SMTP latency (cached)."""
+    return _probe_response(health_checks.deep())
+
+
+@router.get("/pool")
+def pool():
+    """Connection pool counters of this worker process (one entry per engine)."""
+    options = pool_options()
+    return {
+        "workers": settings.web_concurrency,
+        "config": {k: options[k] for k in ("pool_size", "max_overflow", "pool_timeout", "pool_pre_ping")},
+        "recommended": recommended_pool_settings(settings.web_concurrency, settings.db_max_connections),
+        "leak_threshold_seconds": settings.db_leak_threshold_seconds,
+        "engines": {name: stats.snapshot() for name, stats in pool_stats.items()},
+    }
+
+
+@router.get("/queries")
+def queries(limit: int = Query(20, ge=1, le=200), reset: bool = False, _adm=Depends(require_role("ADM"))):
+    """Routes of this worker by total DB time, with their slowest SQL fingerprints."""
+    data = {"slow_query_ms": settings.slow_query_ms, "routes": route_profiles.snapshot(limit)}
+    if reset:
+        route_profiles.reset()
+    return data
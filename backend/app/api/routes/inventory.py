@@ -1,22 +1,48 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File
 from sqlalchemy.orm import Session
 
-from app.api.deps import db_dep, require_role
+from app.api.deps import check_if_match, db_dep, require_role, set_etag
 from app.core.security import get_current_user_token
+from app.core.serialization import fast_response
 from app.schemas.inventory import (
     InventoryCreate,
     InventoryRead,
     InventoryUpdate,
     InventoryItemUpdate,
     InventoryListResponse,
-    InventoryItemRead
+    InventoryItemRead,
+    InventoryItemPage,
+    InventoryBulkCountUpdate,
+    InventoryBulkCountResult,
 )
 from app.services import inventory as inventory_service
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
 
+def _inventory_payload(db: Session, inventory) -> dict:
+    """InventoryRead payload with creator name and item rows (product names via one joined query)."""
+    return {
+        "id": inventory.id,
+        "created_at": inventory.created_at,
+        "created_by_id": inventory.created_by_id,
+        "created_by_name": inventory.created_by.name if inventory.created_by else None,
+        "status": inventory.status,
+        "notes": inventory.notes,
+        "finalized_at": inventory.finalized_at,
+        "version": inventory.version,
+        "items": inventory_service.list_inventory_items(db, inventory.id),
+    }
+
+
+def _get_or_404(db: Session, inventory_id: int):
+    inventory = inventory_service.get_inventory(db, inventory_id)
+    if not inventory:
+        raise HTTPException(status_code=404, detail="Inventory not found")
+    return inventory
+
+
 @router.post("", response_model=InventoryRead, status_code=status.HTTP_201_CREATED)
 def create_inventory(
     data: InventoryCreate,
@@ -27,73 +53,91 @@ def create_inventory(
     """Create a new inventory count (ADM only). Includes all products."""
     user_id = int(payload.get("user_id"))
     inventory = inventory_service.create_inventory(db, user_id, data)
-    
-    # Add creator name and product names to items
-    inventory.created_by_name = inventory.created_by.name if inventory.created_by else None
-    for item in inventory.items:
-        item.product_name = item.product.name if item.product else None
-    
-    return inventory
+    return _inventory_payload(db, inventory)
 
 
 @router.get("", response_model=InventoryListResponse)
 def list_inventories(
     db: Session = Depends(db_dep),
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=50, ge=1, le=200),
     _adm=Depends(require_role("ADM"))
 ):
-    """List all inventories (ADM only)."""
-    inventories = inventory_service.list_inventories(db)
-    
-    # Add creator names and product names
-    for inv in inventories:
-        inv.created_by_name = inv.created_by.name if inv.created_by else None
-        for item in inv.items:
-            item.product_name = item.product.name if item.product else None
+    """List inventories with item counts (ADM only). Items are served by /inventory/{id}/items."""
+    inventories = inventory_service.list_inventories(db, page=page, limit=limit)
+    total = inventory_service.count_inventories(db)
     
-    return {"data": inventories, "total": len(inventories)}
+    return fast_response(InventoryListResponse, {"data": inventories, "total": total, "page": page, "limit": limit})
 
 
 @router.get("/{inventory_id}", response_model=InventoryRead)
 def get_inventory(
     inventory_id: int,
+    response: Response,
     db: Session = Depends(db_dep),
     _adm=Depends(require_role("ADM"))
 ):
-    """Get inventory details (ADM only)."""
-    inventory = inventory_service.get_inventory(db, inventory_id)
-    if not inventory:
+    """Get inventory details (ADM only). ``ETag`` is its version, for ``If-Match`` on writes."""
+    inventory = _get_or_404(db, inventory_id)
+    
+    result = fast_response(InventoryRead, _inventory_payload(db, inventory))
+    # a pre-encoded response does not take the headers of ``response``
+    set_etag(result if isinstance(result, Response) else response, inventory)
+    return result
+
+
+@router.get("/{inventory_id}/items", response_model=InventoryItemPage)
+def list_inventory_items(
+    inventory_id: int,
+    db: Session = Depends(db_dep),
+    cursor: Optional[int] = Query(default=None, ge=0),
+    limit: int = Query(default=100, ge=1, le=500),
+    uncounted: bool = False,
+    differences: bool = False,
+    category_id: Optional[int] = None,
+    q: Optional[str] = Query(default=None, alias="search"),
+    _adm=Depends(require_role("ADM"))
+):
+    """Page through inventory items by id (ADM only). Pass ``next_cursor`` back as ``cursor``."""
+    if not inventory_service.get_inventory(db, inventory_id):
         raise HTTPException(status_code=404, detail="Inventory not found")
     
-    # Add creator name and product names
-    inventory.created_by_name = inventory.created_by.name if inventory.created_by else None
-    for item in inventory.items:
-        item.product_name = item.product.name if item.product else None
+    rows = inventory_service.list_inventory_items(
+        db,
+        inventory_id,
+        after_id=cursor,
+        limit=limit + 1,
+        uncounted=uncounted,
+        differences=differences,
+        category_id=category_id,
+        q=q,
+    )
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
     
-    return inventory
+    return fast_response(InventoryItemPage, {"data": rows[:limit], "next_cursor": next_cursor})
 
 
 @router.put("/{inventory_id}", response_model=InventoryRead)
 def update_inventory(
     inventory_id: int,
     data: InventoryUpdate,
+    request: Request,
+    response: Response,
     db: Session = Depends(db_dep),
     _adm=Depends(require_role("ADM")),
     payload: dict = Depends(get_current_user_token)
 ):
-    """Update inventory notes (ADM only)."""
+    """Update inventory notes (ADM only). ``If-Match`` answers 409 if it changed since it was read."""
     user_id = int(payload.get("user_id"))
+    check_if_match(request, _get_or_404(db, inventory_id))
     
     try:
         inventory = inventory_service.update_inventory(db, inventory_id, user_id, data)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
-    # Add creator name and product names
-    inventory.created_by_name = inventory.created_by.name if inventory.created_by else None
-    for item in inventory.items:
-        item.product_name = item.product.name if item.product else None
-    
-    return inventory
+    set_etag(response, inventory)
+    return _inventory_payload(db, inventory)
 
 
 @router.put("/{inventory_id}/items/{item_id}", response_model=InventoryItemRead)
@@ -119,38 +163,82 @@ def update_item_count(
     return item
 
 
+@router.patch("/{inventory_id}/items", response_model=InventoryBulkCountResult)
+def bulk_update_item_counts(
+    inventory_id: int,
+    data: InventoryBulkCountUpdate,
+    db: Session = Depends(db_dep),
+    _adm=Depends(require_role("ADM")),
+    payload: dict = Depends(get_current_user_token)
+):
+    """Update counted quantities of many items in one request (ADM only)."""
+    user_id = int(payload.get("user_id"))
+    entries = [
+        {"row": idx, "item_id": it.item_id, "counted_qty": it.counted_qty}
+        for idx, it in enumerate(data.items, start=1)
+    ]
+    
+    try:
+        updated, errors = inventory_service.bulk_update_item_counts(db, inventory_id, user_id, entries)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"updated": updated, "errors": errors}
+
+
+@router.patch("/{inventory_id}/items/csv", response_model=InventoryBulkCountResult)
+def import_item_counts_csv(
+    inventory_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(db_dep),
+    _adm=Depends(require_role("ADM")),
+    payload: dict = Depends(get_current_user_token)
+):
+    """Import counted quantities from a scanner CSV (ADM only). Invalid rows are reported, not applied."""
+    user_id = int(payload.get("user_id"))
+    
+    try:
+        entries, parse_errors = inventory_service.parse_counts_csv(file.file.read())
+        updated, errors = inventory_service.bulk_update_item_counts(db, inventory_id, user_id, entries)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"updated": updated, "errors": sorted(parse_errors + errors, key=lambda e: e["row"])}
+
+
 @router.post("/{inventory_id}/finalize", response_model=InventoryRead)
 def finalize_inventory(
     inventory_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(db_dep),
     _adm=Depends(require_role("ADM")),
     payload: dict = Depends(get_current_user_token)
 ):
-    """Finalize inventory and adjust stock (ADM only)."""
+    """Finalize inventory and adjust stock (ADM only). Honors ``If-Match`` like PUT."""
     user_id = int(payload.get("user_id"))
+    check_if_match(request, _get_or_404(db, inventory_id))
     
     try:
         inventory = inventory_service.finalize_inventory(db, inventory_id, user_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
-    # Add creator name and product names
-    inventory.created_by_name = inventory.created_by.name if inventory.created_by else None
-    for item in inventory.items:
-        item.product_name = item.product.name if item.product else None
-    
-    return inventory
+    set_etag(response, inventory)
+    return _inventory_payload(db, inventory)
 
 
 @router.delete("/{inventory_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_inventory(
     inventory_id: int,
+    request: Request,
     db: Session = Depends(db_dep),
     _adm=Depends(require_role("ADM")),
     payload: dict = Depends(get_current_user_token)
 ):
     """Delete an inventory (only if not finalized) (ADM only)."""
     user_id = int(payload.get("user_id"))
+    check_if_match(request, _get_or_404(db, inventory_id))
     
     try:
         deleted = inventory_service.delete_inventory(db, inventory_id, user_id)
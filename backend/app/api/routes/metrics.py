@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, gauge_lines, registry
+from app.db.pool import pool_stats
+from app.services import business_metrics  # noqa: F401  (registers the session listeners)
+from app.services.audit_writer import audit_writer
+
+router = APIRouter(tags=["metrics"])
+
+
+@registry.collector
+def _pool_metrics():
+    snapshots = {name: stats.snapshot() for name, stats in pool_stats.items()}
+    for metric, key, help in (
+        ("ccb_db_pool_size", "size", "Connections kept open by the pool"),
+        ("ccb_db_pool_checked_out", "checked_out", "Connections in use"),
+        ("ccb_db_pool_overflow", "overflow", "Connections open beyond pool_size"),
+        ("ccb_db_pool_idle", "idle", "Idle connections in the pool"),
+    ):
+        yield from gauge_lines(metric, help, (({"engine": n}, s.get(key, 0)) for n, s in snapshots.items()))
+    yield from gauge_lines(
+        "ccb_db_pool_timeouts_total", "Checkouts that timed out waiting for a connection",
+        (({"engine": n}, s["timeouts"]) for n, s in snapshots.items()), kind="counter",
+    )
+    for metric, attr, help in (
+        ("ccb_db_pool_checkout_wait_seconds", "checkout_wait", "Time waiting for a pooled connection"),
+        ("ccb_db_pool_pre_ping_seconds", "pre_ping", "Time spent on pre-ping"),
+    ):
+        yield f"# HELP {metric} {help}"
+        yield f"# TYPE {metric} summary"
+        for name, stats in pool_stats.items():
+            latency = getattr(stats, attr)
+            yield f'{metric}_sum{{engine="{name}"}} {latency.total}'
+            yield f'{metric}_count{{engine="{name}"}} {latency.count}'
+
+
+@registry.collector
+def _audit_metrics():
+    yield from gauge_lines("ccb_audit_queue_depth", "Audit entries waiting to be written", [({}, audit_writer.depth())])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics(authorization: str | None = Header(default=None)):
+    if settings.metrics_token and authorization != f"Bearer {settings.metrics_token}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
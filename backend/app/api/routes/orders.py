@@ -3,12 +3,13 @@ from typing import List
 import os
 import uuid
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query, UploadFile, File
 from fastapi.responses import Response, FileResponse
 from sqlalchemy.orm import Session
 
-from app.api.deps import db_dep, require_role
+from app.api.deps import check_if_match, db_dep, require_role, set_etag
 from app.core.security import get_current_user_token
+from app.core.serialization import fast_response
 from app.models.order import Order, OrderStatus
 from app.models.user import UserRole
 from app.schemas.order import OrderCreate, OrderRead, OrderUpdate, OrderListResponse, BatchReceiptsRequest
@@ -65,7 +66,7 @@ def get_orders(
                 it.product_name = it.product.name if it.product else None
             except Exception:
                 it.product_name = None
-    return OrderListResponse(data=orders, total=total, page=page, limit=limit)
+    return fast_response(OrderListResponse, OrderListResponse(data=orders, total=total, page=page, limit=limit), trusted=True)
 
 
 @router.post("", response_model=OrderRead, status_code=status.HTTP_201_CREATED)
@@ -85,9 +86,8 @@ def post_order(data: OrderCreate, db: Session = Depends(db_dep), payload: dict =
         )
     
     # ensure user is allowed to create orders for the chosen church
-    from app.models.user import User as UserModel, user_church
+    from app.models.user import user_church
     from sqlalchemy import select, func
-    user = db.get(UserModel, user_id)
     if not is_admin:
         # verify membership directly in DB (don't rely on relationship being pre-loaded)
         cnt = db.scalar(select(func.count()).select_from(user_church).where(user_church.c.user_id == user_id, user_church.c.church_id == data.church_id))
@@ -102,7 +102,8 @@ def post_order(data: OrderCreate, db: Session = Depends(db_dep), payload: dict =
 
 
 @router.get("/{order_id}", response_model=OrderRead)
-def get_order(order_id: int, db: Session = Depends(db_dep), payload: dict = Depends(get_current_user_token)):
+def get_order(order_id: int, response: Response, db: Session = Depends(db_dep), payload: dict = Depends(get_current_user_token)):
+    """The order with its items. ``ETag`` is its version, for ``If-Match`` on the PUT endpoints."""
     user_id = int(payload.get("user_id"))
     is_admin = payload.get("role") == UserRole.ADM.value
     
@@ -132,6 +133,7 @@ def get_order(order_id: int, db: Session = Depends(db_dep), payload: dict = Depe
         except Exception:
             it.product_name = None
     
+    set_etag(response, order)
     return order
 
 
@@ -162,41 +164,75 @@ def receipt(order_id: int, db: Session = Depends(db_dep), payload: dict = Depend
 
 
 @router.put("/{order_id}/approve", response_model=OrderRead)
-def approve(order_id: int, db: Session = Depends(db_dep), _adm=Depends(require_role("ADM"))):
+def approve(
+    order_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(db_dep),
+    _adm=Depends(require_role("ADM")),
+):
     order = db.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
+    check_if_match(request, order)
     try:
-        return approve_order(db, order=order)
+        order = approve_order(db, order=order)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    set_etag(response, order)
+    return order
 
 
 @router.put("/{order_id}/deliver", response_model=OrderRead)
-def deliver(order_id: int, db: Session = Depends(db_dep), _adm=Depends(require_role("ADM"))):
+def deliver(
+    order_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(db_dep),
+    _adm=Depends(require_role("ADM")),
+):
     order = db.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
+    check_if_match(request, order)
     try:
-        return deliver_order(db, order=order)
+        order = deliver_order(db, order=order)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    set_etag(response, order)
+    return order
 
 
 @router.put("/{order_id}/cancel", response_model=OrderRead)
-def cancel(order_id: int, db: Session = Depends(db_dep), _adm=Depends(require_role("ADM"))):
+def cancel(
+    order_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(db_dep),
+    _adm=Depends(require_role("ADM")),
+):
     order = db.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
+    check_if_match(request, order)
     try:
         from app.services.orders import cancel_order
-        return cancel_order(db, order=order)
+        order = cancel_order(db, order=order)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    set_etag(response, order)
+    return order
 
 
 @router.put("/{order_id}", response_model=OrderRead)
-def update(order_id: int, data: OrderUpdate, db: Session = Depends(db_dep), payload: dict = Depends(get_current_user_token)):
+def update(
+    order_id: int,
+    data: OrderUpdate,
+    request: Request,
+    response: Response,
+    db: Session = Depends(db_dep),
+    payload: dict = Depends(get_current_user_token),
+):
     # Allow requester or ADM to update PENDENTE
     # Allow ADM to update APROVADO
     user_id = int(payload.get("user_id"))
@@ -218,10 +254,13 @@ def update(order_id: int, data: OrderUpdate, db: Session = Depends(db_dep), payl
         if not order.church or not any(u.id == user_id for u in order.church.users):
             raise HTTPException(status_code=403, detail="Not allowed")
     
+    check_if_match(request, order)
     try:
-        return update_order(db, order=order, data=data, is_admin=is_admin)
+        order = update_order(db, order=order, data=data, is_admin=is_admin)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    set_etag(response, order)
+    return order
 
 
 @router.post("/{order_id}/sign", response_model=OrderRead)
@@ -239,9 +278,7 @@ def sign_order(order_id: int, db: Session = Depends(db_dep), payload: dict = Dep
     from datetime import datetime
     order.signed_by_id = user_id
     order.signed_at = datetime.utcnow()
-    db.add(order)
-    db.commit()
-    db.refresh(order)
+    db.flush()
     return order
 
 
@@ -337,8 +374,7 @@ def upload_signed_receipt(
     
     # Update order with new file path
     order.signed_receipt_path = unique_filename
-    db.commit()
-    db.refresh(order)
+    db.flush()
     
     return {"message": "Receipt uploaded successfully", "filename": unique_filename}
 
@@ -388,7 +424,7 @@ def delete_signed_receipt(
     
     # Update order
     order.signed_receipt_path = None
-    db.commit()
+    db.flush()
     
     return {"message": "Receipt deleted successfully"}
 
@@ -1,12 +1,13 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import db_dep, require_role
-from app.schemas.product import ProductCreate, ProductRead, ProductUpdate, ProductListResponse
+from app.api.deps import async_read_db_dep, check_if_match, db_dep, require_role, set_etag
+from app.core.serialization import fast_response
+from app.schemas.product import ProductCreate, ProductRead, ProductUpdate, ProductListResponse, ProductSuggestion
+from app.services.product_search import autocomplete_index, search_products
 from app.services.products import (
-    count_products,
-    list_products,
     create_product,
     get_product,
     update_product,
@@ -18,36 +19,63 @@ router = APIRouter(prefix="/products", tags=["products"])
 
 
 @router.get("", response_model=ProductListResponse)
-def get_products(
-    db: Session = Depends(db_dep),
+async def get_products(
+    db: AsyncSession = Depends(async_read_db_dep),
     category_id: Optional[int] = None,
     q: Optional[str] = Query(default=None, alias="search"),
     page: int = Query(default=1, ge=1),
     limit: int = Query(default=50, ge=1, le=500),
 ):
-    data = list_products(db, category_id=category_id, q=q, page=page, limit=limit)
-    total = count_products(db, category_id=category_id, q=q)
-    return ProductListResponse(data=data, total=total, page=page, limit=limit)
+    data, total = await db.run_sync(search_products, category_id=category_id, q=q, page=page, limit=limit)
+    return fast_response(ProductListResponse, ProductListResponse(data=data, total=total, page=page, limit=limit), trusted=True)
+
+
+@router.get("/autocomplete", response_model=List[ProductSuggestion])
+def autocomplete_products(
+    db: Session = Depends(db_dep),
+    q: str = Query(default="", max_length=100),
+    limit: int = Query(default=10, ge=1, le=50),
+):
+    """Suggestions for the product picker, served from the in-memory index (accent-insensitive)."""
+    return autocomplete_index.search(db, q, limit=limit)
 
 
 @router.post("", response_model=ProductRead, status_code=status.HTTP_201_CREATED)
 def post_product(data: ProductCreate, db: Session = Depends(db_dep), _adm=Depends(require_role("ADM"))):
-    return create_product(db, **data.dict())
+    try:
+        return create_product(db, **data.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.put("/{product_id}", response_model=ProductRead)
-def put_product(product_id: int, data: ProductUpdate, db: Session = Depends(db_dep), _adm=Depends(require_role("ADM"))):
+def put_product(
+    product_id: int,
+    data: ProductUpdate,
+    request: Request,
+    response: Response,
+    db: Session = Depends(db_dep),
+    _adm=Depends(require_role("ADM")),
+):
+    """Update a product. ``If-Match: "<version>"`` answers 409 if it changed since it was read."""
     prod = get_product(db, product_id)
     if not prod:
         raise HTTPException(status_code=404, detail="Product not found")
-    return update_product(db, prod, **data.dict(exclude_unset=True))
+    check_if_match(request, prod)
+    try:
+        prod = update_product(db, prod, **data.dict(exclude_unset=True))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_etag(response, prod)
+    return prod
 
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_product_route(product_id: int, db: Session = Depends(db_dep), _adm=Depends(require_role("ADM"))):
+def delete_product_route(product_id: int, request: Request, db: Session = Depends(db_dep), _adm=Depends(require_role("ADM"))):
     prod = get_product(db, product_id)
     if not prod:
         raise HTTPException(status_code=404, detail="Product not found")
+    check_if_match(request, prod)
     delete_product(db, prod)
     return None
 
@@ -61,11 +89,18 @@ def duplicate_product_route(product_id: int, db: Session = Depends(db_dep), _adm
 
 
 @router.patch("/{product_id}/toggle-active", response_model=ProductRead)
-def toggle_active_product(product_id: int, db: Session = Depends(db_dep), _adm=Depends(require_role("ADM"))):
+def toggle_active_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(db_dep),
+    _adm=Depends(require_role("ADM")),
+):
     prod = get_product(db, product_id)
     if not prod:
         raise HTTPException(status_code=404, detail="Product not found")
+    check_if_match(request, prod)
     prod.is_active = not prod.is_active
-    db.commit()
-    db.refresh(prod)
+    db.flush()
+    set_etag(response, prod)
     return prod
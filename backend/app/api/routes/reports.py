@@ -1,11 +1,12 @@
 from datetime import datetime
 from typing import Optional
 from io import BytesIO
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query
 from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import db_dep, require_role
+from app.api.deps import async_read_db_dep, read_db_dep, require_role
 from app.models.stock_movement import MovementType
 from app.services.reports import (
     get_stock_movement_report,
@@ -34,27 +35,24 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 
 # Endpoints para ADM
 @router.get("/stock-movements", response_model=StockMovementReport)
-def get_stock_movements_report(
+async def get_stock_movements_report(
     start_date: Optional[datetime] = Query(None, description="Data inicial (YYYY-MM-DDTHH:MM:SS)"),
     end_date: Optional[datetime] = Query(None, description="Data final (YYYY-MM-DDTHH:MM:SS)"),
     product_id: Optional[int] = Query(None, description="ID do produto"),
     movement_type: Optional[MovementType] = Query(None, description="Tipo de movimento"),
     church_id: Optional[int] = Query(None, description="ID da igreja"),
-    db: Session = Depends(db_dep),
+    db: AsyncSession = Depends(async_read_db_dep),
     _adm=Depends(require_role("ADM")),
 ):
     """Relatório de movimentações de estoque - Apenas ADM"""
-    try:
-        return get_stock_movement_report(
-            db=db,
-            start_date=start_date,
-            end_date=end_date,
-            product_id=product_id,
-            movement_type=movement_type,
-            church_id=church_id
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
+    return await db.run_sync(
+        get_stock_movement_report,
+        start_date=start_date,
+        end_date=end_date,
+        product_id=product_id,
+        movement_type=movement_type,
+        church_id=church_id
+    )
 
 
 @router.get("/orders/excel")
@@ -63,125 +61,101 @@ def get_orders_excel_report(
     end_date: Optional[datetime] = Query(None, description="Data final (YYYY-MM-DDTHH:MM:SS)"),
     church_id: Optional[int] = Query(None, description="ID da igreja"),
     status: Optional[str] = Query(None, description="Status do pedido"),
-    db: Session = Depends(db_dep),
+    db: Session = Depends(read_db_dep),
     _adm=Depends(require_role("ADM")),
 ):
     """Exportar relatório de pedidos em Excel - Apenas ADM"""
-    try:
-        excel_bytes = generate_orders_excel(
-            db=db,
-            start_date=start_date,
-            end_date=end_date,
-            church_id=church_id,
-            status=status
-        )
-        
-        filename = f"relatorio_pedidos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        return StreamingResponse(
-            BytesIO(excel_bytes),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar Excel: {str(e)}")
+    excel_bytes = generate_orders_excel(
+        db=db,
+        start_date=start_date,
+        end_date=end_date,
+        church_id=church_id,
+        status=status
+    )
+    
+    filename = f"relatorio_pedidos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    
+    return StreamingResponse(
+        BytesIO(excel_bytes),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 
 @router.get("/orders", response_model=OrderReport)
-def get_orders_report(
+async def get_orders_report(
     start_date: Optional[datetime] = Query(None, description="Data inicial (YYYY-MM-DDTHH:MM:SS)"),
     end_date: Optional[datetime] = Query(None, description="Data final (YYYY-MM-DDTHH:MM:SS)"),
     church_id: Optional[int] = Query(None, description="ID da igreja"),
     status: Optional[str] = Query(None, description="Status do pedido"),
-    db: Session = Depends(db_dep),
+    db: AsyncSession = Depends(async_read_db_dep),
     _adm=Depends(require_role("ADM")),
 ):
     """Relatório de pedidos - Apenas ADM"""
-    try:
-        return get_order_report(
-            db=db,
-            start_date=start_date,
-            end_date=end_date,
-            church_id=church_id,
-            status=status
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
+    return await db.run_sync(
+        get_order_report,
+        start_date=start_date,
+        end_date=end_date,
+        church_id=church_id,
+        status=status
+    )
 
 
 @router.get("/products", response_model=ProductReport)
-def get_products_report(
-    db: Session = Depends(db_dep),
+async def get_products_report(
+    db: AsyncSession = Depends(async_read_db_dep),
     _adm=Depends(require_role("ADM")),
 ):
     """Relatório de produtos - Apenas ADM"""
-    try:
-        return get_product_report(db)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
+    return await db.run_sync(get_product_report)
 
 
 @router.get("/churches", response_model=ChurchReport)
-def get_churches_report(
-    db: Session = Depends(db_dep),
+async def get_churches_report(
+    db: AsyncSession = Depends(async_read_db_dep),
     _adm=Depends(require_role("ADM")),
 ):
     """Relatório de igrejas - Apenas ADM"""
-    try:
-        return get_church_report(db)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
+    return await db.run_sync(get_church_report)
 
 
 @router.get("/dashboard", response_model=DashboardReport)
-def get_dashboard_report_endpoint(
-    db: Session = Depends(db_dep),
+async def get_dashboard_report_endpoint(
+    db: AsyncSession = Depends(async_read_db_dep),
     _adm=Depends(require_role("ADM")),
 ):
     """Dashboard executivo - Apenas ADM"""
-    try:
-        return get_dashboard_report(db)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
+    return await db.run_sync(get_dashboard_report)
 
 
 # Endpoints para usuários comuns
 @router.get("/my-orders", response_model=UserOrderReport)
-def get_my_orders_report(
-    db: Session = Depends(db_dep),
+async def get_my_orders_report(
+    db: AsyncSession = Depends(async_read_db_dep),
     current_user=Depends(require_role("USUARIO")),
 ):
     """Relatório dos pedidos da minha igreja - Usuários"""
-    try:
-        # Assumindo que o usuário tem church_id no token ou profile
-        # Por enquanto, vamos usar um church_id fixo para teste
-        church_id = 1  # TODO: Obter do token do usuário
-        return get_user_orders_report(db, church_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
+    # Assumindo que o usuário tem church_id no token ou profile
+    # Por enquanto, vamos usar um church_id fixo para teste
+    church_id = 1  # TODO: Obter do token do usuário
+    return await db.run_sync(get_user_orders_report, church_id)
 
 
 @router.get("/product-catalog", response_model=UserProductCatalog)
-def get_product_catalog(
-    db: Session = Depends(db_dep),
+async def get_product_catalog(
+    db: AsyncSession = Depends(async_read_db_dep),
     current_user=Depends(require_role("USUARIO")),
 ):
     """Catálogo de produtos disponíveis - Usuários"""
-    try:
-        return get_user_product_catalog(db)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
+    return await db.run_sync(get_user_product_catalog)
 
 
 @router.get("/my-movements", response_model=UserMovementReport)
-def get_my_movements_report(
-    db: Session = Depends(db_dep),
+async def get_my_movements_report(
+    db: AsyncSession = Depends(async_read_db_dep),
     current_user=Depends(require_role("USUARIO")),
 ):
     """Movimentações relacionadas aos meus pedidos - Usuários"""
-    try:
-        # Assumindo que o usuário tem church_id no token ou profile
-        church_id = 1  # TODO: Obter do token do usuário
-        return get_user_movements_report(db, church_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
\ No newline at end of file
+    # Assumindo que o usuário tem church_id no token ou profile
+    church_id = 1  # TODO: Obter do token do usuário
+    return await db.run_sync(get_user_movements_report, church_id)
\ No newline at end of file
@@ -1,19 +1,21 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import db_dep, require_role
+from app.api.deps import async_read_db_dep, db_dep, require_role
 from app.models.stock_movement import MovementType
-from app.schemas.stock import StockMovementCreate, StockMovementRead, StockMovementListResponse, BatchEntryCreate
+from app.schemas.stock import StockMovementCreate, StockMovementRead, StockMovementListResponse, BatchEntryCreate, StockAsOfResponse
 from app.services.stock import add_movement, list_movements
+from app.services.stock_ledger import end_of_day, stock_as_of
 
 router = APIRouter(prefix="/stock", tags=["stock"]) 
 
 
 @router.get("/movements", response_model=StockMovementListResponse)
-def get_movements(
-    db: Session = Depends(db_dep),
+async def get_movements(
+    db: AsyncSession = Depends(async_read_db_dep),
     product_id: Optional[int] = None,
     type: Optional[MovementType] = None,
     start: Optional[datetime] = Query(default=None),
@@ -23,9 +25,30 @@ def get_movements(
     _adm=Depends(require_role("ADM")),
 ):
     from app.services.stock import count_movements
-    movements = list_movements(db, product_id=product_id, type=type, start=start, end=end, page=page, limit=limit)
-    total = count_movements(db, product_id=product_id, type=type, start=start, end=end)
-    return StockMovementListResponse(data=movements, total=total, page=page, limit=limit)
+    def _page(session: Session) -> StockMovementListResponse:
+        movements = list_movements(session, product_id=product_id, type=type, start=start, end=end, page=page, limit=limit)
+        total = count_movements(session, product_id=product_id, type=type, start=start, end=end)
+        return StockMovementListResponse(data=movements, total=total, page=page, limit=limit)
+
+    return await db.run_sync(_page)
+
+
+@router.get("/as-of", response_model=StockAsOfResponse)
+async def get_stock_as_of(
+    day: date = Query(alias="date"),
+    product_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    db: AsyncSession = Depends(async_read_db_dep),
+    _adm=Depends(require_role("ADM")),
+):
+    """Stock of each product at the end of ``date`` (UTC): last snapshot + movements since, in one query."""
+    at = end_of_day(day)
+
+    def _levels(session: Session) -> StockAsOfResponse:
+        data = stock_as_of(session, at, product_id=product_id, category_id=category_id)
+        return StockAsOfResponse(date=day, as_of=at, data=data)
+
+    return await db.run_sync(_levels)
 
 
 @router.post("/movements", response_model=StockMovementRead, status_code=status.HTTP_201_CREATED)
@@ -40,7 +63,7 @@ def post_movement(data: StockMovementCreate, db: Session = Depends(db_dep), _adm
 def post_batch_entry(data: BatchEntryCreate, db: Session = Depends(db_dep), _adm=Depends(require_role("ADM"))):
     """
     Criar entrada múltipla de estoque com nota fiscal.
-    Todos os itens são processados em uma transação única.
+    Todos os itens são processados na transação da requisição: um item inválido desfaz a entrada inteira.
     """
     if not data.items:
         raise HTTPException(status_code=400, detail="Nenhum item fornecido")
@@ -57,18 +80,14 @@ def post_batch_entry(data: BatchEntryCreate, db: Session = Depends(db_dep), _adm
                 invoice_number=data.invoice_number,
                 invoice_date=data.invoice_date,
                 note=data.note,
-                commit=False,  # Não commitar individualmente
             )
             created_movements.append(movement)
         
-        db.commit()  # Commit único para todos os itens
         return {
             "message": f"{len(created_movements)} movimentações criadas com sucesso",
             "movements": [{"id": m.id, "product_id": m.product_id, "qty": m.qty} for m in created_movements]
         }
     except ValueError as e:
-        db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao processar entrada múltipla: {str(e)}")
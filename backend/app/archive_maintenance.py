@@ -0,0 +1,50 @@
+from __future__ import annotations
+import argparse
+
+from app.db.session import engine
+from app.services import archive
+
+
+def run_status() -> None:
+    manifest = archive.read_manifest(use_cache=False)
+    if not manifest["segments"]:
+        print("nothing archived")
+    for s in manifest["segments"]:
+        state = "purged" if s["purged"] else "exported, rows still in the database"
+        print(f"{s['table']:<16} {s['month']}  {s['rows']:>9} rows  {s['bytes']:>11} bytes  {s['key']}  ({state})")
+
+
+def run_verify() -> None:
+    store = archive.get_store()
+    failed = 0
+    for s in archive.read_manifest(store, use_cache=False)["segments"]:
+        try:
+            archive.verify_segment(store, s)
+            print(f"ok      {s['key']}")
+        except (ValueError, OSError) as e:
+            failed += 1
+            print(f"FAILED  {s['key']}: {e}")
+    if failed:
+        raise SystemExit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="archive closed months of audit_log and stock_movements")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="list archived segments")
+    sub.add_parser("verify", help="check every archived file against its manifest checksum")
+    run = sub.add_parser("run", help="export and purge the closed months")
+    run.add_argument("--after-months", type=int, help="overrides ARCHIVE_AFTER_MONTHS")
+    run.add_argument("--table", action="append", choices=sorted(archive.ARCHIVED_TABLES))
+    args = parser.parse_args()
+
+    if args.command == "status":
+        run_status()
+    elif args.command == "verify":
+        run_verify()
+    else:
+        archive.archive(engine, after_months=args.after_months, tables=args.table, log=print)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+import argparse
+from datetime import date
+
+from app.db.session import engine
+from app.services import audit_counters, audit_partitions
+
+
+def run_status() -> None:
+    with engine.connect() as conn:
+        if not audit_partitions.is_partitioned(conn):
+            print("audit_log is not partitioned")
+            return
+        for p in audit_partitions.list_partitions(conn):
+            bounds = f"{p['start']:%Y-%m-%d} .. {p['end']:%Y-%m-%d}" if p["start"] else "default"
+            print(f"{p['name']:<24} {bounds:<24} ~{p['rows_estimate']} rows")
+
+
+def run_maintain() -> None:
+    result = audit_partitions.maintain(engine)
+    print(f"created: {result['created']}")
+    print(f"expired: {result['expired']}")
+
+
+def run_rebuild_counters(since: date | None, if_empty: bool) -> None:
+    if if_empty and not audit_counters.is_empty(engine):
+        print("audit_counters already filled")
+        return
+    total = audit_counters.rebuild(engine, since, log=print)
+    print(f"done: {total} audit rows counted")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="audit_log partition maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="list partitions")
+    sub.add_parser("maintain", help="create upcoming partitions and apply retention")
+    convert = sub.add_parser("convert", help="turn a plain audit_log into the partitioned table")
+    convert.add_argument("--batch-size", type=int, default=50_000)
+    rebuild = sub.add_parser("rebuild-counters", help="recompute the daily audit counters from audit_log")
+    rebuild.add_argument("--since", type=date.fromisoformat, help="first day to recompute (YYYY-MM-DD)")
+    rebuild.add_argument("--if-empty", action="store_true", help="only when audit_counters has no rows yet")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        run_status()
+    elif args.command == "maintain":
+        run_maintain()
+    elif args.command == "rebuild-counters":
+        run_rebuild_counters(args.since, args.if_empty)
+    else:
+        audit_partitions.convert_to_partitioned(engine, batch_size=args.batch_size, log=print)
+
+
+if __name__ == "__main__":
+    main()
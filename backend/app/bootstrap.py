@@ -1,9 +1,9 @@
 from __future__ import annotations
 import os
-from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.db.session import SessionLocal
+from app.db.unit_of_work import unit_of_work
 from app.models.user import User, UserRole
 from app.services.users import create_user
 
@@ -15,8 +15,7 @@ def run_bootstrap() -> None:
     if not admin_email or not admin_password:
         return
 
-    db: Session = SessionLocal()
-    try:
+    with unit_of_work(SessionLocal) as db:
         exists = db.scalar(select(User).where(User.email == admin_email))
         if exists:
             return
@@ -29,9 +28,7 @@ def run_bootstrap() -> None:
             password=admin_password,
             church_ids=[],
         )
-        print("Bootstrap: admin user created")
-    finally:
-        db.close()
+    print("Bootstrap: admin user created")
 
 
 if __name__ == "__main__":
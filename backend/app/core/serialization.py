@@ -0,0 +1,85 @@
+"""Fast JSON serialization path for heavy responses.
+
+Opt-in through ``settings.fast_json_responses``. When disabled every helper
+here is a no-op and routes fall back to FastAPI's default ``response_model``
+validation + ``JSONResponse`` encoding. When enabled, routes without a
+``response_model`` answer with ``ORJSONResponse`` (``use_fast_json_without_response_model``);
+the others keep ``JSONResponse`` or go through ``fast_response``.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Type
+
+from fastapi import FastAPI, Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, request_response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    ORJSONResponse = None
+
+
+@lru_cache(maxsize=None)
+def get_adapter(schema: Any) -> TypeAdapter:
+    """Return a cached TypeAdapter for a response schema (e.g. ``InventoryRead`` or ``List[AuditLogRead]``)."""
+    return TypeAdapter(schema)
+
+
+def dump_json(schema: Any, obj: Any, *, trusted: bool = False) -> bytes:
+    """Encode ``obj`` as JSON bytes using the precompiled serializer of ``schema``.
+
+    ``trusted=True`` means ``obj`` is already an instance of ``schema`` (built by
+    the route/service) and skips validation entirely. Otherwise the object (ORM
+    entity, dict...) is validated once with ``from_attributes=True``.
+    """
+    adapter = get_adapter(schema)
+    if not trusted:
+        obj = adapter.validate_python(obj, from_attributes=True)
+    return adapter.dump_json(obj)
+
+
+def fast_response(schema: Any, obj: Any, *, trusted: bool = False, status_code: int = 200) -> Any:
+    """Return a pre-encoded JSON ``Response`` when the fast path is enabled.
+
+    When ``settings.fast_json_responses`` is off the object is returned as is,
+    so FastAPI keeps handling it through the route's ``response_model``.
+    """
+    if not settings.fast_json_responses:
+        return obj
+    return Response(
+        content=dump_json(schema, obj, trusted=trusted),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+def default_response_class() -> Type[Response]:
+    """Response class for the routes without a response_model."""
+    if settings.fast_json_responses and ORJSONResponse is not None:
+        return ORJSONResponse
+    return JSONResponse
+
+
+def use_fast_json_without_response_model(app: FastAPI) -> None:
+    """Switch the routes of ``app`` without a response_model (and without their own response_class)
+    to ``default_response_class()``. Call it once every route is registered."""
+    response_class = default_response_class()
+    if response_class is JSONResponse:
+        return
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or route.response_model is not None:
+            continue
+        # routes declared on the app keep FastAPI's placeholder, included ones the resolved class
+        current = route.response_class
+        if isinstance(current, DefaultPlaceholder):
+            current = current.value
+        if current is JSONResponse:
+            route.response_class = response_class
+            # the request handler captures the response class when the route is built
+            route.app = request_response(route.get_route_handler())
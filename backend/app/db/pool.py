@@ -0,0 +1,279 @@
+"""Connection-pool instrumentation.
+
+Every engine created in ``app.db.session`` goes through ``instrument_engine``,
+which records per engine:
+
+- checkout latency (time spent waiting for / opening a pooled connection)
+  and pool timeouts (exhaustion);
+- connect latency and pre-ping latency (the pre-ping runs between the pool
+  handing out the connection and the ``checkout`` event);
+- in-use / overflow / idle counts (read from the pool on demand);
+- connections held longer than ``db_leak_threshold_seconds``, logged once
+  with the stack that checked them out. Checkout only keeps the code
+  objects and line numbers of that stack; it is formatted when reported.
+"""
+from __future__ import annotations
+import logging
+import sys
+import threading
+import time
+import traceback
+from types import CodeType
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# connection record info keys: handed out by the pool at (perf_counter), opened by this checkout
+_GOT_AT = "pool_got_at"
+_FRESH = "pool_fresh"
+# frames kept per checkout, innermost first (SQLAlchemy's own come first)
+_STACK_DEPTH = 60
+
+
+class LatencyStat:
+    """Count / total / max of a latency, in seconds."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "total_s": round(self.total, 3),
+        }
+
+
+class PoolStats:
+    def __init__(self, name: str, leak_threshold: float = 0.0) -> None:
+        self.name = name
+        self.leak_threshold = leak_threshold
+        self.lock = threading.Lock()
+        self.checkout_wait = LatencyStat()
+        self.connect = LatencyStat()
+        self.pre_ping = LatencyStat()
+        self.timeouts = 0
+        self.invalidated = 0
+        self.leaks_reported = 0
+        # id(connection record) -> (checkout time, thread name, [(code, line), ...])
+        self.held: Dict[int, tuple] = {}
+        self.pool: Optional[QueuePool] = None
+
+    def observe(self, stat: LatencyStat, seconds: float) -> None:
+        with self.lock:
+            stat.observe(seconds)
+
+    def long_held(self, threshold: Optional[float] = None, with_stack: bool = True) -> List[Dict[str, Any]]:
+        threshold = self.leak_threshold if threshold is None else threshold
+        now = time.monotonic()
+        with self.lock:
+            items = list(self.held.items())
+        held = []
+        for key, (since, thread, frames) in items:
+            if now - since >= threshold:
+                entry = {"id": key, "held_s": round(now - since, 1), "thread": thread}
+                if with_stack:
+                    entry["stack"] = _format_stack(frames)
+                held.append(entry)
+        return held
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self.pool
+        with self.lock:
+            data = {
+                "checkout_wait": self.checkout_wait.as_dict(),
+                "connect": self.connect.as_dict(),
+                "pre_ping": self.pre_ping.as_dict(),
+                "timeouts": self.timeouts,
+                "invalidated": self.invalidated,
+                "leaks_reported": self.leaks_reported,
+            }
+        if pool is not None:
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "idle": pool.checkedin(),
+                "max_overflow": getattr(pool, "max_overflow", None),
+            })
+        if self.leak_threshold:
+            data["held_past_threshold"] = [
+                {"held_s": h["held_s"], "thread": h["thread"]} for h in self.long_held(with_stack=False)
+            ]
+        return data
+
+
+# engine name ("primary", "async", ...) -> stats
+pool_stats: Dict[str, PoolStats] = {}
+
+
+class _InstrumentedPoolMixin:
+    """Times how long callers wait for a connection (includes opening new ones)."""
+
+    _stats: Optional[PoolStats] = None
+
+    def __init__(self, *args, max_overflow: int = 10, pre_ping: bool = False, **kw):
+        super().__init__(*args, max_overflow=max_overflow, pre_ping=pre_ping, **kw)
+        # SQLAlchemy keeps these private; the stats and health checks read them
+        self.max_overflow = max_overflow
+        self.pre_ping = pre_ping
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            if self._stats is not None:
+                with self._stats.lock:
+                    self._stats.timeouts += 1
+            raise
+        if self._stats is not None:
+            now = time.perf_counter()
+            self._stats.observe(self._stats.checkout_wait, now - start)
+            conn.info[_GOT_AT] = now
+        return conn
+
+    def recreate(self):
+        # engine.dispose() swaps the pool; keep reporting into the same stats
+        new_pool = super().recreate()
+        new_pool._stats = self._stats
+        if self._stats is not None:
+            self._stats.pool = new_pool
+        return new_pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _acquisition_stack() -> List[Tuple[CodeType, int]]:
+    """The caller's frames as (code, line): no source lookup on the checkout path."""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < _STACK_DEPTH:
+        frames.append((frame.f_code, frame.f_lineno))
+        frame = frame.f_back
+    return frames
+
+
+def _format_stack(frames: List[Tuple[CodeType, int]]) -> str:
+    # Drop SQLAlchemy/pool frames: what matters is the application code that took the connection
+    summary = traceback.StackSummary.from_list([
+        (code.co_filename, line, code.co_name, None)
+        for code, line in reversed(frames)
+        if "/sqlalchemy/" not in code.co_filename and not code.co_filename.endswith("app/db/pool.py")
+    ][-15:])
+    return "".join(summary.format())
+
+
+def instrument_engine(engine: Engine, name: str, leak_threshold: float = 0.0) -> PoolStats:
+    """Attach the pool listeners to ``engine`` (a sync engine or ``AsyncEngine.sync_engine``)."""
+    stats = PoolStats(name, leak_threshold)
+    pool_stats[name] = stats
+    pool = engine.pool
+    if isinstance(pool, _InstrumentedPoolMixin):
+        pool._stats = stats
+    stats.pool = pool
+
+    @event.listens_for(engine, "do_connect")
+    def _timed_connect(dialect, conn_rec, cargs, cparams):
+        start = time.perf_counter()
+        try:
+            return dialect.connect(*cargs, **cparams)
+        finally:
+            stats.observe(stats.connect, time.perf_counter() - start)
+            # a new connection is not pinged
+            conn_rec.info[_FRESH] = True
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        with stats.lock:
+            stats.invalidated += 1
+
+    pre_ping = getattr(pool, "pre_ping", False)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        info = connection_record.info
+        got_at = info.pop(_GOT_AT, None)
+        if pre_ping and got_at is not None and not info.pop(_FRESH, False):
+            stats.observe(stats.pre_ping, time.perf_counter() - got_at)
+        if leak_threshold:
+            entry = (time.monotonic(), threading.current_thread().name, _acquisition_stack())
+            with stats.lock:
+                stats.held[id(connection_record)] = entry
+
+    if leak_threshold:
+        @event.listens_for(engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            with stats.lock:
+                stats.held.pop(id(connection_record), None)
+
+        _start_leak_watcher()
+
+    return stats
+
+
+_watcher_started = False
+
+
+def _start_leak_watcher() -> None:
+    global _watcher_started
+    if _watcher_started:
+        return
+    _watcher_started = True
+    threading.Thread(target=_watch_leaks, name="db-leak-watcher", daemon=True).start()
+
+
+def _watch_leaks() -> None:
+    reported: set = set()
+    while True:
+        interval = min((s.leak_threshold for s in pool_stats.values() if s.leak_threshold), default=30.0)
+        time.sleep(max(interval / 2, 1.0))
+        for stats in list(pool_stats.values()):
+            if not stats.leak_threshold:
+                continue
+            current = stats.long_held()
+            for held in current:
+                key = (stats.name, held["id"])
+                if key in reported:
+                    continue
+                reported.add(key)
+                with stats.lock:
+                    stats.leaks_reported += 1
+                logger.warning(
+                    "DB connection from pool '%s' held for %.1fs by thread %s; checked out at:\n%s",
+                    stats.name, held["held_s"], held["thread"], held["stack"],
+                )
+            # forget connections that were returned in the meantime
+            still_held = {(stats.name, h["id"]) for h in stats.long_held(0, with_stack=False)}
+            reported = {k for k in reported if k[0] != stats.name or k in still_held}
+
+
+def recommended_pool_settings(workers: int, max_connections: int, engines: int = 2, reserved: int = 10) -> Dict[str, int]:
+    """Per-engine pool sizing that keeps all workers within the server's max_connections.
+
+    ``reserved`` connections are left for migrations, psql, backups... The
+    remaining budget is split evenly between workers and engines (sync + async
+    per worker); a third of each share is kept open, the rest is overflow.
+    """
+    share = max((max_connections - reserved) // max(workers, 1) // max(engines, 1), 2)
+    pool_size = max(share // 3, 1)
+    return {"pool_size": pool_size, "max_overflow": share - pool_size}
@@ -0,0 +1,129 @@
+"""SQL profiling: statement fingerprints, per-route aggregates and the slow-query log.
+
+The cursor events in ``app.db.query_stats`` time every statement. Here:
+
+- ``fingerprint`` normalizes SQL (literals, bind parameters and IN lists
+  replaced by placeholders) so the same query issued with different values
+  is reported once;
+- statements slower than ``slow_query_ms`` go to the ``app.slow_queries``
+  logger (and to ``slow_query_log_file`` when set), with route and fingerprint;
+- ``route_profiles`` accumulates, per route template, requests, statements,
+  DB time and the slowest fingerprints (GET /health/queries).
+"""
+from __future__ import annotations
+import hashlib
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+slow_query_logger = logging.getLogger("app.slow_queries")
+if settings.slow_query_log_file:
+    _handler = logging.FileHandler(settings.slow_query_log_file)
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(_handler)
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PARAMS = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LISTS = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    """SQL with literals and parameters replaced by ``?`` and lists collapsed."""
+    sql = _COMMENTS.sub(" ", sql)
+    sql = _STRINGS.sub("?", sql)
+    sql = _PARAMS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _VALUES_LISTS.sub(r"\1, ...", sql)
+    sql = _IN_LISTS.sub("(...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def fingerprint_id(fp: str) -> str:
+    return hashlib.md5(fp.encode()).hexdigest()[:12]
+
+
+def log_slow_query(statement: str, elapsed: float, route: Optional[str]) -> None:
+    fp = fingerprint(statement)
+    slow_query_logger.warning(
+        "slow query %.1f ms route=%s fingerprint=%s sql=%s",
+        elapsed * 1000, route or "-", fingerprint_id(fp), fp,
+    )
+
+
+class RouteProfiles:
+    """Per-route totals and slowest statement fingerprints, for this process."""
+
+    max_fingerprints = 20
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, route: str, queries: int, db_time: float, slowest: List[Tuple[float, str]]) -> None:
+        fps = [(elapsed, fingerprint(sql)) for elapsed, sql in slowest]
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "requests": 0, "queries": 0, "db_time": 0.0, "max_queries": 0, "statements": {},
+                }
+            entry["requests"] += 1
+            entry["queries"] += queries
+            entry["db_time"] += db_time
+            entry["max_queries"] = max(entry["max_queries"], queries)
+            statements = entry["statements"]
+            for elapsed, fp in fps:
+                stat = statements.get(fp)
+                if stat is None:
+                    if len(statements) >= self.max_fingerprints:
+                        smallest = min(statements, key=lambda k: statements[k]["total"])
+                        if statements[smallest]["total"] >= elapsed:
+                            continue
+                        del statements[smallest]
+                    stat = statements[fp] = {"count": 0, "total": 0.0, "max": 0.0}
+                stat["count"] += 1
+                stat["total"] += elapsed
+                stat["max"] = max(stat["max"], elapsed)
+
+    def snapshot(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            routes = [(route, dict(e, statements=dict(e["statements"]))) for route, e in self._routes.items()]
+        routes.sort(key=lambda item: item[1]["db_time"], reverse=True)
+        result = []
+        for route, e in routes[:limit]:
+            statements = sorted(e["statements"].items(), key=lambda item: item[1]["total"], reverse=True)
+            result.append({
+                "route": route,
+                "requests": e["requests"],
+                "avg_queries": round(e["queries"] / e["requests"], 1),
+                "max_queries": e["max_queries"],
+                "db_ms_total": round(e["db_time"] * 1000, 1),
+                "db_ms_avg": round(e["db_time"] * 1000 / e["requests"], 2),
+                "slowest": [
+                    {
+                        "fingerprint": fingerprint_id(fp),
+                        "sql": fp,
+                        "count": s["count"],
+                        "total_ms": round(s["total"] * 1000, 1),
+                        "max_ms": round(s["max"] * 1000, 1),
+                    }
+                    for fp, s in statements[:5]
+                ],
+            })
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_profiles = RouteProfiles()
@@ -0,0 +1,185 @@
+"""Per-request query budgets.
+
+``QueryBudgetMiddleware`` puts a ``QueryStats`` in ``current_query_stats`` for
+every request. Engine events then:
+
+- count the statements, the commits and the time spent in the database;
+- run ``SET LOCAL statement_timeout`` at the start of each session
+  transaction, with the timeout of the endpoint category;
+- turn Postgres "canceling statement due to statement timeout" errors into
+  ``QueryBudgetExceeded``;
+- with ``query_budget_enforce``, refuse to run more statements once the
+  request is over its query count / DB time budget.
+
+app.main answers ``QueryBudgetExceeded`` with 503 and ``ReportTooLarge`` with
+400. Budgets live in ``Settings``; the "report" category covers the report,
+dashboard and audit endpoints, everything else uses the default one.
+
+The same timings feed the profiling in ``app.db.profiling`` (slowest
+statements per request and route, slow-query log).
+"""
+from __future__ import annotations
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.profiling import log_slow_query
+
+REPORT_PATH_PREFIXES = ("/reports", "/audit", "/dash")
+
+# PostgreSQL SQLSTATE for query_canceled (statement_timeout)
+QUERY_CANCELED = "57014"
+
+
+class QueryBudgetExceeded(Exception):
+    """The request is over its query budget or a statement hit its timeout."""
+
+
+class ReportTooLarge(ValueError):
+    """A report query returned more than ``report_max_rows`` rows."""
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    category: str
+    statement_timeout_ms: int
+    max_queries: int
+    max_db_ms: int
+
+
+def budget_for_path(path: str) -> QueryBudget:
+    if path.startswith(REPORT_PATH_PREFIXES):
+        return QueryBudget(
+            "report",
+            settings.report_statement_timeout_ms,
+            settings.report_query_budget_max_queries,
+            settings.report_query_budget_max_db_ms,
+        )
+    return QueryBudget(
+        "default",
+        settings.statement_timeout_ms,
+        settings.query_budget_max_queries,
+        settings.query_budget_max_db_ms,
+    )
+
+
+class QueryStats:
+    """Statements run by the current request and the time spent on them."""
+
+    keep_slowest = 5
+
+    def __init__(self, budget: QueryBudget, route: Optional[str] = None):
+        self.budget = budget
+        self.route = route
+        self.count = 0
+        self.db_time = 0.0
+        # transactions committed (one per request with the unit of work)
+        self.commits = 0
+        # (seconds, sql) of the slowest statements, slowest first
+        self.slowest: List[Tuple[float, str]] = []
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.db_time += elapsed
+        slowest = self.slowest
+        if len(slowest) < self.keep_slowest or elapsed > slowest[-1][0]:
+            slowest.append((elapsed, statement))
+            slowest.sort(key=lambda item: item[0], reverse=True)
+            del slowest[self.keep_slowest:]
+
+    @property
+    def db_ms(self) -> float:
+        return self.db_time * 1000
+
+    def over_budget(self) -> Optional[str]:
+        b = self.budget
+        if b.max_queries and self.count > b.max_queries:
+            return f"{self.count} consultas (limite {b.max_queries})"
+        if b.max_db_ms and self.db_ms > b.max_db_ms:
+            return f"{self.db_ms:.0f} ms no banco (limite {b.max_db_ms} ms)"
+        return None
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def fetch_limited(db: Session, query: Any, max_rows: Optional[int] = None) -> List[Any]:
+    """Rows of a report query, refusing results larger than ``report_max_rows``."""
+    max_rows = settings.report_max_rows if max_rows is None else max_rows
+    if not max_rows:
+        return db.execute(query).fetchall()
+    rows = db.execute(query.limit(max_rows + 1)).fetchall()
+    if len(rows) > max_rows:
+        raise ReportTooLarge(
+            f"O relatório excede {max_rows} linhas; refine os filtros (período, igreja, produto)"
+        )
+    return rows
+
+
+def _internal(context) -> bool:
+    return context is not None and context.execution_options.get("query_budget_internal", False)
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session: Session, transaction, connection) -> None:
+    stats = current_query_stats.get()
+    if stats is None or not stats.budget.statement_timeout_ms or connection.dialect.name != "postgresql":
+        return
+    connection.exec_driver_sql(
+        f"SET LOCAL statement_timeout = {int(stats.budget.statement_timeout_ms)}",
+        execution_options={"query_budget_internal": True},
+    )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _internal(context):
+        return
+    stats = current_query_stats.get()
+    if stats is not None and settings.query_budget_enforce:
+        exceeded = stats.over_budget()
+        if exceeded:
+            raise QueryBudgetExceeded(f"Requisição excedeu o orçamento de consultas: {exceeded}")
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _internal(context):
+        return
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+        log_slow_query(statement, elapsed, stats.route if stats is not None else None)
+
+
+@event.listens_for(Engine, "commit")
+def _count_commit(conn) -> None:
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.commits += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _statement_timeout(context) -> None:
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+    if getattr(context.original_exception, "pgcode", None) == QUERY_CANCELED:
+        stats = current_query_stats.get()
+        timeout = stats.budget.statement_timeout_ms if stats else None
+        raise QueryBudgetExceeded(
+            f"Consulta cancelada por exceder o tempo limite ({timeout} ms)" if timeout
+            else "Consulta cancelada por exceder o tempo limite"
+        ) from context.original_exception
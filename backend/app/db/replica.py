@@ -0,0 +1,71 @@
+"""Read-your-writes bookkeeping for the read replica.
+
+Read-only endpoints use the replica (``read_db_dep``), which can lag behind the
+primary. A user who just wrote something must see it on the next screen, so
+sessions opened by ``db_dep`` carry the user (``session.info["writer"]``) and,
+when such a session commits a write, that user is sent to the primary for
+``replica_read_your_writes_seconds``.
+
+The tracker is per process: with several uvicorn workers, pick a window
+comfortably larger than the usual replica lag.
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+class RecentWriters:
+    """Users (token subjects) that committed a write in the last ``window`` seconds."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._lock = threading.Lock()
+        self._until: Dict[str, float] = {}
+
+    def mark(self, writer: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[writer] = now + self.window
+            if len(self._until) > 1000:
+                # drop expired entries now and then
+                self._until = {k: v for k, v in self._until.items() if v > now}
+
+    def wrote_recently(self, writer: Optional[str]) -> bool:
+        if writer is None:
+            return False
+        until = self._until.get(writer)
+        return until is not None and until > time.monotonic()
+
+
+recent_writers = RecentWriters(settings.replica_read_your_writes_seconds)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_dml(orm_execute_state) -> None:
+    # update()/delete()/insert() statements bypass the flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    if session.info.pop("wrote", False):
+        writer = session.info.get("writer")
+        if writer is not None:
+            recent_writers.mark(writer)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_write(session: Session) -> None:
+    session.info.pop("wrote", None)
@@ -1,21 +1,86 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
-
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_size=20,          # Aumentado de 5 para 20
-    max_overflow=40,       # Aumentado de 10 para 40
-    pool_recycle=3600,     # Recicla conexões a cada hora
+from app.db.pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+    recommended_pool_settings,
 )
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+from app.db.unit_of_work import unit_of_work
+import app.db.versioning  # noqa: F401  (row versions of bulk UPDATEs)
+
+
+def pool_options() -> dict:
+    """Pool arguments for each engine (sync and async), from Settings.
+
+    Pool size / overflow not set explicitly are derived from the number of
+    uvicorn workers, so that workers x engines x (size + overflow) stays
+    under the server's max_connections.
+    """
+    recommended = recommended_pool_settings(settings.web_concurrency, settings.db_max_connections)
+    return {
+        "pool_size": settings.db_pool_size if settings.db_pool_size is not None else recommended["pool_size"],
+        "max_overflow": settings.db_max_overflow if settings.db_max_overflow is not None else recommended["max_overflow"],
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+engine = create_engine(settings.database_url, poolclass=InstrumentedQueuePool, **pool_options())
+instrument_engine(engine, "primary", settings.db_leak_threshold_seconds)
+# Objects stay loaded after commit: services return them without a refresh (see app.db.writes)
+SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
 
 
 def get_db():
-    db = SessionLocal()
-    try:
+    # One transaction per request, committed when the route returns (see app.db.unit_of_work)
+    with unit_of_work(SessionLocal) as db:
+        yield db
+
+
+def async_database_url(url: str) -> str:
+    """Same database as ``url``, through the asyncpg driver."""
+    u = make_url(url)
+    if u.get_backend_name() == "postgresql":
+        u = u.set(drivername="postgresql+asyncpg")
+        if "sslmode" in u.query:
+            # asyncpg names it "ssl"
+            u = u.update_query_dict({"ssl": u.query["sslmode"]}).difference_update_query(["sslmode"])
+    return u.render_as_string(hide_password=False)
+
+
+# Async engine for read-heavy endpoints (async def routes); same pool sizing as the sync one
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    **pool_options(),
+)
+instrument_engine(async_engine.sync_engine, "async", settings.db_leak_threshold_seconds)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# Read replica: same pool settings; without DATABASE_REPLICA_URL reads use the primary engines
+replica_enabled = bool(settings.database_replica_url)
+if replica_enabled:
+    replica_engine = create_engine(settings.database_replica_url, poolclass=InstrumentedQueuePool, **pool_options())
+    instrument_engine(replica_engine, "replica", settings.db_leak_threshold_seconds)
+    async_replica_engine = create_async_engine(
+        async_database_url(settings.database_replica_url),
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **pool_options(),
+    )
+    instrument_engine(async_replica_engine.sync_engine, "async-replica", settings.db_leak_threshold_seconds)
+else:
+    replica_engine, async_replica_engine = engine, async_engine
+ReplicaSessionLocal = sessionmaker(bind=replica_engine, autocommit=False, autoflush=False, expire_on_commit=False)
+AsyncReplicaSessionLocal = async_sessionmaker(bind=async_replica_engine, autoflush=False, expire_on_commit=False)
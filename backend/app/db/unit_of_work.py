@@ -0,0 +1,82 @@
+"""One transaction per request (unit of work).
+
+``get_db`` (behind ``db_dep``) runs the request session in ``unit_of_work``.
+Services add and flush (``app.db.writes.save``, ``db.flush()``) and never
+commit. When the route returns, the transaction is committed once: after the
+response body was serialized, before it is sent. If the route raised
+(``HTTPException`` included), it is rolled back, so a failed operation leaves
+nothing half-written.
+
+- ``savepoint(db)`` runs a nested operation in a SAVEPOINT. An exception
+  inside rolls back only that block and propagates; the caller may catch it
+  and go on with the rest of the transaction.
+- ``after_commit(db, fn)`` defers a side effect that must only happen for
+  committed data (WhatsApp/e-mail notifications, audit entries) until the
+  commit. It is dropped on rollback.
+
+Scripts and tests use ``unit_of_work()`` directly.
+"""
+from __future__ import annotations
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# session.info key of the callbacks waiting for the commit
+_AFTER_COMMIT = "after_commit"
+
+
+@contextmanager
+def unit_of_work(factory: Optional[Callable[[], Session]] = None) -> Iterator[Session]:
+    """A session whose transaction commits when the block ends, or rolls back if it raised."""
+    if factory is None:
+        from app.db.session import SessionLocal
+        factory = SessionLocal
+    db = factory()
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@contextmanager
+def savepoint(db: Session) -> Iterator[Session]:
+    """Run a block in a SAVEPOINT of the current transaction."""
+    pending = len(db.info.get(_AFTER_COMMIT, ()))
+    try:
+        with db.begin_nested():
+            yield db
+    except BaseException:
+        # side effects registered inside the block go away with its writes
+        del db.info.get(_AFTER_COMMIT, [])[pending:]
+        raise
+
+
+def after_commit(db: Session, callback: Callable[[], Any]) -> None:
+    """Call ``callback()`` once the current transaction has committed."""
+    db.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT, ()):
+        try:
+            callback()
+        except Exception:
+            logger.exception("after-commit callback failed")
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction) -> None:
+    # callbacks still queued when the outermost transaction ends were rolled
+    # back (savepoints end here too; savepoint() trims their own callbacks)
+    if transaction.parent is None:
+        session.info.pop(_AFTER_COMMIT, None)
@@ -0,0 +1,62 @@
+"""Optimistic concurrency: row versions of orders, products and inventory counts.
+
+These models map a ``version`` column as SQLAlchemy's ``version_id_col``.
+Every ORM UPDATE and DELETE of such a row runs as ``... WHERE id = :id AND
+version = :loaded`` and increments the version. If another transaction changed
+the row after it was loaded, no row matches and the flush raises
+``StaleDataError``. The API answers it with 409 instead of silently
+overwriting the other edit. No row is locked while reading.
+
+- Bulk ``update(Model)`` statements (``app.db.writes.update_returning``, the
+  inventory finalize) bypass the flush. ``_bump_bulk_updates`` adds
+  ``version = version + 1`` to them, so stock changes also invalidate the
+  version a client holds.
+- ``touch(obj)`` bumps the version of a row whose own columns did not change,
+  e.g. an order whose items were edited. Audit capture does not report it as
+  a change (``is_touch``).
+
+The API exposes the version as the ``ETag`` of the resource. ``If-Match`` on
+PUT compares it with the row it loaded (``app.api.deps.check_if_match``).
+"""
+from __future__ import annotations
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+
+
+# session.info key: rows flagged by touch() until the next flush
+_TOUCHED = "touched_rows"
+
+
+def touch(obj: Any) -> None:
+    """Make the next flush UPDATE the row of ``obj``, incrementing its version."""
+    state = inspect(obj)
+    mapper = state.mapper
+    # the version column itself cannot be flagged: rewrite an ordinary column with its own value
+    key = next(
+        attr.key for attr in mapper.column_attrs
+        if attr.columns[0] is not mapper.version_id_col and not attr.columns[0].primary_key
+    )
+    flag_modified(obj, key)
+    state.session.info.setdefault(_TOUCHED, {})[state] = key
+
+
+def is_touch(obj: Any, key: str) -> bool:
+    """Whether attribute ``key`` of ``obj`` is only pending because of ``touch`` (not a change)."""
+    state = inspect(obj)
+    return state.session is not None and state.session.info.get(_TOUCHED, {}).get(state) == key
+
+
+@event.listens_for(Session, "after_flush")
+def _forget_touched(session: Session, flush_context) -> None:
+    session.info.pop(_TOUCHED, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_bulk_updates(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    if orm_execute_state.is_update and mapper is not None and mapper.version_id_col is not None:
+        column = mapper.version_id_col
+        orm_execute_state.statement = orm_execute_state.statement.values({column.key: column + 1})
@@ -0,0 +1,67 @@
+"""Write helpers that return what they wrote, without reloading it.
+
+Sessions are created with ``expire_on_commit=False``. After a commit the
+objects keep the values the flush sent; the generated primary keys come back
+from the flush's ``INSERT ... RETURNING``, and every default is assigned in
+Python. The old ``db.commit(); db.refresh(obj)`` therefore cost one extra
+SELECT, plus one per ``selectin`` relationship, and returned nothing new.
+
+Services do not commit: the request transaction commits once when the route
+returns (app.db.unit_of_work).
+
+- ``save`` adds an object and flushes it, so its id is known.
+- ``update_returning`` is for column values computed by the database
+  (``stock_qty = stock_qty + :delta``). It runs ``UPDATE ... WHERE <pk> AND
+  <conditions> RETURNING <columns>`` and copies the returned row into the
+  loaded object. It returns None when the conditions did not match, so a
+  guard such as "stock does not go negative" is checked in the same
+  statement.
+
+Both go through the ORM, so the session events still see the writes
+(catalog versions, replica routing, autocomplete invalidation, business
+metrics).
+"""
+from __future__ import annotations
+from typing import Any, Mapping, Optional, TypeVar
+
+from sqlalchemy import inspect, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql.elements import ColumnElement
+
+T = TypeVar("T")
+
+
+def save(db: Session, obj: T) -> T:
+    """Add ``obj`` and flush it (INSERT ... RETURNING id)."""
+    db.add(obj)
+    db.flush()
+    return obj
+
+
+def update_returning(db: Session, obj: T, values: Mapping[str, Any], *where: ColumnElement) -> Optional[T]:
+    """Update the row of ``obj`` in one statement and load the result into ``obj``.
+
+    ``values`` maps attribute names to values or SQL expressions. Pending
+    changes are flushed first, so the statement applies on top of them.
+    Deferred columns are not returned.
+    """
+    state = inspect(obj)
+    mapper = state.mapper
+    if db.dirty or db.new or db.deleted:
+        db.flush()
+    key = [column == value for column, value in zip(mapper.primary_key, mapper.primary_key_from_instance(obj))]
+    attrs = [attr for attr in mapper.column_attrs if not attr.deferred]
+    stmt = (
+        update(mapper.class_)
+        .where(*key, *where)
+        .values(dict(values))
+        .returning(*(attr.columns[0] for attr in attrs))
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(stmt).one_or_none()
+    if row is None:
+        return None
+    for attr, value in zip(attrs, row):
+        set_committed_value(obj, attr.key, value)
+    return obj
@@ -1,7 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.core.config import settings
+from app.core.serialization import use_fast_json_without_response_model
 from app.api.routes.health import router as health_router
 from app.api.routes.auth import router as auth_router
 from app.api.routes.users import router as users_router
@@ -14,10 +17,20 @@ from app.api.routes.dash import router as dash_router
 from app.api.routes.reports import router as reports_router
 from app.api.routes.audit import router as audit_router
 from app.api.routes.inventory import router as inventory_router
+from app.api.routes.catalog import router as catalog_router
+from app.api.routes.metrics import router as metrics_router
 from app.api.middleware.audit import AuditMiddleware
+from app.api.middleware.metrics import MetricsMiddleware
+from app.api.middleware.query_budget import QueryBudgetMiddleware
+from app.db.query_stats import QueryBudgetExceeded, ReportTooLarge
+from app.services.audit_partitions import maintain_on_startup
+from app.services.audit_writer import audit_writer
 
 app = FastAPI(title="CCB CNS API", version="0.1.0")
 
+# Query budgets (inside the audit middleware: its own audit INSERT is not charged to the request)
+app.add_middleware(QueryBudgetMiddleware)
+
 # Add Audit Middleware
 app.add_middleware(AuditMiddleware)
 
@@ -29,6 +42,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost: request latency includes every other middleware
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# A versioned row changed between loading it and the flush (see app.db.versioning)
+async def stale_data_handler(request: Request, exc: StaleDataError) -> JSONResponse:
+    return JSONResponse(status_code=409, content={"detail": "Modified by another request; reload it and try again"})
+
+
+app.add_exception_handler(StaleDataError, stale_data_handler)
+
+# Query budgets and report size limits (see app.db.query_stats)
+async def query_budget_handler(request: Request, exc: QueryBudgetExceeded) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+async def report_too_large_handler(request: Request, exc: ReportTooLarge) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+app.add_exception_handler(QueryBudgetExceeded, query_budget_handler)
+app.add_exception_handler(ReportTooLarge, report_too_large_handler)
+
+# Upcoming audit_log partitions and retention
+app.add_event_handler("startup", maintain_on_startup)
+
+# Write queued audit entries before the worker exits
+app.add_event_handler("shutdown", audit_writer.stop)
+
 app.include_router(health_router)
 app.include_router(auth_router)
 app.include_router(users_router)
@@ -41,8 +83,15 @@ app.include_router(dash_router)
 app.include_router(reports_router)
 app.include_router(audit_router)
 app.include_router(inventory_router)
+app.include_router(catalog_router)
+if settings.metrics_enabled:
+    app.include_router(metrics_router)
 
 
 @app.get("/", tags=["root"])  # simple root
 def read_root():
     return {"name": "CCB CNS API", "status": "ok"}
+
+
+# ORJSONResponse for the routes without a response_model (FAST_JSON_RESPONSES)
+use_fast_json_without_response_model(app)
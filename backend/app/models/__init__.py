@@ -4,6 +4,8 @@ from .category import Category
 from .product import Product
 from .order import Order, OrderItem, OrderStatus
 from .stock_movement import StockMovement, MovementType
+from .stock_snapshot import StockSnapshot
 from .password_reset import PasswordReset
-from .audit_log import AuditLog, AuditAction, AuditResource
+from .audit_log import AuditLog, AuditAction, AuditResource, AuditCounter
 from .inventory import InventoryCount, InventoryItem, InventoryStatus
+from .catalog import CatalogTombstone
@@ -1,9 +1,10 @@
 from __future__ import annotations
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import Any, Dict, Optional
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, JSON, ForeignKey
+from sqlalchemy import BigInteger, Boolean, Column, Computed, Date, DateTime, Index, Integer, PrimaryKeyConstraint, String, Text, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -47,8 +48,23 @@ class AuditResource(str, Enum):
 
 class AuditLog(Base):
     __tablename__ = "audit_log"
-
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Monthly range partitions on timestamp (app.services.audit_partitions); the
+    # primary key has to include the partition key, rows are still identified by id
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "timestamp"),
+        Index("ix_audit_log_timestamp", "timestamp"),
+        Index("ix_audit_log_user_id", "user_id"),
+        Index("ix_audit_log_resource", "resource", "resource_id"),
+        # containment filters on request metadata (app.services.audit_search)
+        Index(
+            "ix_audit_log_extra_metadata", "extra_metadata",
+            postgresql_using="gin", postgresql_ops={"extra_metadata": "jsonb_path_ops"},
+        ),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: Mapped[int] = mapped_column(Integer, autoincrement=True)
     timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Who performed the action
@@ -61,8 +77,8 @@ class AuditLog(Base):
     resource_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
     # Data changes
-    old_values: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
-    new_values: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    old_values: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+    new_values: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
 
     # Context
     ip_address: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)  # IPv4/IPv6
@@ -74,7 +90,29 @@ class AuditLog(Base):
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     # Additional metadata
-    extra_metadata: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    extra_metadata: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+
+    # Text matched by GET /audit?search= (trigram index when pg_trgm is installed)
+    search_text: Mapped[Optional[str]] = mapped_column(
+        Text,
+        Computed("coalesce(error_message, '') || ' ' || coalesce(extra_metadata::text, '')", persisted=True),
+        deferred=True,
+    )
 
     def __repr__(self) -> str:
-        return f"<AuditLog(id={self.id}, action={self.action}, resource={self.resource}, user_id={self.user_id})>"
\ No newline at end of file
+        return f"<AuditLog(id={self.id}, action={self.action}, resource={self.resource}, user_id={self.user_id})>"
+
+
+class AuditCounter(Base):
+    """Number of audit_log rows per UTC day and (action, resource, success).
+
+    Incremented in the same transaction as the audit rows (app.services.audit_counters),
+    so GET /audit/stats does not have to aggregate audit_log.
+    """
+    __tablename__ = "audit_counters"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    action: Mapped[str] = mapped_column(String(50), primary_key=True)
+    resource: Mapped[str] = mapped_column(String(100), primary_key=True)
+    success: Mapped[bool] = mapped_column(Boolean, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
\ No newline at end of file
@@ -0,0 +1,77 @@
+from __future__ import annotations
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, event, literal_column, select
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from app.db.base import Base
+from app.models.category import Category
+from app.models.church import Church
+from app.models.product import Product
+
+# Entities exposed by GET /catalog; every write to them gets a new catalog version
+VERSIONED_MODELS = (Product, Category, Church)
+
+# id of the writing transaction (xid8, never wraps around)
+CURRENT_TRANSACTION_ID = literal_column("pg_current_xact_id()::text::bigint", BigInteger)
+
+
+class CatalogTombstone(Base):
+    """Deleted catalog rows, so delta syncs can tell clients what to drop."""
+    __tablename__ = "catalog_tombstones"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    entity: Mapped[str] = mapped_column(String(20), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    catalog_version: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+def next_catalog_version(session: Session) -> int:
+    """Catalog version of the current transaction: its transaction id.
+
+    Transaction ids only grow, and taking one locks nothing, so catalog
+    writers do not wait for each other. They do not commit in id order:
+    readers return the snapshot's xmin as the sync point instead
+    (app.services.catalog.begin_snapshot).
+    """
+    version = session.info.get("catalog_version")
+    if version is None:
+        version = session.connection().scalar(select(CURRENT_TRANSACTION_ID))
+        session.info["catalog_version"] = version
+    return version
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_catalog_version(session: Session, flush_context, instances) -> None:
+    changed = [
+        obj for obj in chain(session.new, session.dirty)
+        if isinstance(obj, VERSIONED_MODELS)
+        and (obj in session.new or session.is_modified(obj, include_collections=False))
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, VERSIONED_MODELS)]
+    if not changed and not deleted:
+        return
+    version = next_catalog_version(session)
+    for obj in changed:
+        obj.catalog_version = version
+    for obj in deleted:
+        session.add(CatalogTombstone(entity=obj.__tablename__, entity_id=obj.id, catalog_version=version))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _stamp_bulk_updates(orm_execute_state):
+    # update(Product)... bypasses the flush; the statement stamps the rows itself
+    mapper = orm_execute_state.bind_mapper
+    if orm_execute_state.is_update and mapper is not None and issubclass(mapper.class_, VERSIONED_MODELS):
+        return orm_execute_state.invoke_statement(
+            statement=orm_execute_state.statement.values(catalog_version=CURRENT_TRANSACTION_ID)
+        )
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _reset_catalog_version(session: Session, transaction) -> None:
+    # a savepoint ending keeps the transaction (and its id)
+    if transaction.parent is None:
+        session.info.pop("catalog_version", None)
@@ -2,7 +2,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import DateTime, Integer, String
+from sqlalchemy import BigInteger, DateTime, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -17,6 +17,7 @@ class Church(Base):
     city: Mapped[str] = mapped_column(String(120), nullable=False)
     whatsapp_phone: Mapped[str | None] = mapped_column(String(20), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    catalog_version: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", index=True)
 
     users: Mapped[List["User"]] = relationship(
         "User",
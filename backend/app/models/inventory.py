@@ -3,7 +3,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, Boolean
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, Boolean, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -23,17 +23,41 @@ class InventoryCount(Base):
     status: Mapped[InventoryStatus] = mapped_column(String(20), default=InventoryStatus.EM_ANDAMENTO, index=True)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
     finalized_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Row version (optimistic concurrency, see app.db.versioning)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
 
     created_by = relationship("User", foreign_keys=[created_by_id])
+    # Items are loaded on demand: an inventory holds one row per product, so
+    # they must not come along every time the inventory row is (re)loaded.
     items: Mapped[List["InventoryItem"]] = relationship(
         back_populates="inventory",
         cascade="all,delete-orphan",
-        lazy="selectin",
+        lazy="select",
+        passive_deletes=True,
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
+    # Keyset pagination of an inventory's items (WHERE inventory_id = ? AND id > ?),
+    # plus partial indexes for the "uncounted" and "with difference" filters
+    __table_args__ = (
+        Index("ix_inventory_items_inventory_id_id", "inventory_id", "id"),
+        Index(
+            "ix_inventory_items_uncounted",
+            "inventory_id",
+            "id",
+            postgresql_where=text("counted_qty IS NULL"),
+        ),
+        Index(
+            "ix_inventory_items_with_difference",
+            "inventory_id",
+            "id",
+            postgresql_where=text("difference <> 0"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     inventory_id: Mapped[int] = mapped_column(ForeignKey("inventory_counts.id", ondelete="CASCADE"))
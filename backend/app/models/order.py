@@ -30,6 +30,8 @@ class Order(Base):
     signed_by_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
     signed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     signed_receipt_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    # Row version (optimistic concurrency, see app.db.versioning)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
 
     requester = relationship("User", back_populates="requests", foreign_keys=[requester_id])
     signed_by = relationship("User", foreign_keys=[signed_by_id])
@@ -40,6 +42,8 @@ class Order(Base):
         lazy="selectin",
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -3,7 +3,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import List
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, Numeric, String
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Integer, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -22,6 +22,9 @@ class Product(Base):
     max_qty_per_order: Mapped[int | None] = mapped_column(Integer, nullable=True, default=None)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    catalog_version: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", index=True)
+    # Row version (optimistic concurrency, see app.db.versioning)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
 
     category = relationship("Category", back_populates="products")
     order_items: Mapped[List["OrderItem"]] = relationship(
@@ -33,3 +36,5 @@ class Product(Base):
         lazy="select",
         cascade="all,delete-orphan",
     )
+
+    __mapper_args__ = {"version_id_col": version}
@@ -1,10 +1,10 @@
 from __future__ import annotations
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
 from decimal import Decimal
 
-from sqlalchemy import Date, DateTime, Enum as SAEnum, ForeignKey, Integer, Numeric, String
+from sqlalchemy import Date, DateTime, Enum as SAEnum, ForeignKey, Index, Integer, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import date
 
@@ -16,6 +16,13 @@ class MovementType(str, Enum):
     SAIDA_PEDIDO = "SAIDA_PEDIDO"
     SAIDA_MANUAL = "SAIDA_MANUAL"
     PERDA = "PERDA"
+    # Devolve ao estoque uma saída de pedido (pedido editado ou cancelado): o histórico não é apagado
+    ESTORNO = "ESTORNO"
+
+    @property
+    def sign(self) -> int:
+        """+1 for movements that add to the stock, -1 for the ones that take from it."""
+        return 1 if self in (MovementType.ENTRADA, MovementType.ESTORNO) else -1
 
 
 class StockMovement(Base):
@@ -30,7 +37,13 @@ class StockMovement(Base):
     unit_price: Mapped[Decimal | None] = mapped_column(Numeric(10, 2), nullable=True)
     invoice_number: Mapped[str | None] = mapped_column(String(50), nullable=True)
     invoice_date: Mapped[date | None] = mapped_column(Date, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    # aware UTC, like stock_snapshots.taken_at: a naive value would be read in the session's TimeZone
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     product = relationship("Product", back_populates="movements")
     related_order = relationship("Order")
+
+    __table_args__ = (
+        # stock at a date: the movements of a product between a snapshot and the date
+        Index("ix_stock_movements_product_created", "product_id", "created_at"),
+    )
@@ -0,0 +1,17 @@
+from __future__ import annotations
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class StockSnapshot(Base):
+    """Stock of a product at ``taken_at``: every movement created before it (see app.services.stock_ledger)."""
+
+    __tablename__ = "stock_snapshots"
+
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    taken_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    qty: Mapped[int] = mapped_column(Integer, nullable=False)
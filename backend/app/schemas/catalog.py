@@ -0,0 +1,38 @@
+from __future__ import annotations
+from decimal import Decimal
+from typing import List, Optional
+from pydantic import BaseModel
+
+from app.schemas.category import CategoryRead
+from app.schemas.church import ChurchRead
+
+
+class CatalogProduct(BaseModel):
+    id: int
+    name: str
+    category_id: Optional[int] = None
+    unit: str
+    price: Decimal
+    stock_qty: int
+    low_stock_threshold: int
+    max_qty_per_order: Optional[int] = None
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+
+class CatalogDeleted(BaseModel):
+    products: List[int] = []
+    categories: List[int] = []
+    churches: List[int] = []
+
+
+class CatalogSnapshot(BaseModel):
+    version: int
+    since: Optional[int] = None
+    full: bool
+    products: List[CatalogProduct] = []
+    categories: List[CategoryRead] = []
+    churches: List[ChurchRead] = []
+    deleted: CatalogDeleted = CatalogDeleted()
@@ -16,6 +16,27 @@ class InventoryItemUpdate(BaseModel):
     counted_qty: int
 
 
+class InventoryItemCount(BaseModel):
+    item_id: int
+    counted_qty: int
+
+
+class InventoryBulkCountUpdate(BaseModel):
+    items: List[InventoryItemCount]
+
+
+class InventoryBulkCountError(BaseModel):
+    row: int
+    item_id: Optional[int] = None
+    product_id: Optional[int] = None
+    detail: str
+
+
+class InventoryBulkCountResult(BaseModel):
+    updated: int
+    errors: List[InventoryBulkCountError] = []
+
+
 class InventoryItemRead(BaseModel):
     id: int
     inventory_id: int
@@ -46,12 +67,37 @@ class InventoryRead(BaseModel):
     status: InventoryStatus
     notes: Optional[str] = None
     finalized_at: Optional[datetime] = None
+    version: int
     items: List[InventoryItemRead] = []
 
     class Config:
         from_attributes = True
 
 
+class InventorySummary(BaseModel):
+    id: int
+    created_at: datetime
+    created_by_id: int
+    created_by_name: Optional[str] = None
+    status: InventoryStatus
+    notes: Optional[str] = None
+    finalized_at: Optional[datetime] = None
+    total_items: int = 0
+    counted_items: int = 0
+    pending_items: int = 0
+    total_difference: int = 0
+
+    class Config:
+        from_attributes = True
+
+
 class InventoryListResponse(BaseModel):
-    data: List[InventoryRead]
+    data: List[InventorySummary]
     total: int
+    page: int = 1
+    limit: int = 50
+
+
+class InventoryItemPage(BaseModel):
+    data: List[InventoryItemRead]
+    next_cursor: Optional[int] = None
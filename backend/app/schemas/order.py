@@ -53,6 +53,8 @@ class OrderRead(BaseModel):
     signed_by_id: Optional[int] = None
     signed_at: Optional[datetime] = None
     signed_receipt_path: Optional[str] = None
+    # send back as If-Match: "<version>" (the ETag of GET /orders/{id})
+    version: int
 
     class Config:
         from_attributes = True
@@ -33,11 +33,20 @@ class ProductUpdate(BaseModel):
 class ProductRead(ProductBase):
     id: int
     category_name: Optional[str] = None
+    # send back as If-Match: "<version>" (the ETag of PUT responses)
+    version: int
 
     class Config:
         from_attributes = True
 
 
+class ProductSuggestion(BaseModel):
+    id: int
+    name: str
+    unit: str
+    category_id: Optional[int] = None
+
+
 class ProductListResponse(BaseModel):
     data: List[ProductRead]
     total: int
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
 from typing import Optional, List
 from pydantic import BaseModel
@@ -29,6 +29,20 @@ class StockMovementRead(StockMovementBase):
         from_attributes = True
 
 
+class StockLevelRead(BaseModel):
+    product_id: int
+    name: str
+    unit: str
+    category_id: Optional[int] = None
+    qty: int
+
+
+class StockAsOfResponse(BaseModel):
+    date: date
+    as_of: datetime  # instante (UTC) em que o estoque foi lido: fim do dia
+    data: List[StockLevelRead]
+
+
 class StockMovementListResponse(BaseModel):
     data: List[StockMovementRead]
     total: int
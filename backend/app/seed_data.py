@@ -7,6 +7,7 @@ from app.db.session import SessionLocal
 from app.models.category import Category
 from app.models.church import Church
 from app.models.product import Product
+from app.models.stock_movement import MovementType, StockMovement
 from decimal import Decimal
 
 
@@ -111,6 +112,8 @@ def seed_products(db: Session):
                 low_stock_threshold=threshold,
                 is_active=True
             )
+            # O estoque inicial entra no ledger como qualquer outra entrada
+            product.movements.append(StockMovement(type=MovementType.ENTRADA, qty=stock, note="Estoque inicial"))
             db.add(product)
     
     db.commit()
@@ -0,0 +1,362 @@
+"""Cold storage for closed months of audit_log and stock_movements.
+
+``archive`` exports each month that ended more than ``archive_after_months``
+months ago to a compressed JSONL file (one ``to_jsonb`` document per row;
+gzip, or zstd when the ``zstandard`` package is installed), stored under
+``archive_dir`` or in the S3 bucket under ``archive_prefix`` (through
+app.services.storage). The stored file is read back and its SHA-256 and row
+count checked against the database before any row is deleted; rows then go
+``archive_batch_size`` per transaction, or, for an audit_log month that is a
+partition (attached, or detached by retention), by dropping the partition.
+
+``manifest.json``, next to the files, lists every archived segment (table,
+month, file, rows, id range, checksum). GET /audit reads the archived
+audit_log months that its date range reaches through ``audit_rows``.
+
+Stock levels live in products.stock_qty, so archiving movements does not
+change them; movement reports over archived months only see the rows still
+in the database. The stock at a past date is computed from stock_snapshots
+plus the movements since (app.services.stock_ledger): a stock_movements month
+is only purged once a snapshot was taken after it ended.
+"""
+from __future__ import annotations
+import gzip
+import hashlib
+import heapq
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.services.audit_partitions import PARENT as AUDIT_TABLE, add_months, month_start, partition_name
+from app.services import storage
+from app.services.stock_ledger import snapshot_horizon
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for ARCHIVE_COMPRESSION=zstd
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# archived table -> timestamp column the months are cut on
+ARCHIVED_TABLES = {AUDIT_TABLE: "timestamp", "stock_movements": "created_at"}
+MANIFEST_KEY = "manifest.json"
+MANIFEST_TTL = 60.0
+
+_PARTITION_NAME = re.compile(r"^audit_log_p(\d{4})_(\d{2})$")
+_manifest_cache: Optional[tuple] = None
+
+
+class LocalStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def tempdir(self) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return str(self.root)
+
+    def put(self, path: str, key: str) -> None:
+        dest = self.root / key
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, dest)
+
+    def get(self, key: str) -> bytes:
+        return (self.root / key).read_bytes()
+
+
+class S3Store:
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def tempdir(self) -> Optional[str]:
+        return None
+
+    def put(self, path: str, key: str) -> None:
+        try:
+            with open(path, "rb") as f:
+                storage.upload_fileobj_to_s3(f, self.prefix + key)
+        finally:
+            os.remove(path)
+
+    def get(self, key: str) -> bytes:
+        return storage.download_file_from_s3(self.prefix + key)
+
+
+def get_store():
+    if settings.archive_backend == "s3":
+        return S3Store(settings.archive_prefix)
+    return LocalStore(settings.archive_dir)
+
+
+def _codec() -> str:
+    if settings.archive_compression == "zstd":
+        if zstandard is not None:
+            return "zstd"
+        logger.warning("zstandard is not installed; archiving with gzip")
+    return "gzip"
+
+
+def _compressor(fileobj, codec: str):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).stream_writer(fileobj, closefd=False)
+    return gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read .zst archives")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+def read_manifest(store=None, use_cache: bool = True) -> Dict[str, Any]:
+    global _manifest_cache
+    if use_cache and _manifest_cache is not None and _manifest_cache[0] > time.monotonic():
+        return _manifest_cache[1]
+    try:
+        manifest = json.loads((store or get_store()).get(MANIFEST_KEY))
+    except FileNotFoundError:
+        manifest = {"version": 1, "segments": []}
+    _manifest_cache = (time.monotonic() + MANIFEST_TTL, manifest)
+    return manifest
+
+
+def _write_manifest(store, manifest: Dict[str, Any]) -> None:
+    global _manifest_cache
+    with tempfile.NamedTemporaryFile("w", dir=store.tempdir(), suffix=".json", delete=False) as tmp:
+        json.dump(manifest, tmp, indent=2)
+    store.put(tmp.name, MANIFEST_KEY)
+    _manifest_cache = None
+
+
+def _attached(conn: Connection, name: str) -> bool:
+    return bool(conn.scalar(text("SELECT relispartition FROM pg_class WHERE oid = to_regclass(:t)"), {"t": name}))
+
+
+def _detached_partitions(conn: Connection) -> Dict[datetime, str]:
+    """audit_log_pYYYY_MM tables left by retention (no longer attached)."""
+    names = conn.execute(text(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition AND relname LIKE 'audit\\_log\\_p%'"
+    )).scalars()
+    detached = {}
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            detached[datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)] = name
+    return detached
+
+
+def closed_months(conn: Connection, table: str, cutoff: datetime) -> List[datetime]:
+    """Months with rows in ``table`` that ended at or before ``cutoff``."""
+    ts = ARCHIVED_TABLES[table]
+    conn.execute(text("SET LOCAL TimeZone = 'UTC'"))
+    months = set(conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', {ts}) FROM {table} WHERE {ts} < :cutoff"
+    ), {"cutoff": cutoff}).scalars())
+    if table == AUDIT_TABLE:
+        months.update(m for m in _detached_partitions(conn) if m < cutoff)
+    return sorted(month_start(m) for m in months)
+
+
+def _source(conn: Connection, table: str, month: datetime) -> str:
+    """Relation holding the month's rows: its audit_log partition when there is one."""
+    if table == AUDIT_TABLE:
+        name = partition_name(month)
+        if conn.scalar(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": name}):
+            return name
+    return table
+
+
+def export_month(engine: Engine, store, table: str, month: datetime) -> Optional[Dict[str, Any]]:
+    """Write the month's rows to the store; the manifest segment, None when there are none."""
+    start = month_start(month)
+    end = add_months(start, 1)
+    ts = ARCHIVED_TABLES[table]
+    codec = _codec()
+    rows, min_id, max_id = 0, None, None
+    tmp = tempfile.NamedTemporaryFile(dir=store.tempdir(), suffix=".part", delete=False)
+    try:
+        with engine.connect() as conn, tmp:
+            source = _source(conn, table, start)
+            result = conn.execution_options(stream_results=True, yield_per=2000).execute(text(f"""
+                SELECT id, (to_jsonb(t) - 'search_text')::text FROM {source} t
+                WHERE {ts} >= :start AND {ts} < :end ORDER BY id
+            """), {"start": start, "end": end})
+            with _compressor(tmp, codec) as out:
+                for row_id, document in result:
+                    out.write(document.encode() + b"\n")
+                    rows += 1
+                    min_id = row_id if min_id is None else min_id
+                    max_id = row_id
+    except BaseException:
+        os.remove(tmp.name)
+        raise
+    if not rows:
+        os.remove(tmp.name)
+        return None
+    with open(tmp.name, "rb") as f:
+        data = f.read()
+    extension = "zst" if codec == "zstd" else "gz"
+    key = f"{table}/{start:%Y}/{table}_{start:%Y_%m}_{min_id}.jsonl.{extension}"
+    store.put(tmp.name, key)
+    return {
+        "table": table,
+        "month": f"{start:%Y-%m}",
+        "key": key,
+        "compression": codec,
+        "rows": rows,
+        "bytes": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "min_id": min_id,
+        "max_id": max_id,
+        "archived_at": datetime.now(timezone.utc).isoformat(),
+        "purged": False,
+    }
+
+
+def verify_segment(store, segment: Dict[str, Any]) -> None:
+    """Raise ValueError unless the stored file matches the segment's checksum and row count."""
+    data = store.get(segment["key"])
+    if hashlib.sha256(data).hexdigest() != segment["sha256"]:
+        raise ValueError(f"{segment['key']}: checksum mismatch")
+    lines = _decompress(data, segment["compression"]).count(b"\n")
+    if lines != segment["rows"]:
+        raise ValueError(f"{segment['key']}: {lines} rows, manifest says {segment['rows']}")
+
+
+def purge_month(engine: Engine, segment: Dict[str, Any], batch_size: int) -> int:
+    """Delete the archived rows: drop the audit_log partition, or delete id windows in batches."""
+    table = segment["table"]
+    start = month_start(datetime.strptime(segment["month"], "%Y-%m"))
+    end = add_months(start, 1)
+    ts = ARCHIVED_TABLES[table]
+    params = {"start": start, "end": end, "lo": segment["min_id"], "hi": segment["max_id"]}
+    with engine.begin() as conn:
+        source = _source(conn, table, start)
+        in_db = conn.scalar(text(f"""
+            SELECT count(*) FROM {source} WHERE {ts} >= :start AND {ts} < :end AND id BETWEEN :lo AND :hi
+        """), params)
+        if in_db != segment["rows"]:
+            raise ValueError(f"{segment['key']}: {in_db} rows in {source}, {segment['rows']} archived")
+        if source != table:
+            # the whole partition was exported (rows outside the id range would have been counted above)
+            if conn.scalar(text(f"SELECT count(*) FROM {source}")) == in_db:
+                if _attached(conn, source):
+                    conn.execute(text(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {source}"))
+                conn.execute(text(f"DROP TABLE {source}"))
+                return in_db
+    deleted = 0
+    lower = segment["min_id"]
+    while lower <= segment["max_id"]:
+        with engine.begin() as conn:
+            result = conn.execute(text(f"""
+                DELETE FROM {source} WHERE id >= :lower AND id < :upper AND id <= :hi
+                AND {ts} >= :start AND {ts} < :end
+            """), dict(params, lower=lower, upper=lower + batch_size))
+        deleted += result.rowcount
+        lower += batch_size
+    return deleted
+
+
+def archive(
+    engine: Engine,
+    after_months: Optional[int] = None,
+    tables: Optional[List[str]] = None,
+    now: Optional[datetime] = None,
+    log: Callable[[str], None] = logger.info,
+) -> List[Dict[str, Any]]:
+    """Export and purge every closed month older than ``after_months`` months."""
+    after_months = settings.archive_after_months if after_months is None else after_months
+    if after_months <= 0:
+        log("archiving is disabled (ARCHIVE_AFTER_MONTHS=0)")
+        return []
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -after_months)
+    store = get_store()
+    archived = []
+    with engine.connect() as lock_conn:
+        if not lock_conn.scalar(text("SELECT pg_try_advisory_lock(hashtext('archive'))")):
+            log("another archive run is in progress")
+            return []
+        try:
+            manifest = read_manifest(store, use_cache=False)
+            for table in tables or list(ARCHIVED_TABLES):
+                with engine.begin() as conn:
+                    table_cutoff = cutoff
+                    if table == "stock_movements":
+                        # the movements of a month are only needed for the stock at a date until a snapshot covers them
+                        horizon = snapshot_horizon(conn)
+                        table_cutoff = min(cutoff, month_start(horizon)) if horizon is not None else None
+                    months = closed_months(conn, table, table_cutoff) if table_cutoff is not None else []
+                for month in months:
+                    segment = export_month(engine, store, table, month)
+                    if segment is None:
+                        continue
+                    verify_segment(store, segment)
+                    manifest["segments"].append(segment)
+                    _write_manifest(store, manifest)
+                    purge_month(engine, segment, settings.archive_batch_size)
+                    segment["purged"] = True
+                    _write_manifest(store, manifest)
+                    log(f"  {table} {segment['month']}: {segment['rows']} rows -> {segment['key']}")
+                    archived.append(segment)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(hashtext('archive'))"))
+    return archived
+
+
+def _utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def segments_for(table: str, start: Optional[datetime], end: Optional[datetime]) -> List[Dict[str, Any]]:
+    """Archived segments of ``table`` whose month overlaps [start, end]."""
+    segments = []
+    for segment in read_manifest()["segments"]:
+        if segment["table"] != table:
+            continue
+        month = month_start(datetime.strptime(segment["month"], "%Y-%m"))
+        if (start is None or add_months(month, 1) > _utc(start)) and (end is None or month <= _utc(end)):
+            segments.append(segment)
+    return segments
+
+
+def _documents(store, segment: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for line in _decompress(store.get(segment["key"]), segment["compression"]).splitlines():
+        yield json.loads(line)
+
+
+def audit_rows(
+    segments: List[Dict[str, Any]],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    match: Callable[[Dict[str, Any]], bool],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """The ``limit`` most recent archived audit_log rows in [start, end] accepted by ``match``."""
+    store = get_store()
+    start = _utc(start) if start is not None else None
+    end = _utc(end) if end is not None else None
+
+    def matching() -> Iterator[Dict[str, Any]]:
+        for segment in segments:
+            for row in _documents(store, segment):
+                row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+                if start is not None and row["timestamp"] < start:
+                    continue
+                if end is not None and row["timestamp"] > end:
+                    continue
+                if match(row):
+                    yield row
+
+    return heapq.nlargest(limit, matching(), key=lambda row: row["timestamp"])
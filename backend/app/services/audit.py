@@ -1,9 +1,12 @@
 from __future__ import annotations
+from datetime import datetime, timezone
 from typing import Any, Dict, Optional, Union
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
+from app.db.writes import save
 from app.models.audit_log import AuditLog, AuditAction, AuditResource
+from app.services.audit_counters import count_entries
 
 
 class AuditService:
@@ -34,7 +37,10 @@ class AuditService:
         action_str = action.value if isinstance(action, AuditAction) else action
         resource_str = resource.value if isinstance(resource, AuditResource) else resource
 
+        # the row and its day's counter share one timestamp (not the server's now())
+        timestamp = datetime.now(timezone.utc)
         audit_log = AuditLog(
+            timestamp=timestamp,
             user_id=user_id,
             action=action_str,
             resource=resource_str,
@@ -49,11 +55,8 @@ class AuditService:
             extra_metadata=extra_metadata,
         )
 
-        db.add(audit_log)
-        db.commit()
-        db.refresh(audit_log)
-
-        return audit_log
+        count_entries(db, [{"timestamp": timestamp, "action": action_str, "resource": resource_str, "success": success}])
+        return save(db, audit_log)
 
     def log_auth_event(
         self,
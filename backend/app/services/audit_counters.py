@@ -0,0 +1,160 @@
+"""Daily audit counters behind GET /audit/stats.
+
+``audit_counters`` holds one row per UTC day and (action, resource, success).
+Every path that inserts audit_log rows (the batched writer, the middleware's
+synchronous fallback and ``AuditService``) calls ``count_entries`` in the same
+transaction, so the counters match the committed rows. ``grouped_counts``
+sums the counters for the whole days of a range and aggregates audit_log only
+for the partial days at its edges (an index range scan of at most two days).
+
+Counters outlive audit_log retention: months detached or dropped by
+app.services.audit_partitions still count. ``rebuild`` recomputes them from
+audit_log (backfill of historic days, or after rows were edited by hand).
+"""
+from __future__ import annotations
+import logging
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Tuple, Union
+
+from sqlalchemy import BigInteger, Date, cast, delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models.audit_log import AuditCounter, AuditLog
+from app.services.audit_partitions import add_months, month_start
+
+logger = logging.getLogger(__name__)
+
+GroupedCount = Tuple[str, str, bool, int]
+
+
+def _utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, time(), timezone.utc)
+
+
+def count_entries(db: Union[Session, Connection], entries: Iterable[Mapping[str, Any]]) -> None:
+    """Add audit_log rows (column -> value) to their day's counters.
+
+    Call it in the transaction that inserts the rows. Each entry carries the
+    ``timestamp`` written to its row, so the counter's day is the row's day.
+    Counter rows are upserted in key order so concurrent writers lock them in
+    the same order.
+    """
+    counts: Counter = Counter()
+    for entry in entries:
+        key = (
+            _utc(entry["timestamp"]).date(),
+            getattr(entry["action"], "value", entry["action"]),
+            getattr(entry["resource"], "value", entry["resource"]),
+            bool(entry.get("success", True)),
+        )
+        counts[key] += 1
+    if not counts:
+        return
+    table = AuditCounter.__table__
+    stmt = pg_insert(table).values([
+        {"day": day, "action": action, "resource": resource, "success": success, "count": n}
+        for (day, action, resource, success), n in sorted(counts.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.action, table.c.resource, table.c.success],
+        set_={"count": table.c.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+
+
+def _sum_counters(db: Session, first_day: Optional[date], last_day: Optional[date]) -> List[GroupedCount]:
+    c = AuditCounter
+    query = select(c.action, c.resource, c.success, cast(func.sum(c.count), BigInteger)).group_by(
+        c.action, c.resource, c.success
+    )
+    if first_day is not None:
+        query = query.where(c.day >= first_day)
+    if last_day is not None:
+        query = query.where(c.day < last_day)
+    return [tuple(row) for row in db.execute(query)]
+
+
+def _count_rows(db: Session, start: Optional[datetime], end: Optional[datetime]) -> List[GroupedCount]:
+    query = select(AuditLog.action, AuditLog.resource, AuditLog.success, func.count()).group_by(
+        AuditLog.action, AuditLog.resource, AuditLog.success
+    )
+    if start is not None:
+        query = query.where(AuditLog.timestamp >= start)
+    if end is not None:
+        query = query.where(AuditLog.timestamp < end)
+    return [tuple(row) for row in db.execute(query)]
+
+
+def grouped_counts(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[GroupedCount]:
+    """(action, resource, success, count) of the audit rows with start <= timestamp < end."""
+    start = _utc(start) if start is not None else None
+    end = _utc(end) if end is not None else None
+    # whole days covered by the range: [first_day, last_day)
+    first_day = None
+    if start is not None:
+        first_day = start.date() if start == _midnight(start.date()) else start.date() + timedelta(days=1)
+    last_day = end.date() if end is not None else None
+
+    if first_day is not None and last_day is not None and first_day >= last_day:
+        rows = _count_rows(db, start, end)
+    else:
+        rows = _sum_counters(db, first_day, last_day)
+        if start is not None and start < _midnight(first_day):
+            rows += _count_rows(db, start, _midnight(first_day))
+        if end is not None and _midnight(last_day) < end:
+            rows += _count_rows(db, _midnight(last_day), end)
+
+    merged: Counter = Counter()
+    for action, resource, success, n in rows:
+        merged[(action, resource, success)] += n
+    return [(action, resource, success, n) for (action, resource, success), n in merged.items() if n]
+
+
+def is_empty(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        return conn.scalar(select(AuditCounter.day).limit(1)) is None
+
+
+def rebuild(engine: Engine, since: Optional[date] = None, log: Callable[[str], None] = logger.info) -> int:
+    """Recompute the counters from audit_log, one month per transaction.
+
+    Only days from ``since`` (default: the oldest audit row) are replaced, so
+    counters of months already removed from audit_log are kept. Each month
+    locks audit_counters against concurrent increments while it is recomputed;
+    audit writers wait for that transaction instead of being lost.
+    """
+    with engine.connect() as conn:
+        first = conn.scalar(select(func.min(AuditLog.timestamp)))
+    if first is None and since is None:
+        log("audit_log is empty")
+        return 0
+    lo = _midnight(since) if since is not None else month_start(first)
+    now = datetime.now(timezone.utc)
+    table = AuditCounter.__table__
+    day = cast(func.timezone("UTC", AuditLog.timestamp), Date)
+    total = 0
+    while lo <= now:
+        hi = add_months(month_start(lo), 1)
+        with engine.begin() as conn:
+            conn.execute(text("LOCK TABLE audit_counters IN SHARE ROW EXCLUSIVE MODE"))
+            conn.execute(delete(table).where(table.c.day >= lo.date(), table.c.day < hi.date()))
+            conn.execute(insert(table).from_select(
+                ["day", "action", "resource", "success", "count"],
+                select(day, AuditLog.action, AuditLog.resource, AuditLog.success, func.count())
+                .where(AuditLog.timestamp >= lo, AuditLog.timestamp < hi)
+                .group_by(day, AuditLog.action, AuditLog.resource, AuditLog.success),
+            ))
+            rows = conn.scalar(select(func.coalesce(func.sum(table.c.count), 0)).where(
+                table.c.day >= lo.date(), table.c.day < hi.date()
+            ))
+        total += rows
+        log(f"  {lo:%Y-%m}: {rows} audit rows counted")
+        lo = hi
+    return total
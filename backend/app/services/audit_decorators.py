@@ -1,11 +1,109 @@
 from __future__ import annotations
-from datetime import datetime
-from functools import wraps
-from typing import Any, Callable, Dict, Optional, Union
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from functools import partial, wraps
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 
-from app.services.audit import AuditService
+from app.db.unit_of_work import after_commit
+from app.db.versioning import is_touch
 from app.models.audit_log import AuditAction, AuditResource
+from app.services.audit_writer import audit_entry, audit_writer
+
+# session.info key of the ChangeSet of the audited operation running on the session
+_CHANGES = "audit_changes"
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class ChangeSet:
+    """Column changes of the rows flushed while an audited operation runs.
+
+    Filled by the session events below from the unit of work itself: attribute
+    history of dirty objects before the flush, loaded column values of
+    inserted and deleted rows. Only changed columns are kept and nothing is
+    loaded from the database.
+    """
+
+    def __init__(self):
+        self.rows: Dict[Tuple[str, Any], Dict[str, Dict[str, Any]]] = {}
+
+    @staticmethod
+    def key(obj: Any) -> Tuple[str, Any]:
+        state = inspect(obj)
+        identity = state.identity
+        return state.mapper.local_table.name, identity[0] if identity and len(identity) == 1 else identity
+
+    def _row(self, obj: Any) -> Dict[str, Dict[str, Any]]:
+        return self.rows.setdefault(self.key(obj), {"old": {}, "new": {}})
+
+    def record_dirty(self, obj: Any) -> None:
+        state = inspect(obj)
+        columns = state.mapper.column_attrs
+        # committed_state holds exactly the attributes set since the last flush
+        for key in list(state.committed_state):
+            if key not in columns:
+                continue
+            history = state.attrs[key].history
+            if not history.added:
+                continue
+            new = history.added[0]
+            if history.deleted and history.deleted[0] == new:
+                continue
+            if not history.deleted and is_touch(obj, key):
+                continue
+            row = self._row(obj)
+            # old value unknown when the attribute was not loaded before being set
+            if history.deleted and key not in row["old"]:
+                row["old"][key] = _json_value(history.deleted[0])
+            row["new"][key] = _json_value(new)
+
+    def record_loaded(self, obj: Any, side: str) -> None:
+        state = inspect(obj)
+        values = {
+            attr.key: _json_value(state.dict[attr.key])
+            for attr in state.mapper.column_attrs
+            if attr.key in state.dict
+        }
+        self._row(obj)[side].update(values)
+
+    def pop(self, obj: Any) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self.rows.pop(self.key(obj), None)
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_dirty(session: Session, flush_context, instances) -> None:
+    changes = session.info.get(_CHANGES)
+    if changes is not None:
+        for obj in session.dirty:
+            if session.is_modified(obj, include_collections=False):
+                changes.record_dirty(obj)
+
+
+@event.listens_for(Session, "pending_to_persistent")
+def _capture_insert(session: Session, obj) -> None:
+    # after the INSERT: the primary key is known
+    changes = session.info.get(_CHANGES)
+    if changes is not None:
+        changes.record_loaded(obj, "new")
+
+
+@event.listens_for(Session, "persistent_to_deleted")
+def _capture_delete(session: Session, obj) -> None:
+    # explicit deletes and delete-orphan cascades alike
+    changes = session.info.get(_CHANGES)
+    if changes is not None:
+        changes.record_loaded(obj, "old")
 
 
 def audit_operation(
@@ -19,20 +117,26 @@ def audit_operation(
     """
     Decorator to audit service operations
 
+    Changes are captured from the flushes the operation makes. The row the
+    operation returns (or, without one, the first row it changed) goes to
+    old_values/new_values; other rows changed in the same unit of work go to
+    extra_metadata["related"]. The entry goes to the batched audit writer when
+    the transaction commits; a rolled back operation leaves no success entry.
+
     Args:
         action: The audit action (CREATE, UPDATE, DELETE, etc.)
         resource: The resource type being operated on
         get_user_id: Function to extract user_id from function arguments
         get_resource_id: Function to extract resource_id from function arguments
-        capture_old_values: Whether to capture old values before operation
-        capture_new_values: Whether to capture new values after operation
+        capture_old_values: Whether to record the previous values of changed columns
+        capture_new_values: Whether to record the new values of changed columns
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Get database session (assume it's the first argument after self)
             db = None
-            for arg in args:
+            for arg in list(args) + list(kwargs.values()):
                 if isinstance(arg, Session):
                     db = arg
                     break
@@ -41,14 +145,12 @@ def audit_operation(
                 # If no session found, just execute the function
                 return func(*args, **kwargs)
 
-            audit_service = AuditService(db)
-
             # Extract user_id
             user_id = None
             if get_user_id:
                 try:
                     user_id = get_user_id(*args, **kwargs)
-                except:
+                except Exception:
                     pass
 
             # Extract resource_id
@@ -56,64 +158,55 @@ def audit_operation(
             if get_resource_id:
                 try:
                     resource_id = get_resource_id(*args, **kwargs)
-                except:
+                except Exception:
                     pass
 
-            # Capture old values if needed
-            old_values = None
-            if capture_old_values and resource_id:
-                # This would need to be implemented per service
-                # For now, we'll skip this complexity
-                pass
+            def entry(**values: Any) -> Dict[str, Any]:
+                return audit_entry(
+                    user_id=user_id,
+                    action=getattr(action, "value", action),
+                    resource=getattr(resource, "value", resource),
+                    **values,
+                )
 
+            changes = ChangeSet()
+            outer = db.info.get(_CHANGES)
+            db.info[_CHANGES] = changes
             try:
                 # Execute the original function
                 result = func(*args, **kwargs)
-
-                # Capture new values if needed
-                new_values = None
-                if capture_new_values and result:
-                    # Convert result to dict for logging
-                    if hasattr(result, '__dict__'):
-                        new_values = {}
-                        for k, v in result.__dict__.items():
-                            if not k.startswith('_'):
-                                # Convert datetime objects to ISO strings
-                                if isinstance(v, datetime):
-                                    new_values[k] = v.isoformat()
-                                # Convert enum objects to their values
-                                elif hasattr(v, 'value'):
-                                    new_values[k] = v.value
-                                # Skip complex objects that can't be serialized
-                                elif hasattr(v, '__dict__') or isinstance(v, (list, dict)):
-                                    continue  # Skip relationships and complex objects
-                                else:
-                                    new_values[k] = v
-
-                # Log successful operation
-                audit_service.log_crud_operation(
-                    user_id=user_id,
-                    action=action,
-                    resource=resource,
-                    resource_id=resource_id,
-                    old_values=old_values,
-                    new_values=new_values,
-                    success=True,
-                )
-
-                return result
-
+                # changes the operation left pending are captured too
+                db.flush()
             except Exception as e:
                 # Log failed operation
-                audit_service.log_crud_operation(
-                    user_id=user_id,
-                    action=action,
-                    resource=resource,
-                    resource_id=resource_id,
-                    success=False,
-                    error_message=str(e),
-                )
+                audit_writer.record(entry(resource_id=resource_id, success=False, error_message=str(e)))
                 raise
+            finally:
+                if outer is None:
+                    db.info.pop(_CHANGES, None)
+                else:
+                    db.info[_CHANGES] = outer
+
+            mapped = result is not None and hasattr(result, "_sa_instance_state")
+            primary = changes.pop(result) if mapped else None
+            if not mapped and changes.rows:
+                primary = changes.rows.pop(next(iter(changes.rows)))
+            if resource_id is None and mapped:
+                resource_id = ChangeSet.key(result)[1]
+            related = [
+                {"table": table, "id": row_id, "old": row["old"] or None, "new": row["new"] or None}
+                for (table, row_id), row in changes.rows.items()
+            ]
+
+            # Log successful operation, once the transaction commits
+            after_commit(db, partial(audit_writer.record, entry(
+                resource_id=resource_id if isinstance(resource_id, int) else None,
+                old_values=(primary["old"] or None) if primary and capture_old_values else None,
+                new_values=(primary["new"] or None) if primary and capture_new_values else None,
+                success=True,
+                extra_metadata={"operation": func.__qualname__, **({"related": related} if related else {})},
+            )))
+            return result
 
         return wrapper
     return decorator
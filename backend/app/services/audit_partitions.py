@@ -0,0 +1,252 @@
+"""Monthly range partitions of ``audit_log`` (by ``timestamp``) and their retention.
+
+``audit_log`` is partitioned by month (``audit_log_p2026_10`` holds October
+2026, UTC) plus ``audit_log_default`` for rows outside every partition, so an
+insert never fails because maintenance did not run. ``maintain`` runs at
+startup and from ``python -m app.audit_maintenance``:
+
+- creates the partitions from the current month to ``audit_partition_months_ahead``
+  months ahead; rows already in the default partition for that month are moved
+  into the new partition before it is attached;
+- with ``audit_retention_months`` > 0, detaches partitions that ended before the
+  retention window (``audit_retention_action="drop"`` also drops them; detached
+  tables stay available for archival).
+
+Queries filtering on ``timestamp`` (GET /audit always does) only touch the
+matching partitions.
+"""
+from __future__ import annotations
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.services.audit_search import create_search_indexes
+
+logger = logging.getLogger(__name__)
+
+PARENT = "audit_log"
+DEFAULT_PARTITION = "audit_log_default"
+LEGACY_TABLE = "audit_log_legacy"
+
+_BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT}_p{month:%Y_%m}"
+
+
+def _ts(value: datetime) -> str:
+    return f"'{value.isoformat()}'"
+
+
+def _lock(conn: Connection) -> None:
+    """Serializes partition DDL between workers starting at the same time."""
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('audit_log_partitions'))"))
+    # partition bounds are rendered in the session time zone
+    conn.execute(text("SET LOCAL TimeZone = 'UTC'"))
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return conn.scalar(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": PARENT}) == "p"
+
+
+def _exists(conn: Connection, name: str) -> bool:
+    return conn.scalar(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": name})
+
+
+def insert_columns(conn: Connection, table: str = PARENT) -> str:
+    """Column list for copying rows between audit tables (generated columns are recomputed)."""
+    names = conn.execute(text("""
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = to_regclass(:t) AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+        ORDER BY attnum
+    """), {"t": table}).scalars()
+    return ", ".join(f'"{name}"' for name in names)
+
+
+def list_partitions(conn: Connection) -> List[Dict[str, Any]]:
+    """Partitions of audit_log with their bounds (None for the default partition)."""
+    rows = conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:t)
+        ORDER BY c.relname
+    """), {"t": PARENT}).all()
+    partitions = []
+    for name, bound, rows_estimate in rows:
+        match = _BOUNDS.search(bound or "")
+        partitions.append({
+            "name": name,
+            "start": datetime.fromisoformat(match.group(1)) if match else None,
+            "end": datetime.fromisoformat(match.group(2)) if match else None,
+            "rows_estimate": max(rows_estimate, 0),
+        })
+    return partitions
+
+
+def create_partition(conn: Connection, month: datetime) -> str:
+    """Create and attach the partition of ``month``, moving its rows out of the default partition."""
+    start = month_start(month)
+    end = add_months(start, 1)
+    name = partition_name(start)
+    conn.execute(text(
+        f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)"
+    ))
+    if _exists(conn, DEFAULT_PARTITION):
+        columns = insert_columns(conn)
+        conn.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= {_ts(start)} AND timestamp < {_ts(end)}
+                RETURNING {columns}
+            )
+            INSERT INTO {name} ({columns}) SELECT {columns} FROM moved
+        """))
+    conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ({_ts(start)}) TO ({_ts(end)})"))
+    return name
+
+
+def ensure_partitions(conn: Connection, months_ahead: int, now: Optional[datetime] = None) -> List[str]:
+    """Create the missing partitions from the current month to ``months_ahead`` months ahead."""
+    if not _exists(conn, DEFAULT_PARTITION):
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+    current = month_start(now or datetime.now(timezone.utc))
+    created = []
+    for n in range(months_ahead + 1):
+        month = add_months(current, n)
+        if not _exists(conn, partition_name(month)):
+            created.append(create_partition(conn, month))
+    return created
+
+
+def apply_retention(conn: Connection, retention_months: int, action: str, now: Optional[datetime] = None) -> List[str]:
+    """Detach (and with ``action="drop"`` drop) partitions older than ``retention_months``."""
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -retention_months)
+    expired = []
+    for partition in list_partitions(conn):
+        if partition["end"] is not None and partition["end"] <= cutoff:
+            conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {partition['name']}"))
+            if action == "drop":
+                conn.execute(text(f"DROP TABLE {partition['name']}"))
+            expired.append(partition["name"])
+    if action == "drop" and _exists(conn, DEFAULT_PARTITION):
+        conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < {_ts(cutoff)}"))
+    return expired
+
+
+def maintain(engine: Engine, now: Optional[datetime] = None) -> Dict[str, Any]:
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            logger.warning("audit_log is not partitioned; run `python -m app.audit_maintenance convert`")
+            return {"partitioned": False, "created": [], "expired": []}
+        _lock(conn)
+        created = ensure_partitions(conn, settings.audit_partition_months_ahead, now)
+        expired = apply_retention(conn, settings.audit_retention_months, settings.audit_retention_action, now)
+    if created or expired:
+        logger.info("audit_log partitions created: %s; %s: %s", created, settings.audit_retention_action, expired)
+    return {"partitioned": True, "created": created, "expired": expired}
+
+
+def maintain_on_startup() -> None:
+    from app.db.session import engine
+
+    try:
+        maintain(engine)
+    except Exception:
+        logger.exception("audit_log partition maintenance failed")
+
+
+def convert_to_partitioned(engine: Engine, batch_size: int = 50_000, log: Callable[[str], None] = logger.info) -> None:
+    """Turn a plain audit_log into the partitioned table, copying rows online.
+
+    Same steps as the Alembic migration, for databases created with
+    ``create_all``: the table is renamed to audit_log_legacy and the
+    partitioned audit_log takes its place (new audit rows go there at once);
+    legacy rows are then copied newest first, in batches committed one by one,
+    and the legacy table is dropped. An interrupted run can simply be started
+    again: rows already copied are skipped.
+    """
+    with engine.begin() as conn:
+        _lock(conn)
+        if not is_partitioned(conn):
+            log("audit_log -> audit_log_legacy; creating the partitioned audit_log")
+            swap_in_partitioned_table(conn)
+        elif not _exists(conn, LEGACY_TABLE):
+            log("audit_log is already partitioned")
+            return
+        first = conn.scalar(text(f"SELECT min(timestamp) FROM {LEGACY_TABLE}"))
+        if first is not None:
+            month = month_start(first)
+            while month < month_start(datetime.now(timezone.utc)):
+                if not _exists(conn, partition_name(month)):
+                    create_partition(conn, month)
+                month = add_months(month, 1)
+        ensure_partitions(conn, settings.audit_partition_months_ahead)
+
+    with engine.connect() as conn:
+        lo, hi = conn.execute(text(f"SELECT min(id), max(id) FROM {LEGACY_TABLE}")).one()
+        columns = insert_columns(conn, LEGACY_TABLE)
+    copied = 0
+    if lo is not None:
+        upper = hi
+        while upper >= lo:
+            with engine.begin() as conn:
+                result = conn.execute(text(f"""
+                    INSERT INTO {PARENT} ({columns}) SELECT {columns} FROM {LEGACY_TABLE}
+                    WHERE id > :lower AND id <= :upper
+                    ON CONFLICT DO NOTHING
+                """), {"lower": upper - batch_size, "upper": upper})
+            copied += result.rowcount
+            upper -= batch_size
+            log(f"  {copied} rows copied")
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+    log(f"done: {copied} rows copied, {LEGACY_TABLE} dropped")
+
+
+def swap_in_partitioned_table(conn: Connection) -> None:
+    """Rename the plain audit_log away and create the partitioned one in its place.
+
+    ``LIKE`` keeps the columns of the existing table, its id sequence default
+    and generated columns; the primary key must include the partition key.
+    """
+    conn.execute(text(f"ALTER TABLE {PARENT} RENAME TO {LEGACY_TABLE}"))
+    conn.execute(text(f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey"))
+    for (index,) in conn.execute(text("""
+        SELECT indexname FROM pg_indexes WHERE tablename = :t AND indexname <> 'audit_log_legacy_pkey'
+    """), {"t": LEGACY_TABLE}):
+        conn.execute(text(f"DROP INDEX {index}"))
+    conn.execute(text(f"""
+        CREATE TABLE {PARENT} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING GENERATED, PRIMARY KEY (id, timestamp))
+        PARTITION BY RANGE (timestamp)
+    """))
+    conn.execute(text(f"ALTER TABLE {LEGACY_TABLE} ALTER COLUMN id DROP DEFAULT"))
+    conn.execute(text(f"ALTER SEQUENCE audit_log_id_seq OWNED BY {PARENT}.id"))
+    conn.execute(text(f"ALTER TABLE {PARENT} ADD FOREIGN KEY (user_id) REFERENCES users (id)"))
+    conn.execute(text(f"CREATE INDEX ix_audit_log_timestamp ON {PARENT} (timestamp)"))
+    conn.execute(text(f"CREATE INDEX ix_audit_log_user_id ON {PARENT} (user_id)"))
+    conn.execute(text(f"CREATE INDEX ix_audit_log_resource ON {PARENT} (resource, resource_id)"))
+    if _has_search_text(conn):
+        create_search_indexes(conn)
+
+
+def _has_search_text(conn: Connection) -> bool:
+    return conn.scalar(text("""
+        SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = :t AND column_name = 'search_text')
+    """), {"t": PARENT})
@@ -0,0 +1,142 @@
+"""Search and structured filters for GET /audit.
+
+``old_values``, ``new_values`` and ``extra_metadata`` are JSONB. Structured
+filters (``path``, ``status_code``, ``query_params.<key>``) become a single
+containment test, ``extra_metadata @> '{...}'``, served by the
+``jsonb_path_ops`` GIN index. Free-text ``search`` matches the generated
+``search_text`` column (error message + metadata as text) with ILIKE, backed
+by a trigram GIN index when pg_trgm is installed.
+
+``ensure_audit_search`` brings databases created with ``create_all`` to the
+same schema as the migration (JSON -> JSONB, generated column, indexes).
+"""
+from __future__ import annotations
+import logging
+import json
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+JSONB_COLUMNS = ("old_values", "new_values", "extra_metadata")
+SEARCH_EXPRESSION = "coalesce(error_message, '') || ' ' || coalesce(extra_metadata::text, '')"
+METADATA_INDEX_NAME = "ix_audit_log_extra_metadata"
+TRGM_INDEX_NAME = "ix_audit_log_search_text_trgm"
+QUERY_PARAM_PREFIX = "query_params."
+
+
+def create_search_indexes(conn: Connection) -> None:
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS {METADATA_INDEX_NAME} ON audit_log USING gin (extra_metadata jsonb_path_ops)"
+    ))
+    if conn.scalar(text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")):
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX_NAME} ON audit_log USING gin (search_text gin_trgm_ops)"
+        ))
+
+
+def ensure_audit_search(engine: Engine) -> None:
+    """JSONB columns, the search_text column and the search indexes (no-op when present).
+
+    Changing a column type or adding the stored column rewrites audit_log, so
+    it runs at deploy time, before the API starts.
+    """
+    with engine.begin() as conn:
+        types = dict(conn.execute(text("""
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_name = 'audit_log' AND column_name IN ('old_values', 'new_values', 'extra_metadata', 'search_text')
+        """)).all())
+        for column in JSONB_COLUMNS:
+            if types.get(column) == "json":
+                logger.info("audit_log.%s: json -> jsonb", column)
+                conn.execute(text(f"ALTER TABLE audit_log ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb"))
+        if "search_text" not in types:
+            conn.execute(text(
+                f"ALTER TABLE audit_log ADD COLUMN search_text text GENERATED ALWAYS AS ({SEARCH_EXPRESSION}) STORED"
+            ))
+        create_search_indexes(conn)
+
+
+def metadata_document(
+    path: Optional[str] = None,
+    status_code: Optional[int] = None,
+    query_params: Optional[Mapping[str, str]] = None,
+) -> Dict[str, Any]:
+    """The part of extra_metadata the structured filters ask for."""
+    document: Dict[str, Any] = {}
+    if path is not None:
+        document["path"] = path
+    if status_code is not None:
+        document["status_code"] = status_code
+    if query_params:
+        # the middleware stores query parameter values as strings
+        document["query_params"] = {key: str(value) for key, value in query_params.items()}
+    return document
+
+
+def metadata_filter(document: Mapping[str, Any]) -> Optional[ColumnElement]:
+    """``extra_metadata @> document``, None for an empty document."""
+    return AuditLog.extra_metadata.contains(dict(document)) if document else None
+
+
+def contains(value: Any, document: Any) -> bool:
+    """Python version of the jsonb ``@>`` test (for rows read from archives)."""
+    if isinstance(document, dict):
+        return isinstance(value, dict) and all(k in value and contains(value[k], v) for k, v in document.items())
+    if isinstance(document, list):
+        return isinstance(value, list) and all(any(contains(item, d) for item in value) for d in document)
+    return value == document
+
+
+def query_param_filters(params: Mapping[str, str]) -> Dict[str, str]:
+    """``query_params.<key>=<value>`` request parameters -> {key: value}."""
+    return {
+        key[len(QUERY_PARAM_PREFIX):]: value
+        for key, value in params.items()
+        if key.startswith(QUERY_PARAM_PREFIX) and len(key) > len(QUERY_PARAM_PREFIX)
+    }
+
+
+def search_filter(search: str) -> ColumnElement:
+    return AuditLog.search_text.ilike(f"%{search}%")
+
+
+def row_filter(
+    *,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    resource: Optional[str] = None,
+    resource_id: Optional[int] = None,
+    success: Optional[bool] = None,
+    search: Optional[str] = None,
+    metadata: Optional[Mapping[str, Any]] = None,
+) -> Callable[[Dict[str, Any]], bool]:
+    """The GET /audit filters as a predicate on audit_log rows as dicts (archived rows)."""
+    needle = search.lower() if search else None
+
+    def match(row: Dict[str, Any]) -> bool:
+        if user_id is not None and row.get("user_id") != user_id:
+            return False
+        if action and row.get("action") != action:
+            return False
+        if resource and row.get("resource") != resource:
+            return False
+        if resource_id is not None and row.get("resource_id") != resource_id:
+            return False
+        if success is not None and row.get("success") != success:
+            return False
+        if metadata and not contains(row.get("extra_metadata"), metadata):
+            return False
+        if needle:
+            extra = row.get("extra_metadata")
+            haystack = f"{row.get('error_message') or ''} {json.dumps(extra, ensure_ascii=False) if extra is not None else ''}"
+            if needle not in haystack.lower():
+                return False
+        return True
+
+    return match
@@ -0,0 +1,182 @@
+"""Background, batched writer for request audit entries.
+
+``AuditMiddleware`` used to open a session and commit one INSERT per audited
+request (in the threadpool). Entries now go to a bounded queue; a daemon
+thread drains it and writes up to ``audit_batch_size`` rows per transaction
+with a single executemany INSERT, and bumps the daily audit counters in the
+same transaction. When the queue is full, ``submit`` returns
+False and ``record`` writes the entry in the calling thread instead.
+
+A batch that fails on a lost connection or a deadlock is retried with
+backoff. One that the database rejects (a row with invalid data) is written
+row by row, so only the bad rows are lost. Lost entries are logged and
+counted in ``ccb_audit_writes_total{result="error"}``. That includes the
+whole batch when the database stays unreachable through the retries.
+"""
+from __future__ import annotations
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import audit_writes
+from app.db.session import SessionLocal
+from app.models.audit_log import AuditLog
+from app.services.audit_counters import count_entries
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def audit_entry(**values: Any) -> Dict[str, Any]:
+    """audit_log row for the writer; every entry has all the columns so batches share one INSERT.
+
+    The timestamp is set here rather than by the server so the row and its
+    audit_counters day agree.
+    """
+    return {
+        "timestamp": datetime.now(timezone.utc),
+        "user_id": None,
+        "resource_id": None,
+        "old_values": None,
+        "new_values": None,
+        "ip_address": None,
+        "user_agent": None,
+        "session_id": None,
+        "success": True,
+        "error_message": None,
+        "extra_metadata": None,
+        **values,
+    }
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_queue: int = 10000,
+        retries: int = 3,
+        retry_backoff: float = 0.2,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """Queue an audit_log row (column -> value). False when the queue is full."""
+        if self._thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            return False
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Queue the entry, or write it in the calling thread when queueing is off or the queue is full."""
+        if not (settings.audit_async_writes and self.submit(entry)):
+            self._write([entry])
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued entry is written (tests, shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self.queue.get()
+            if first is _STOP:
+                self.queue.task_done()
+                return
+            batch: List[Dict[str, Any]] = [first]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    self.queue.task_done()
+                    break
+                batch.append(entry)
+            self._write(batch)
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                return
+
+    def _insert(self, batch: List[Dict[str, Any]]) -> None:
+        with self.session_factory() as db:
+            db.execute(insert(AuditLog), batch)
+            count_entries(db, batch)
+            db.commit()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                self._insert(batch)
+                audit_writes.labels("ok").inc(len(batch))
+                return
+            except OperationalError as e:
+                # connection lost, deadlock, server restarting: the same rows may go through later
+                error: Exception = e
+                if attempt < self.retries:
+                    time.sleep(self.retry_backoff * 2 ** attempt)
+            except Exception as e:
+                error = e
+                if len(batch) > 1:
+                    # a row the database rejects must not take the rest of the batch with it
+                    for entry in batch:
+                        self._write([entry])
+                    return
+                break
+        logger.error("Failed to write %d audit entries", len(batch), exc_info=error)
+        audit_writes.labels("error").inc(len(batch))
+
+
+audit_writer = AuditWriter(
+    SessionLocal,
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval,
+    max_queue=settings.audit_queue_max,
+)
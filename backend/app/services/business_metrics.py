@@ -0,0 +1,40 @@
+"""Business counters fed by session events: counted only once the transaction commits."""
+from __future__ import annotations
+from itertools import chain
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.metrics import order_status_changes, orders_created, stock_movements
+from app.models.order import Order
+from app.models.stock_movement import StockMovement
+
+
+def _value(v) -> str:
+    return getattr(v, "value", v)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session: Session, flush_context) -> None:
+    pending = session.info.setdefault("business_metrics", [])
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, Order):
+            if obj in session.new:
+                pending.append((orders_created, ()))
+            else:
+                history = inspect(obj).attrs.status.history
+                if history.added:
+                    pending.append((order_status_changes, (_value(obj.status),)))
+        elif isinstance(obj, StockMovement) and obj in session.new:
+            pending.append((stock_movements, (_value(obj.type),)))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session: Session) -> None:
+    for metric, labels in session.info.pop("business_metrics", ()):
+        (metric.labels(*labels) if labels else metric).inc()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop("business_metrics", None)
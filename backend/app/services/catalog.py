@@ -0,0 +1,91 @@
+from __future__ import annotations
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, text
+
+from app.models.catalog import CatalogTombstone
+from app.models.category import Category
+from app.models.church import Church
+from app.models.product import Product
+
+
+def begin_snapshot(db: Session) -> Tuple[int, str]:
+    """Start a REPEATABLE READ transaction; return its catalog version and content tag.
+
+    Rows are stamped with the id of the transaction that wrote them, and ids
+    are not handed out in commit order. The version returned is the
+    snapshot's xmin: every transaction below it has finished, so a later
+    delta (``catalog_version >= version``) cannot miss a row committed after
+    this read. Rows of transactions above it that are already visible come
+    again in the next delta.
+
+    The tag identifies what the snapshot sees (for the ETag). When xmin is
+    above the newest catalog version, every catalog writer up to it has
+    finished and the newest version alone identifies the content; otherwise
+    the snapshot itself is part of the tag.
+    """
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    newest = func.greatest(*(
+        select(func.max(model.catalog_version)).scalar_subquery()
+        for model in (Product, Category, Church, CatalogTombstone)
+    ))
+    # first statement of the transaction: it takes the snapshot the rest reads from
+    row = db.execute(
+        select(
+            text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint"),
+            text("pg_current_snapshot()::text"),
+            func.coalesce(newest, 0),
+        )
+    ).one()
+    version, snapshot, latest = row
+    tag = str(latest) if version > latest else f"{latest}-{hashlib.sha1(snapshot.encode()).hexdigest()[:12]}"
+    return version, tag
+
+
+def catalog_etag(tag: str, since: Optional[int]) -> str:
+    return f'"catalog-{tag}-{"full" if since is None else since}"'
+
+
+def get_catalog(db: Session, *, version: int, since: Optional[int] = None) -> Dict[str, Any]:
+    """Catalog rows changed since version ``since`` (everything when ``since`` is None)."""
+    def changed(*columns, model) -> List[Dict[str, Any]]:
+        stmt = select(*columns).order_by(model.id)
+        if since is not None:
+            stmt = stmt.where(model.catalog_version >= since)
+        return [dict(r) for r in db.execute(stmt).mappings()]
+
+    products = changed(
+        Product.id,
+        Product.name,
+        Product.category_id,
+        Product.unit,
+        Product.price,
+        Product.stock_qty,
+        Product.low_stock_threshold,
+        Product.max_qty_per_order,
+        Product.is_active,
+        model=Product,
+    )
+    categories = changed(Category.id, Category.name, model=Category)
+    churches = changed(Church.id, Church.name, Church.city, Church.whatsapp_phone, model=Church)
+
+    deleted: Dict[str, List[int]] = {"products": [], "categories": [], "churches": []}
+    if since is not None:
+        rows = db.execute(
+            select(CatalogTombstone.entity, CatalogTombstone.entity_id)
+            .where(CatalogTombstone.catalog_version >= since)
+            .order_by(CatalogTombstone.id)
+        )
+        for entity, entity_id in rows:
+            deleted.setdefault(entity, []).append(entity_id)
+
+    return {
+        "version": version,
+        "since": since,
+        "full": since is None,
+        "products": products,
+        "categories": categories,
+        "churches": churches,
+        "deleted": deleted,
+    }
@@ -3,6 +3,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
+from app.db.writes import save
 from app.models.category import Category
 
 
@@ -11,11 +12,7 @@ def list_categories(db: Session) -> List[Category]:
 
 
 def create_category(db: Session, name: str) -> Category:
-    cat = Category(name=name)
-    db.add(cat)
-    db.commit()
-    db.refresh(cat)
-    return cat
+    return save(db, Category(name=name))
 
 
 def update_category(db: Session, category_id: int, name: str) -> Optional[Category]:
@@ -23,8 +20,7 @@ def update_category(db: Session, category_id: int, name: str) -> Optional[Catego
     if not cat:
         return None
     cat.name = name
-    db.commit()
-    db.refresh(cat)
+    db.flush()
     return cat
 
 
@@ -36,5 +32,5 @@ def delete_category(db: Session, category_id: int) -> bool:
     if cat.products:
         raise ValueError("Cannot delete category with associated products")
     db.delete(cat)
-    db.commit()
+    db.flush()
     return True
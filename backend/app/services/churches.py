@@ -3,6 +3,7 @@ from typing import List
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
+from app.db.writes import save
 from app.models.church import Church
 
 
@@ -16,22 +17,17 @@ def list_cities(db: Session) -> List[str]:
 
 
 def create_church(db: Session, name: str, city: str, whatsapp_phone: str | None = None) -> Church:
-    ch = Church(name=name, city=city, whatsapp_phone=whatsapp_phone)
-    db.add(ch)
-    db.commit()
-    db.refresh(ch)
-    return ch
+    return save(db, Church(name=name, city=city, whatsapp_phone=whatsapp_phone))
 
 
 def update_church(db: Session, church: Church, name: str, city: str, whatsapp_phone: str | None = None) -> Church:
     church.name = name
     church.city = city
     church.whatsapp_phone = whatsapp_phone
-    db.commit()
-    db.refresh(church)
+    db.flush()
     return church
 
 
 def delete_church(db: Session, church: Church) -> None:
     db.delete(church)
-    db.commit()
+    db.flush()
@@ -3,13 +3,17 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, Any, List
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import case, select, func
 
 from app.models.order import Order, OrderStatus
 from app.models.product import Product
 from app.models.stock_movement import StockMovement, MovementType
 from app.models.user import User
 
+# Saídas do estoque; ESTORNO devolve parte de uma saída de pedido e entra negativo
+_OUT_TYPES = [MovementType.SAIDA_PEDIDO, MovementType.SAIDA_MANUAL, MovementType.PERDA, MovementType.ESTORNO]
+_OUT_QTY = case((StockMovement.type == MovementType.ESTORNO, -StockMovement.qty), else_=StockMovement.qty)
+
 
 def overview(db: Session) -> Dict[str, Any]:
     pedidos_abertos = db.scalar(
@@ -40,12 +44,12 @@ def overview(db: Session) -> Dict[str, Any]:
     saidas_rs = db.scalar(
         select(
             func.coalesce(
-                func.sum(StockMovement.qty * Product.price), 0
+                func.sum(_OUT_QTY * Product.price), 0
             )
         ).select_from(StockMovement)
         .join(Product, Product.id == StockMovement.product_id)
         .where(
-            StockMovement.type.in_([MovementType.SAIDA_PEDIDO, MovementType.SAIDA_MANUAL, MovementType.PERDA]),
+            StockMovement.type.in_(_OUT_TYPES),
             StockMovement.created_at >= since,
         )
     ) or Decimal("0")
@@ -74,11 +78,11 @@ def overview(db: Session) -> Dict[str, Any]:
         to_date = datetime(to_year, to_month, 1)
 
         total = db.scalar(
-            select(func.coalesce(func.sum(StockMovement.qty * Product.price), 0))
+            select(func.coalesce(func.sum(_OUT_QTY * Product.price), 0))
             .select_from(StockMovement)
             .join(Product, Product.id == StockMovement.product_id)
             .where(
-                StockMovement.type.in_([MovementType.SAIDA_PEDIDO, MovementType.SAIDA_MANUAL, MovementType.PERDA]),
+                StockMovement.type.in_(_OUT_TYPES),
                 StockMovement.created_at >= from_date,
                 StockMovement.created_at < to_date,
             )
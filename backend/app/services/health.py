@@ -0,0 +1,176 @@
+"""Dependency checks behind GET /health/ready and GET /health/deep.
+
+Each check returns ``{"status": "ok" | "degraded" | "fail" | "skipped", ...}``
+and is cached per process (``health_cache_seconds`` for the readiness checks,
+``health_deep_cache_seconds`` for storage and SMTP). Only one caller refreshes
+an expired check; concurrent probes get the previous result meanwhile, so a
+burst of probes costs at most one round trip per dependency.
+
+Critical checks (database, pool, audit queue) decide readiness; storage and
+SMTP only affect receipt uploads and e-mail, so they degrade /health/deep
+without failing it.
+"""
+from __future__ import annotations
+import smtplib
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.db.pool import pool_stats
+from app.services.audit_writer import audit_writer
+from app.services.email_service import email_service
+
+OK, DEGRADED, FAIL, SKIPPED = "ok", "degraded", "fail", "skipped"
+
+
+class CachedCheck:
+    def __init__(self, fn: Callable[[], Dict[str, Any]], ttl: Callable[[], float]):
+        self.fn = fn
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+
+    def get(self) -> Dict[str, Any]:
+        if self._result is None or time.monotonic() - self._checked_at >= self.ttl():
+            # a probe already refreshing: answer with the previous result
+            if self._lock.acquire(blocking=self._result is None):
+                try:
+                    if self._result is None or time.monotonic() - self._checked_at >= self.ttl():
+                        self._result = _run(self.fn)
+                        self._checked_at = time.monotonic()
+                finally:
+                    self._lock.release()
+        return dict(self._result, age_s=round(time.monotonic() - self._checked_at, 1))
+
+    def reset(self) -> None:
+        self._result = None
+
+
+def _run(fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        result = fn()
+    except Exception as e:
+        result = {"status": FAIL, "error": f"{type(e).__name__}: {e}"[:300]}
+    if "latency_ms" not in result and result["status"] != SKIPPED:
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+def _pool_usage(name: str) -> Dict[str, Any]:
+    stats = pool_stats.get(name)
+    pool = stats.pool if stats is not None else None
+    if pool is None or not hasattr(pool, "checkedout"):
+        return {}
+    capacity = pool.size() + max(getattr(pool, "max_overflow", 0), 0)
+    return {"checked_out": pool.checkedout(), "capacity": capacity, "timeouts": stats.timeouts}
+
+
+def check_database(engine: Engine, name: str) -> Dict[str, Any]:
+    """Round trip (SELECT 1) through the pool; not attempted when the pool is exhausted,
+    since the checkout would block for up to pool_timeout."""
+    usage = _pool_usage(name)
+    if usage and usage["checked_out"] >= usage["capacity"]:
+        return {"status": FAIL, "error": "connection pool exhausted"}
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+    latency_ms = (time.perf_counter() - start) * 1000
+    slow = settings.slow_query_ms and latency_ms > settings.slow_query_ms
+    return {"status": DEGRADED if slow else OK, "latency_ms": round(latency_ms, 2)}
+
+
+def check_pools() -> Dict[str, Any]:
+    """Utilization (checked out / (pool_size + max_overflow)) of each engine's pool."""
+    engines = {}
+    status = OK
+    for name in pool_stats:
+        usage = _pool_usage(name)
+        if not usage:
+            continue
+        utilization = usage["checked_out"] / usage["capacity"] if usage["capacity"] else 0.0
+        if utilization >= 1:
+            engine_status = FAIL
+        elif utilization * 100 >= settings.health_pool_saturation_pct:
+            engine_status = DEGRADED
+        else:
+            engine_status = OK
+        engines[name] = dict(usage, utilization=round(utilization, 3), status=engine_status)
+        if engine_status == FAIL or (engine_status == DEGRADED and status == OK):
+            status = engine_status
+    return {"status": status, "latency_ms": 0.0, "engines": engines}
+
+
+def check_audit_queue() -> Dict[str, Any]:
+    """Backlog of the background audit writer. A full queue is degraded, not failed:
+    entries are then written synchronously by the request."""
+    depth = audit_writer.depth()
+    capacity = audit_writer.queue.maxsize
+    utilization = depth / capacity if capacity else 0.0
+    status = DEGRADED if utilization * 100 >= settings.health_pool_saturation_pct else OK
+    return {"status": status, "latency_ms": 0.0, "depth": depth, "capacity": capacity}
+
+
+def check_storage() -> Dict[str, Any]:
+    """HEAD on the receipts bucket."""
+    if not (settings.aws_s3_bucket and settings.aws_access_key_id and settings.aws_secret_access_key):
+        return {"status": SKIPPED, "backend": None, "detail": "S3 not configured"}
+    from botocore.config import Config
+    from app.services.storage import get_s3_client
+
+    timeout = settings.health_check_timeout_seconds
+    client = get_s3_client(Config(connect_timeout=timeout, read_timeout=timeout, retries={"max_attempts": 0}))
+    client.head_bucket(Bucket=settings.aws_s3_bucket)
+    return {"status": OK, "backend": "s3"}
+
+
+def check_smtp() -> Dict[str, Any]:
+    """Connect, read the greeting and QUIT; no login and no message."""
+    if not email_service._is_configured():
+        return {"status": SKIPPED, "detail": "SMTP not configured"}
+    with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.health_check_timeout_seconds) as smtp:
+        smtp.noop()
+    return {"status": OK}
+
+
+def _ready_ttl() -> float:
+    return settings.health_cache_seconds
+
+
+def _deep_ttl() -> float:
+    return settings.health_deep_cache_seconds
+
+
+ready_checks: Dict[str, CachedCheck] = {
+    "database": CachedCheck(lambda: check_database(db_session.engine, "primary"), _ready_ttl),
+    "pool": CachedCheck(check_pools, _ready_ttl),
+    "audit_queue": CachedCheck(check_audit_queue, _ready_ttl),
+}
+if db_session.replica_enabled:
+    ready_checks["replica"] = CachedCheck(lambda: check_database(db_session.replica_engine, "replica"), _ready_ttl)
+
+deep_checks: Dict[str, CachedCheck] = {
+    "storage": CachedCheck(check_storage, _deep_ttl),
+    "smtp": CachedCheck(check_smtp, _deep_ttl),
+}
+
+
+def readiness() -> Dict[str, Any]:
+    checks = {name: check.get() for name, check in ready_checks.items()}
+    failed = any(c["status"] == FAIL for c in checks.values())
+    degraded = any(c["status"] == DEGRADED for c in checks.values())
+    return {"status": FAIL if failed else DEGRADED if degraded else OK, "checks": checks}
+
+
+def deep() -> Dict[str, Any]:
+    result = readiness()
+    for name, check in deep_checks.items():
+        c = result["checks"][name] = check.get()
+        if c["status"] in (FAIL, DEGRADED) and result["status"] == OK:
+            result["status"] = DEGRADED
+    return result
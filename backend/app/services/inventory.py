@@ -1,10 +1,15 @@
-from datetime import datetime
-from typing import List
+import csv
+import io
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import (
+    select, insert, update, func, literal, false, true, or_, and_, case, cast, values, column, Integer, DateTime
+)
 
 from app.models.inventory import InventoryCount, InventoryItem, InventoryStatus
 from app.models.product import Product
+from app.models.user import User
 from app.models.stock_movement import StockMovement, MovementType
 from app.schemas.inventory import InventoryCreate, InventoryUpdate, InventoryItemUpdate
 from app.services.audit import audit_log
@@ -13,9 +18,6 @@ from app.models.audit_log import AuditAction, AuditResource
 
 def create_inventory(db: Session, user_id: int, data: InventoryCreate) -> InventoryCount:
     """Create a new inventory count with all products."""
-    # Get all products
-    products = db.scalars(select(Product)).all()
-    
     # Create inventory count
     inventory = InventoryCount(
         created_by_id=user_id,
@@ -25,20 +27,23 @@ def create_inventory(db: Session, user_id: int, data: InventoryCreate) -> Invent
     db.add(inventory)
     db.flush()
     
-    # Create items for each product with current stock as expected qty
-    for product in products:
-        item = InventoryItem(
-            inventory_id=inventory.id,
-            product_id=product.id,
-            expected_qty=product.stock_qty,
-            counted_qty=None,
-            difference=None,
-            adjusted=False,
+    # Snapshot current stock of every product as expected qty with a single
+    # INSERT ... SELECT (no Product entities loaded, no per-item ORM objects)
+    snapshot = select(
+        literal(inventory.id),
+        Product.id,
+        func.coalesce(Product.stock_qty, 0),
+        false(),
+    ).order_by(Product.id)
+    result = db.execute(
+        insert(InventoryItem).from_select(
+            ["inventory_id", "product_id", "expected_qty", "adjusted"],
+            snapshot,
         )
-        db.add(item)
+    )
+    total_products = result.rowcount
     
-    db.commit()
-    db.refresh(inventory)
+    db.flush()
     
     # Audit log
     audit_log(
@@ -47,16 +52,45 @@ def create_inventory(db: Session, user_id: int, data: InventoryCreate) -> Invent
         action=AuditAction.CREATE,
         resource=AuditResource.INVENTORY,
         resource_id=inventory.id,
-        extra_metadata={"notes": data.notes, "total_products": len(products)}
+        extra_metadata={"notes": data.notes, "total_products": total_products}
     )
     
     return inventory
 
 
-def list_inventories(db: Session, limit: int = 50) -> List[InventoryCount]:
-    """List all inventories, most recent first."""
-    stmt = select(InventoryCount).order_by(InventoryCount.created_at.desc()).limit(limit)
-    return list(db.scalars(stmt))
+def list_inventories(db: Session, page: int = 1, limit: int = 50) -> List[Dict[str, Any]]:
+    """Inventory summaries, most recent first, with item counts computed in SQL.
+
+    Items themselves are not loaded; see ``list_inventory_items``.
+    """
+    stats = select(
+        func.count().label("total_items"),
+        func.count(InventoryItem.counted_qty).label("counted_items"),
+        func.coalesce(func.sum(InventoryItem.difference), 0).label("total_difference"),
+    ).where(InventoryItem.inventory_id == InventoryCount.id).lateral("stats")
+    
+    stmt = select(
+        InventoryCount.id,
+        InventoryCount.created_at,
+        InventoryCount.created_by_id,
+        User.name.label("created_by_name"),
+        InventoryCount.status,
+        InventoryCount.notes,
+        InventoryCount.finalized_at,
+        stats.c.total_items,
+        stats.c.counted_items,
+        (stats.c.total_items - stats.c.counted_items).label("pending_items"),
+        stats.c.total_difference,
+    ).select_from(InventoryCount).join(stats, true()).join(
+        User, User.id == InventoryCount.created_by_id, isouter=True
+    ).order_by(
+        InventoryCount.created_at.desc(), InventoryCount.id.desc()
+    ).offset((page - 1) * limit).limit(limit)
+    return list(db.execute(stmt).mappings())
+
+
+def count_inventories(db: Session) -> int:
+    return db.scalar(select(func.count()).select_from(InventoryCount)) or 0
 
 
 def get_inventory(db: Session, inventory_id: int) -> InventoryCount | None:
@@ -64,6 +98,49 @@ def get_inventory(db: Session, inventory_id: int) -> InventoryCount | None:
     return db.get(InventoryCount, inventory_id)
 
 
+def list_inventory_items(
+    db: Session,
+    inventory_id: int,
+    *,
+    after_id: int | None = None,
+    limit: int | None = None,
+    uncounted: bool = False,
+    differences: bool = False,
+    category_id: int | None = None,
+    q: str | None = None,
+) -> List[Dict[str, Any]]:
+    """Inventory items with product names, fetched with one joined query.
+
+    ``after_id``/``limit`` page through the items by id (keyset pagination);
+    the other arguments filter by count status, category and product name.
+    """
+    stmt = select(
+        InventoryItem.id,
+        InventoryItem.inventory_id,
+        InventoryItem.product_id,
+        Product.name.label("product_name"),
+        InventoryItem.expected_qty,
+        InventoryItem.counted_qty,
+        InventoryItem.difference,
+        InventoryItem.adjusted,
+    ).join(Product, InventoryItem.product_id == Product.id, isouter=True).where(
+        InventoryItem.inventory_id == inventory_id
+    ).order_by(InventoryItem.id)
+    if after_id is not None:
+        stmt = stmt.where(InventoryItem.id > after_id)
+    if uncounted:
+        stmt = stmt.where(InventoryItem.counted_qty.is_(None))
+    if differences:
+        stmt = stmt.where(InventoryItem.difference != 0)
+    if category_id is not None:
+        stmt = stmt.where(Product.category_id == category_id)
+    if q:
+        stmt = stmt.where(Product.name.ilike(f"%{q}%"))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return list(db.execute(stmt).mappings())
+
+
 def update_inventory(db: Session, inventory_id: int, user_id: int, data: InventoryUpdate) -> InventoryCount:
     """Update inventory notes."""
     inventory = db.get(InventoryCount, inventory_id)
@@ -76,8 +153,7 @@ def update_inventory(db: Session, inventory_id: int, user_id: int, data: Invento
     if data.notes is not None:
         inventory.notes = data.notes
     
-    db.commit()
-    db.refresh(inventory)
+    db.flush()
     
     return inventory
 
@@ -104,15 +180,134 @@ def update_item_count(
     item.counted_qty = data.counted_qty
     item.difference = data.counted_qty - item.expected_qty
     
-    db.commit()
-    db.refresh(item)
+    db.flush()
     
     return item
 
 
+def bulk_update_item_counts(
+    db: Session,
+    inventory_id: int,
+    user_id: int,
+    entries: List[Dict[str, Any]],
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """Apply many counts at once with a single UPDATE ... FROM (VALUES ...).
+
+    Each entry has ``row``, ``counted_qty`` and either ``item_id`` or
+    ``product_id``. Invalid rows are skipped and reported back; valid rows are
+    applied in one transaction (the last entry wins for repeated items).
+    Returns ``(updated, errors)``.
+    """
+    inventory = db.get(InventoryCount, inventory_id, with_for_update=True)
+    if not inventory:
+        raise ValueError("Inventory not found")
+    
+    if inventory.status == InventoryStatus.FINALIZADO:
+        raise ValueError("Cannot update finalized inventory")
+    
+    errors: List[Dict[str, Any]] = []
+    
+    # Resolve item ids / product ids of this inventory with one query
+    item_ids = {e["item_id"] for e in entries if e.get("item_id") is not None}
+    product_ids = {e["product_id"] for e in entries if e.get("product_id") is not None}
+    by_item: Dict[int, int] = {}
+    by_product: Dict[int, int] = {}
+    if item_ids or product_ids:
+        rows = db.execute(
+            select(InventoryItem.id, InventoryItem.product_id).where(
+                InventoryItem.inventory_id == inventory_id,
+                or_(InventoryItem.id.in_(item_ids), InventoryItem.product_id.in_(product_ids)),
+            )
+        )
+        for item_id, product_id in rows:
+            by_item[item_id] = item_id
+            by_product[product_id] = item_id
+    
+    counts: Dict[int, int] = {}
+    for e in entries:
+        ref = {"row": e["row"], "item_id": e.get("item_id"), "product_id": e.get("product_id")}
+        qty = e.get("counted_qty")
+        if qty is None or qty < 0:
+            errors.append({**ref, "detail": "counted_qty must be >= 0"})
+            continue
+        if e.get("item_id") is not None:
+            item_id = by_item.get(e["item_id"])
+        else:
+            item_id = by_product.get(e.get("product_id"))
+        if item_id is None:
+            errors.append({**ref, "detail": "Item not found or doesn't belong to this inventory"})
+            continue
+        counts[item_id] = qty
+    
+    if counts:
+        data = values(
+            column("id", Integer), column("counted_qty", Integer), name="counts"
+        ).data(list(counts.items()))
+        db.execute(
+            update(InventoryItem)
+            .where(InventoryItem.id == data.c.id, InventoryItem.inventory_id == inventory_id)
+            .values(
+                counted_qty=data.c.counted_qty,
+                difference=data.c.counted_qty - InventoryItem.expected_qty,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    db.flush()
+    
+    return len(counts), errors
+
+
+def parse_counts_csv(content: bytes) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Parse a counts CSV exported by handheld scanners.
+
+    Expected header: ``item_id`` or ``product_id`` plus ``counted_qty``
+    (``qty``/``quantidade`` also accepted), separated by ``,`` or ``;``.
+    Returns ``(entries, errors)`` in the format of ``bulk_update_item_counts``.
+    """
+    text = content.decode("utf-8-sig", errors="replace")
+    try:
+        dialect = csv.Sniffer().sniff(text[:1024], delimiters=",;")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    fields = {(f or "").strip().lower(): f for f in (reader.fieldnames or [])}
+    
+    qty_field = next((fields[k] for k in ("counted_qty", "qty", "quantidade") if k in fields), None)
+    id_field = fields.get("item_id")
+    product_field = fields.get("product_id")
+    if not qty_field or not (id_field or product_field):
+        raise ValueError("CSV must have an item_id or product_id column and a counted_qty column")
+    
+    entries: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    for row in reader:
+        line = reader.line_num
+        try:
+            entry: Dict[str, Any] = {"row": line, "counted_qty": int(str(row.get(qty_field) or "").strip())}
+            raw_id = str((row.get(id_field) if id_field else None) or "").strip()
+            if raw_id:
+                entry["item_id"] = int(raw_id)
+            else:
+                entry["product_id"] = int(str(row.get(product_field) or "").strip())
+        except (TypeError, ValueError):
+            errors.append({"row": line, "detail": "Invalid number in row"})
+            continue
+        entries.append(entry)
+    
+    return entries, errors
+
+
 def finalize_inventory(db: Session, inventory_id: int, user_id: int) -> InventoryCount:
-    """Finalize inventory and create stock adjustment movements."""
-    inventory = db.get(InventoryCount, inventory_id)
+    """Finalize inventory and create stock adjustment movements.
+
+    Runs as a handful of set-based statements regardless of the number of
+    items: the inventory row and the adjusted products are locked, movements
+    are inserted with one INSERT ... SELECT and stock is adjusted with one
+    UPDATE ... FROM inventory_items.
+    """
+    # Lock the inventory so two finalize requests cannot both apply adjustments
+    inventory = db.get(InventoryCount, inventory_id, with_for_update=True)
     if not inventory:
         raise ValueError("Inventory not found")
     
@@ -120,43 +315,66 @@ def finalize_inventory(db: Session, inventory_id: int, user_id: int) -> Inventor
         raise ValueError("Inventory already finalized")
     
     # Check all items have been counted
-    uncounted = [item for item in inventory.items if item.counted_qty is None]
+    total_items, uncounted = db.execute(
+        select(
+            func.count(),
+            func.count().filter(InventoryItem.counted_qty.is_(None)),
+        ).where(InventoryItem.inventory_id == inventory_id)
+    ).one()
     if uncounted:
-        raise ValueError(f"{len(uncounted)} items not counted yet")
+        raise ValueError(f"{uncounted} items not counted yet")
+    
+    with_difference = and_(InventoryItem.inventory_id == inventory_id, InventoryItem.difference != 0)
+    
+    # Lock the products being adjusted (in id order, to avoid deadlocks) so
+    # concurrent orders wait instead of overwriting the adjusted stock
+    db.execute(
+        select(Product.id)
+        .where(Product.id.in_(select(InventoryItem.product_id).where(with_difference)))
+        .order_by(Product.id)
+        .with_for_update()
+    )
     
     # Create adjustment movements for items with differences
-    adjustments_made = 0
-    for item in inventory.items:
-        if item.difference != 0:
-            # Create stock movement
-            movement_type = MovementType.ENTRADA if item.difference > 0 else MovementType.SAIDA_MANUAL
-            qty = abs(item.difference)
-            
-            movement = StockMovement(
-                product_id=item.product_id,
-                type=movement_type,
-                qty=qty,
-                note=f"Ajuste de inventário #{inventory.id}"
+    movement_type = case(
+        (InventoryItem.difference > 0, MovementType.ENTRADA.value),
+        else_=MovementType.SAIDA_MANUAL.value,
+    )
+    adjustments_made = db.execute(
+        insert(StockMovement).from_select(
+            ["product_id", "type", "qty", "note", "created_at"],
+            select(
+                InventoryItem.product_id,
+                cast(movement_type, StockMovement.type.type),
+                func.abs(InventoryItem.difference),
+                literal(f"Ajuste de inventário #{inventory.id}"),
+                literal(datetime.now(timezone.utc), DateTime(timezone=True)),
             )
-            db.add(movement)
-            
-            # Update product stock
-            product = db.get(Product, item.product_id)
-            if product:
-                if movement_type == MovementType.ENTRADA:
-                    product.stock_qty = (product.stock_qty or 0) + qty
-                else:
-                    product.stock_qty = (product.stock_qty or 0) - qty
-            
-            item.adjusted = True
-            adjustments_made += 1
+            .where(with_difference)
+            .order_by(InventoryItem.id),
+        )
+    ).rowcount
+    
+    # Update product stock
+    db.execute(
+        update(Product)
+        .where(Product.id == InventoryItem.product_id, with_difference)
+        .values(stock_qty=func.coalesce(Product.stock_qty, 0) + InventoryItem.difference)
+        .execution_options(synchronize_session=False)
+    )
+    
+    db.execute(
+        update(InventoryItem)
+        .where(with_difference)
+        .values(adjusted=true())
+        .execution_options(synchronize_session=False)
+    )
     
     # Mark inventory as finalized
     inventory.status = InventoryStatus.FINALIZADO
     inventory.finalized_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(inventory)
+    db.flush()
     
     # Audit log
     audit_log(
@@ -168,7 +386,7 @@ def finalize_inventory(db: Session, inventory_id: int, user_id: int) -> Inventor
         extra_metadata={
             "finalized": True,
             "adjustments_made": adjustments_made,
-            "total_items": len(inventory.items)
+            "total_items": total_items
         }
     )
     
@@ -195,6 +413,6 @@ def delete_inventory(db: Session, inventory_id: int, user_id: int) -> bool:
     )
     
     db.delete(inventory)
-    db.commit()
+    db.flush()
     
     return True
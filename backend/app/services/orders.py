@@ -1,18 +1,27 @@
 from __future__ import annotations
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
-from typing import List, Tuple
-from sqlalchemy.orm import Session, selectinload
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session, lazyload, selectinload
 from sqlalchemy import select, func
 
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product
 from app.models.church import Church
 from app.models.user import User
-from app.services.stock import add_movement
+from app.db.unit_of_work import after_commit
+from app.db.versioning import touch
+from app.db.writes import save
+from app.services.stock import add_movement, apply_stock_changes, lock_products
 from app.models.stock_movement import MovementType, StockMovement
 
 
+def _products(db: Session, product_ids) -> dict:
+    """Products by id, without their order_items collection (not needed to write an order)."""
+    stmt = select(Product).where(Product.id.in_(list(product_ids))).options(lazyload(Product.order_items))
+    return {p.id: p for p in db.scalars(stmt)}
+
+
 def list_orders_for_user(db: Session, *, user: User, is_admin: bool, page: int = 1, limit: int = 10, 
                          date_from: datetime = None, date_until: datetime = None, church_id: int = None) -> List[Order]:
     # ensure we also load related product objects for each order item so callers can include product.name
@@ -78,11 +87,10 @@ def create_order(
         raise ValueError("Order must have items")
 
     # Validate church exists
-    church = db.get(Church, church_id)
-    if not church:
+    if db.scalar(select(Church.id).where(Church.id == church_id)) is None:
         raise ValueError("Invalid church")
 
-    prods = {p.id: p for p in db.scalars(select(Product).where(Product.id.in_([pid for pid, _ in items])))}
+    prods = _products(db, [pid for pid, _ in items])
     order_items: List[OrderItem] = []
 
     for product_id, qty in items:
@@ -107,10 +115,7 @@ def create_order(
         items=order_items,
         created_at=datetime.utcnow(),
     )
-    db.add(order)
-    db.commit()
-    db.refresh(order)
-    return order
+    return save(db, order)
 
 
 def update_order(db: Session, *, order: Order, data, is_admin: bool = False) -> Order:
@@ -124,66 +129,103 @@ def update_order(db: Session, *, order: Order, data, is_admin: bool = False) ->
         order.church_id = data.church_id
 
     if data.items is not None:
-        items = [(it.product_id, it.qty) for it in data.items]
-        if not items:
+        if not data.items:
             raise ValueError("Order must have items")
-
-        # Se pedido já estava APROVADO, reverter movimentações de estoque antigas
-        if order.status == OrderStatus.APROVADO:
-            for old_item in order.items:
-                prod = db.get(Product, old_item.product_id)
-                if prod:
-                    prod.stock_qty = (prod.stock_qty or 0) + old_item.qty  # Devolver ao estoque
-            # Deletar movimentações antigas relacionadas a este pedido
-            db.query(StockMovement).filter(StockMovement.related_order_id == order.id).delete()
-
-        prods = {p.id: p for p in db.scalars(select(Product).where(Product.id.in_([pid for pid, _ in items])))}
-        order_items: List[OrderItem] = []
-
-        for product_id, qty in items:
-            prod = prods.get(product_id)
-            if not prod or not prod.is_active:
-                raise ValueError("Invalid product")
-            if prod.stock_qty is None or prod.stock_qty < qty or qty <= 0:
+        new_qty: Dict[int, int] = {}
+        for it in data.items:
+            if it.qty <= 0:
                 raise ValueError("Insufficient stock for one or more items")
-            # Validar limite por pedido
-            if prod.max_qty_per_order and prod.max_qty_per_order > 0 and qty > prod.max_qty_per_order:
-                raise ValueError(f"Quantidade máxima por pedido para '{prod.name}': {prod.max_qty_per_order}")
-            unit_price: Decimal = prod.price
-            subtotal: Decimal = (unit_price or Decimal("0")) * Decimal(qty)
-            order_items.append(
-                OrderItem(product_id=product_id, qty=qty, unit_price=unit_price, subtotal=subtotal)
-            )
+            new_qty[it.product_id] = new_qty.get(it.product_id, 0) + it.qty
+        reconcile_order_items(db, order, new_qty)
 
-        # replace items
-        order.items = order_items
-        
-        # Se ainda está APROVADO, reaplicar movimentações de estoque com novos itens
-        if order.status == OrderStatus.APROVADO:
-            for it in order.items:
-                prod = db.get(Product, it.product_id)
-                if prod:
-                    prod.stock_qty = (prod.stock_qty or 0) - it.qty
-                    add_movement(
-                        db,
-                        product_id=it.product_id,
-                        type=MovementType.SAIDA_PEDIDO,
-                        qty=it.qty,
-                        note=f"Pedido #{order.id} editado",
-                        related_order_id=order.id,
-                    )
-
-    db.commit()
-    db.refresh(order)
+    db.flush()
     return order
 
 
+def reconcile_order_items(db: Session, order: Order, new_qty: Dict[int, int]) -> Dict[int, int]:
+    """Aplica a edição dos itens de um pedido pela diferença entre as linhas antigas e as novas.
+
+    ``new_qty`` é a quantidade pedida por produto. Devolve o delta por produto
+    (nova - antiga; produtos sem mudança ficam de fora). Só as linhas de
+    ``order_items`` que mudaram são tocadas, com o preço atual do produto;
+    linhas repetidas do mesmo produto viram uma.
+
+    Num pedido APROVADO só o saldo líquido mexe no estoque, num único UPDATE
+    dos produtos travados, e o histórico ganha movimentações compensatórias
+    (SAIDA_PEDIDO a mais, ESTORNO do que voltou) em vez de ser apagado.
+    """
+    lines: Dict[int, List[OrderItem]] = {}
+    for item in order.items:
+        lines.setdefault(item.product_id, []).append(item)
+    old_qty = {pid: sum(item.qty for item in rows) for pid, rows in lines.items()}
+    deltas = {
+        pid: new_qty.get(pid, 0) - old_qty.get(pid, 0)
+        for pid in old_qty.keys() | new_qty.keys()
+        if new_qty.get(pid, 0) != old_qty.get(pid, 0)
+    }
+    changed = deltas.keys() | {pid for pid, rows in lines.items() if len(rows) > 1}
+    if not changed:
+        return {}
+
+    approved = order.status == OrderStatus.APROVADO
+    prods = lock_products(db, changed)
+    for pid in changed & new_qty.keys():
+        prod = prods.get(pid)
+        qty = new_qty[pid]
+        if not prod or not prod.is_active:
+            raise ValueError("Invalid product")
+        # num pedido aprovado a quantidade antiga já saiu do estoque
+        available = (prod.stock_qty or 0) + (old_qty.get(pid, 0) if approved else 0)
+        if available < qty:
+            raise ValueError("Insufficient stock for one or more items")
+        if prod.max_qty_per_order and prod.max_qty_per_order > 0 and qty > prod.max_qty_per_order:
+            raise ValueError(f"Quantidade máxima por pedido para '{prod.name}': {prod.max_qty_per_order}")
+
+    if approved:
+        apply_stock_changes(db, prods, {pid: -delta for pid, delta in deltas.items()})
+        now = datetime.now(timezone.utc)
+        db.add_all([
+            StockMovement(
+                product_id=pid,
+                type=MovementType.SAIDA_PEDIDO if delta > 0 else MovementType.ESTORNO,
+                qty=abs(delta),
+                note=f"Pedido #{order.id} editado",
+                related_order_id=order.id,
+                created_at=now,
+            )
+            for pid, delta in sorted(deltas.items())
+        ])
+
+    for pid in sorted(changed):
+        rows = lines.get(pid, [])
+        if pid not in new_qty:
+            for item in rows:
+                order.items.remove(item)
+            continue
+        for extra in rows[1:]:
+            order.items.remove(extra)
+        if rows:
+            item = rows[0]
+        else:
+            item = OrderItem(product_id=pid)
+            order.items.append(item)
+        unit_price: Decimal = prods[pid].price
+        item.qty = new_qty[pid]
+        item.unit_price = unit_price
+        item.subtotal = (unit_price or Decimal("0")) * Decimal(item.qty)
+
+    # só os itens mudaram: a versão do pedido sobe mesmo assim (edições concorrentes dão 409)
+    touch(order)
+    return deltas
+
+
 def approve_order(db: Session, *, order: Order) -> Order:
     if order.status != OrderStatus.PENDENTE:
         raise ValueError("Order is not pending")
 
+    prods = _products(db, {it.product_id for it in order.items})
     for it in order.items:
-        prod = db.get(Product, it.product_id)
+        prod = prods.get(it.product_id)
         if not prod or (prod.stock_qty or 0) < it.qty:
             raise ValueError("Insufficient stock at approval time")
 
@@ -199,8 +241,7 @@ def approve_order(db: Session, *, order: Order) -> Order:
 
     order.status = OrderStatus.APROVADO
     order.approved_at = datetime.utcnow()
-    db.commit()
-    db.refresh(order)
+    db.flush()
     
     # Send WhatsApp notification automatically
     if order.church and order.church.whatsapp_phone:
@@ -222,7 +263,9 @@ def approve_order(db: Session, *, order: Order) -> Order:
                 ]
             }
             message = format_order_message(order_dict)
-            send_whatsapp_message(order.church.whatsapp_phone, message)
+            phone = order.church.whatsapp_phone
+            # só depois do commit: a igreja não é avisada de uma aprovação desfeita
+            after_commit(db, lambda: send_whatsapp_message(phone, message))
         except Exception as e:
             # Log error but don't fail the approval
             print(f"WhatsApp notification failed for order {order.id}: {e}")
@@ -235,8 +278,7 @@ def deliver_order(db: Session, *, order: Order) -> Order:
         raise ValueError("Order is not approved")
     order.status = OrderStatus.ENTREGUE
     order.delivered_at = datetime.utcnow()
-    db.commit()
-    db.refresh(order)
+    db.flush()
     return order
 
 
@@ -244,8 +286,7 @@ def sign_order(db: Session, *, order: Order, signer_user_id: int) -> Order:
     """Mark the order as signed by the given user and set timestamp."""
     order.signed_by_id = signer_user_id
     order.signed_at = datetime.utcnow()
-    db.commit()
-    db.refresh(order)
+    db.flush()
     return order
 
 
@@ -256,17 +297,27 @@ def cancel_order(db: Session, *, order: Order) -> Order:
     if order.status == OrderStatus.CANCELADO:
         raise ValueError("Order is already cancelled")
     
-    # Se estava APROVADO, reverter o estoque
+    # Se estava APROVADO, devolver o estoque com ESTORNO (as saídas do pedido ficam no histórico)
     if order.status == OrderStatus.APROVADO:
+        returned: Dict[int, int] = {}
         for item in order.items:
-            prod = db.get(Product, item.product_id)
-            if prod:
-                prod.stock_qty = (prod.stock_qty or 0) + item.qty
-        
-        # Deletar movimentações relacionadas
-        db.query(StockMovement).filter(StockMovement.related_order_id == order.id).delete()
+            returned[item.product_id] = returned.get(item.product_id, 0) + item.qty
+        prods = lock_products(db, returned)
+        returned = {pid: qty for pid, qty in returned.items() if pid in prods and qty}
+        apply_stock_changes(db, prods, returned)
+        now = datetime.now(timezone.utc)
+        db.add_all([
+            StockMovement(
+                product_id=pid,
+                type=MovementType.ESTORNO,
+                qty=qty,
+                note=f"Pedido #{order.id} cancelado",
+                related_order_id=order.id,
+                created_at=now,
+            )
+            for pid, qty in sorted(returned.items())
+        ])
     
     order.status = OrderStatus.CANCELADO
-    db.commit()
-    db.refresh(order)
+    db.flush()
     return order
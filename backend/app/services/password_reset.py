@@ -8,6 +8,8 @@ from sqlalchemy import select
 from app.models.password_reset import PasswordReset
 from app.models.user import User
 from app.core.security import get_password_hash
+from app.db.unit_of_work import after_commit
+from app.db.writes import save
 from app.services.email_service import email_service
 
 
@@ -20,20 +22,24 @@ def init_reset(db: Session, *, user: User, ttl_minutes: int = 60 * 24, send_emai
         expires_at=datetime.now(timezone.utc) + timedelta(minutes=ttl_minutes),
         used=False,
     )
-    db.add(pr)
-    db.commit()
-    db.refresh(pr)
+    save(db, pr)
     
     # Send email if requested and email service is configured
     if send_email:
-        email_sent = email_service.send_password_reset_email(
-            to_email=user.email,
-            user_name=user.name,
-            reset_token=token
-        )
-        if not email_sent:
-            # Log warning but don't fail the process
-            print(f"Warning: Failed to send password reset email to {user.email}")
+        to_email, user_name = user.email, user.name
+
+        def send() -> None:
+            email_sent = email_service.send_password_reset_email(
+                to_email=to_email,
+                user_name=user_name,
+                reset_token=token
+            )
+            if not email_sent:
+                # Log warning but don't fail the process
+                print(f"Warning: Failed to send password reset email to {to_email}")
+
+        # the token only works once the transaction commits
+        after_commit(db, send)
     
     return pr
 
@@ -50,5 +56,5 @@ def confirm_reset(db: Session, *, token: str, new_password: str) -> bool:
         return False
     user.password_hash = get_password_hash(new_password)
     pr.used = True
-    db.commit()
+    db.flush()
     return True
@@ -0,0 +1,238 @@
+"""Product search.
+
+Two pieces:
+
+- ``search_products``: the ``/products?search=`` listing. Uses the ``pg_trgm``
+  GIN index on ``products.name`` (substring + fuzzy match, ranked by
+  similarity) and returns the page and the total in one round trip.
+- ``autocomplete_index``: an in-process, accent-insensitive prefix/trigram
+  index of active products for the product picker. It is rebuilt lazily after
+  any committed product write (and at most every ``product_autocomplete_ttl``
+  seconds, to pick up writes made by other processes/scripts).
+"""
+from __future__ import annotations
+import bisect
+import logging
+import threading
+import time
+import unicodedata
+from itertools import chain
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.category import Category
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+TRGM_INDEX_NAME = "ix_products_name_trgm"
+
+_trgm_available: Optional[bool] = None
+
+
+def ensure_search_index(engine: Engine) -> bool:
+    """Create the pg_trgm extension and the trigram index on products.name.
+
+    Used at startup next to ``create_all`` (the migration does the same). When
+    the extension is not installed on the server, search falls back to ILIKE.
+    """
+    try:
+        with engine.begin() as conn:
+            if not conn.scalar(text("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')")):
+                logger.warning("pg_trgm is not available; product search will use ILIKE")
+                return False
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX_NAME} ON products USING gin (name gin_trgm_ops)"
+            ))
+        return True
+    except Exception as e:
+        logger.warning("Could not set up product trigram index: %s", e)
+        return False
+
+
+def trigram_available(db: Session) -> bool:
+    global _trgm_available
+    if _trgm_available is None:
+        _trgm_available = bool(db.scalar(text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")))
+    return _trgm_available
+
+
+def search_products(
+    db: Session,
+    *,
+    category_id: Optional[int] = None,
+    q: Optional[str] = None,
+    page: int = 1,
+    limit: int = 50,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Return ``(rows, total)`` for a product listing page with a single query.
+
+    With a search term, products whose name contains it or is similar to it
+    (pg_trgm ``%``) are returned, best matches first.
+    """
+    stmt = select(
+        Product.id,
+        Product.name,
+        Product.category_id,
+        Product.unit,
+        Product.price,
+        Product.stock_qty,
+        Product.low_stock_threshold,
+        Product.max_qty_per_order,
+        Product.is_active,
+        Product.version,
+        Category.name.label("category_name"),
+        func.count().over().label("total"),
+    ).join(Category, Product.category_id == Category.id, isouter=True)
+    if category_id is not None:
+        stmt = stmt.where(Product.category_id == category_id)
+    if q:
+        like = f"%{q}%"
+        if trigram_available(db):
+            stmt = stmt.where(or_(Product.name.ilike(like), Product.name.op("%")(q)))
+            stmt = stmt.order_by(func.similarity(Product.name, q).desc(), Product.name)
+        else:
+            stmt = stmt.where(Product.name.ilike(like)).order_by(Product.name)
+    else:
+        stmt = stmt.order_by(Product.name)
+    stmt = stmt.offset((page - 1) * limit).limit(limit)
+
+    rows = db.execute(stmt).mappings().all()
+    if rows:
+        total = rows[0]["total"]
+    elif page > 1:
+        # Page past the end: the window count is not available, count separately
+        total = db.scalar(stmt.with_only_columns(func.count()).order_by(None).offset(None).limit(None)) or 0
+    else:
+        total = 0
+    return [{k: v for k, v in row.items() if k != "total"} for row in rows], total
+
+
+def normalize(value: str) -> str:
+    """Lowercase, strip accents and collapse whitespace ("Pão  Francês" -> "pao frances")."""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def _trigrams(value: str) -> Set[str]:
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AutocompleteIndex:
+    """In-memory suggestion index over active product names."""
+
+    def __init__(self, ttl: int = 300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: List[Dict[str, Any]] = []
+        self._names: List[str] = []
+        self._tokens: List[Tuple[str, int]] = []
+        self._grams: Dict[str, Set[int]] = {}
+        self._built_at = 0.0
+        self._stale = True
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def _needs_rebuild(self) -> bool:
+        return self._stale or time.monotonic() - self._built_at > self.ttl
+
+    def rebuild(self, db: Session) -> None:
+        rows = db.execute(
+            select(Product.id, Product.name, Product.unit, Product.category_id)
+            .where(Product.is_active.is_(True))
+            .order_by(Product.name, Product.id)
+        ).mappings().all()
+        entries = [dict(r) for r in rows]
+        names = [normalize(e["name"]) for e in entries]
+        tokens: List[Tuple[str, int]] = []
+        grams: Dict[str, Set[int]] = {}
+        for idx, name in enumerate(names):
+            for token in set(name.split()):
+                tokens.append((token, idx))
+            for gram in _trigrams(name):
+                grams.setdefault(gram, set()).add(idx)
+        tokens.sort()
+        self._entries, self._names, self._tokens, self._grams = entries, names, tokens, grams
+        self._built_at = time.monotonic()
+
+    def search(self, db: Session, q: str, limit: int = 10) -> List[Dict[str, Any]]:
+        if self._needs_rebuild():
+            with self._lock:
+                if self._needs_rebuild():
+                    # clear the flag first so a write committed during the rebuild marks it stale again
+                    self._stale = False
+                    self.rebuild(db)
+        query = normalize(q)
+        if not query:
+            return []
+        entries, names, tokens, grams = self._entries, self._names, self._tokens, self._grams
+        words = query.split()
+
+        # Prefix match: every query word is the prefix of some word of the name
+        first = words[0]
+        start = bisect.bisect_left(tokens, (first, -1))
+        candidates: Set[int] = set()
+        for token, idx in tokens[start:]:
+            if not token.startswith(first):
+                break
+            candidates.add(idx)
+        matches = [
+            idx for idx in candidates
+            if all(any(t.startswith(w) for t in names[idx].split()) for w in words[1:])
+        ]
+        # Names starting with the query first, then alphabetical (entries are sorted by name)
+        matches.sort(key=lambda idx: (not names[idx].startswith(query), idx))
+        result = matches[:limit]
+
+        # Not enough: complete with trigram (typo tolerant) matches
+        if len(result) < limit:
+            query_grams = _trigrams(query)
+            scores: Dict[int, int] = {}
+            for gram in query_grams:
+                for idx in grams.get(gram, ()):
+                    scores[idx] = scores.get(idx, 0) + 1
+            seen = set(result)
+            fuzzy = sorted(
+                (idx for idx, score in scores.items()
+                 if idx not in seen and score / len(query_grams) >= 0.4),
+                key=lambda idx: (-scores[idx], idx),
+            )
+            result += fuzzy[:limit - len(result)]
+
+        return [entries[idx] for idx in result]
+
+
+autocomplete_index = AutocompleteIndex(ttl=settings.product_autocomplete_ttl)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_product_writes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, Product) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["product_index_stale"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_product_bulk_writes(orm_execute_state) -> None:
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ is Product:
+            orm_execute_state.session.info["product_index_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_after_commit(session: Session) -> None:
+    if session.info.pop("product_index_stale", False):
+        autocomplete_index.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("product_index_stale", None)
@@ -1,73 +1,45 @@
 from __future__ import annotations
-from typing import List, Optional, Dict, Any
+from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
 
+from app.db.writes import save
 from app.models.product import Product
-from app.models.category import Category
-
-
-def list_products(
-    db: Session,
-    *,
-    category_id: Optional[int] = None,
-    q: Optional[str] = None,
-    page: int = 1,
-    limit: int = 50,
-) -> List[Dict[str, Any]]:
-    stmt = select(
-        Product.id,
-        Product.name,
-        Product.category_id,
-        Product.unit,
-        Product.price,
-        Product.stock_qty,
-        Product.low_stock_threshold,
-        Product.is_active,
-        Category.name.label("category_name")
-    ).join(Category, Product.category_id == Category.id, isouter=True)
-    if category_id is not None:
-        stmt = stmt.where(Product.category_id == category_id)
-    if q:
-        like = f"%{q}%"
-        stmt = stmt.where(Product.name.ilike(like))
-    stmt = stmt.order_by(Product.name)
-    stmt = stmt.offset((page - 1) * limit).limit(limit)
-    result = db.execute(stmt).mappings().all()
-    return result
-def count_products(
-    db: Session,
-    *,
-    category_id: Optional[int] = None,
-    q: Optional[str] = None,
-) -> int:
-    stmt = select(func.count()).select_from(Product)
-    if category_id is not None:
-        stmt = stmt.where(Product.category_id == category_id)
-    if q:
-        like = f"%{q}%"
-        stmt = stmt.where(Product.name.ilike(like))
-    return db.scalar(stmt) or 0
+from app.models.stock_movement import MovementType
+from app.services.stock import add_movement
 
 
 def get_product(db: Session, product_id: int) -> Optional[Product]:
     return db.get(Product, product_id)
 
 
+def _adjust_stock(db: Session, product: Product, stock_qty: int, note: str) -> None:
+    """Bring the product stock to ``stock_qty`` through a movement, so the ledger has it."""
+    delta = stock_qty - (product.stock_qty or 0)
+    if delta:
+        add_movement(
+            db,
+            product_id=product.id,
+            type=MovementType.ENTRADA if delta > 0 else MovementType.SAIDA_MANUAL,
+            qty=abs(delta),
+            note=note,
+        )
+
+
 def create_product(db: Session, **kwargs) -> Product:
-    prod = Product(**kwargs)
-    db.add(prod)
-    db.commit()
-    db.refresh(prod)
-    return prod
+    stock_qty = kwargs.pop("stock_qty", None) or 0
+    product = save(db, Product(stock_qty=0, **kwargs))
+    _adjust_stock(db, product, stock_qty, "Estoque inicial")
+    return product
 
 
 def update_product(db: Session, product: Product, **kwargs) -> Product:
+    stock_qty = kwargs.pop("stock_qty", None)
     for k, v in kwargs.items():
         if v is not None:
             setattr(product, k, v)
-    db.commit()
-    db.refresh(product)
+    db.flush()
+    if stock_qty is not None:
+        _adjust_stock(db, product, stock_qty, "Ajuste manual no cadastro do produto")
     return product
 
 
@@ -80,7 +52,7 @@ def delete_product(db: Session, product: Product) -> None:
             detail=f"Cannot delete product '{product.name}' because it is used in {len(product.order_items)} order(s)"
         )
     db.delete(product)
-    db.commit()
+    db.flush()
 
 
 def duplicate_product(db: Session, source: Product) -> Product:
@@ -93,7 +65,4 @@ def duplicate_product(db: Session, source: Product) -> Product:
         low_stock_threshold=source.low_stock_threshold,
         is_active=source.is_active,
     )
-    db.add(dup)
-    db.commit()
-    db.refresh(dup)
-    return dup
+    return save(db, dup)
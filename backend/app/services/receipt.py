@@ -9,12 +9,15 @@ import os
 from reportlab.lib.utils import ImageReader
 from typing import List
 
+from app.core.metrics import receipts_rendered, render_duration
 from app.models.order import Order
 from app.models.product import Product
 
 
+@render_duration.time("receipt_pdf")
 def generate_order_receipt_pdf(db: Session, order: Order) -> bytes:
     """Generate a PDF receipt with TWO copies: one for ADM and one for the buyer/requester."""
+    receipts_rendered.inc()
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=A4)
     width, height = A4
@@ -212,8 +215,10 @@ def generate_order_receipt_pdf(db: Session, order: Order) -> bytes:
     return pdf
 
 
+@render_duration.time("batch_receipts_pdf")
 def generate_batch_receipts_pdf(db: Session, orders: List[Order]) -> bytes:
     """Generate a consolidated PDF with receipts for multiple orders (2 copies each)."""
+    receipts_rendered.inc(len(orders))
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=A4)
     width, height = A4
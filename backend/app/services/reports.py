@@ -4,6 +4,8 @@ from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import select, func, and_, or_, desc, case, text
 
+from app.core.metrics import render_duration
+from app.db.query_stats import fetch_limited
 from app.models.product import Product
 from app.models.category import Category
 from app.models.stock_movement import StockMovement, MovementType
@@ -61,13 +63,18 @@ def get_stock_movement_report(
     if conditions:
         query = query.where(and_(*conditions))
 
-    result = db.execute(query).fetchall()
+    result = fetch_limited(db, query)
 
     # Calculate summary
     summary_query = select(
         func.sum(case((StockMovement.type == MovementType.ENTRADA, StockMovement.qty), else_=0)).label('entries'),
         func.sum(case((StockMovement.type == MovementType.SAIDA_MANUAL, StockMovement.qty), else_=0)).label('manual_exits'),
-        func.sum(case((StockMovement.type == MovementType.SAIDA_PEDIDO, StockMovement.qty), else_=0)).label('order_exits'),
+        # saídas de pedido líquidas: ESTORNO devolve parte delas
+        func.sum(case(
+            (StockMovement.type == MovementType.SAIDA_PEDIDO, StockMovement.qty),
+            (StockMovement.type == MovementType.ESTORNO, -StockMovement.qty),
+            else_=0,
+        )).label('order_exits'),
         func.sum(case((StockMovement.type == MovementType.PERDA, StockMovement.qty), else_=0)).label('losses')
     )
 
@@ -136,7 +143,7 @@ def get_order_report(
     if conditions:
         query = query.where(and_(*conditions))
 
-    orders_result = db.execute(query).fetchall()
+    orders_result = fetch_limited(db, query)
 
     # Summary
     summary_query = select(
@@ -206,7 +213,7 @@ def get_product_report(db: Session) -> ProductReport:
         func.count(StockMovement.id).label('movement_count')
     ).select_from(Product).outerjoin(Category, Product.category_id == Category.id).outerjoin(StockMovement, Product.id == StockMovement.product_id).group_by(Product.id, Product.name, Category.name, Product.stock_qty, Product.low_stock_threshold)
 
-    result = db.execute(query).fetchall()
+    result = fetch_limited(db, query)
 
     products = []
     low_stock_count = 0
@@ -254,7 +261,7 @@ def get_church_report(db: Session) -> ChurchReport:
         func.avg(OrderItem.qty).label('avg_order_size')
     ).select_from(Church).outerjoin(Order, Church.id == Order.church_id).outerjoin(OrderItem, Order.id == OrderItem.order_id).group_by(Church.id, Church.name)
 
-    result = db.execute(query).fetchall()
+    result = fetch_limited(db, query)
 
     churches = []
     active_count = 0
@@ -381,7 +388,7 @@ def get_user_orders_report(db: Session, church_id: int) -> UserOrderReport:
         func.sum(OrderItem.qty).label('total_quantity')
     ).select_from(Order).outerjoin(OrderItem, Order.id == OrderItem.order_id).where(Order.church_id == church_id).group_by(Order.id, Order.created_at, Order.status).order_by(desc(Order.created_at))
 
-    result = db.execute(query).fetchall()
+    result = fetch_limited(db, query)
 
     orders = []
     pending_count = 0
@@ -425,7 +432,7 @@ def get_user_product_catalog(db: Session) -> UserProductCatalog:
         Product.stock_qty
     ).select_from(Product).outerjoin(Category, Product.category_id == Category.id).where(Product.stock_qty > 0).order_by(Category.name, Product.name)
 
-    result = db.execute(query).fetchall()
+    result = fetch_limited(db, query)
 
     products = [
         UserProductCatalogItem(
@@ -443,7 +450,12 @@ def get_user_product_catalog(db: Session) -> UserProductCatalog:
 
 
 def get_user_movements_report(db: Session, church_id: int) -> UserMovementReport:
-    """Relatório de movimentações relacionadas aos pedidos da igreja"""
+    """Relatório de movimentações relacionadas aos pedidos da igreja
+
+    Inclui os estornos (pedido cancelado ou quantidade reduzida): as saídas
+    dos pedidos ficam no histórico, então sem eles a igreja veria saídas que
+    voltaram ao estoque.
+    """
 
     query = select(
         StockMovement.id,
@@ -457,11 +469,11 @@ def get_user_movements_report(db: Session, church_id: int) -> UserMovementReport
             StockMovement.related_order_id.in_(
                 select(Order.id).where(Order.church_id == church_id)
             ),
-            StockMovement.type == MovementType.SAIDA_PEDIDO
+            StockMovement.type.in_([MovementType.SAIDA_PEDIDO, MovementType.ESTORNO])
         )
     ).order_by(desc(StockMovement.created_at))
 
-    result = db.execute(query).fetchall()
+    result = fetch_limited(db, query)
 
     movements = [
         UserMovementReportItem(
@@ -480,6 +492,7 @@ def get_user_movements_report(db: Session, church_id: int) -> UserMovementReport
     )
 
 
+@render_duration.time("orders_excel")
 def generate_orders_excel(
     db: Session,
     start_date: Optional[datetime] = None,
@@ -528,7 +541,7 @@ def generate_orders_excel(
     if conditions:
         query = query.where(and_(*conditions))
     
-    result = db.execute(query).fetchall()
+    result = fetch_limited(db, query)
     
     # Criar workbook
     wb = Workbook()
@@ -1,18 +1,75 @@
 from __future__ import annotations
-from datetime import datetime
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, func
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Mapping, Optional
+from sqlalchemy.orm import Session, lazyload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import select, and_, case, func, update
 
+from app.db.writes import save, update_returning
 from app.models.product import Product
 from app.models.stock_movement import StockMovement, MovementType
 
 
-def apply_stock_change(db: Session, product: Product, qty: int) -> None:
-    new_qty = (product.stock_qty or 0) + qty
-    if new_qty < 0:
+def apply_stock_change(db: Session, product: Product, qty: int, **values) -> None:
+    """Add qty to the product stock in the database (with other column ``values``).
+
+    The sum is computed by the UPDATE, so concurrent movements of the same
+    product add up instead of overwriting each other; ``product`` is updated
+    from RETURNING.
+    """
+    new_qty = func.coalesce(Product.stock_qty, 0) + qty
+    if update_returning(db, product, {"stock_qty": new_qty, **values}, new_qty >= 0) is None:
         raise ValueError("Insufficient stock")
-    product.stock_qty = new_qty
+
+
+def lock_products(db: Session, product_ids: Iterable[int]) -> Dict[int, Product]:
+    """Load and lock (FOR UPDATE, in id order) the given products.
+
+    Callers locking overlapping sets take the rows in the same order, and the
+    other stock writers (``apply_stock_change``) hold a single product row, so
+    they wait for each other instead of deadlocking. Nothing else may be
+    locked between this and the stock UPDATE: the catalog version it stamps
+    takes no lock (app.models.catalog).
+    """
+    ids = sorted(set(product_ids))
+    if not ids:
+        return {}
+    stmt = (
+        select(Product)
+        .options(lazyload(Product.order_items))
+        .where(Product.id.in_(ids))
+        .order_by(Product.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return {p.id: p for p in db.scalars(stmt)}
+
+
+def apply_stock_changes(db: Session, products: Mapping[int, Product], deltas: Mapping[int, int]) -> None:
+    """Add ``deltas[product_id]`` to the stock of several products in one UPDATE.
+
+    ``products`` are the rows locked by ``lock_products``: the guard (no stock
+    goes negative) is checked on them before anything is written, and they
+    are updated from RETURNING.
+    """
+    deltas = {pid: delta for pid, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    for pid, delta in deltas.items():
+        if (products[pid].stock_qty or 0) + delta < 0:
+            raise ValueError("Insufficient stock")
+    rows = db.execute(
+        update(Product)
+        .where(Product.id.in_(deltas))
+        .values(stock_qty=func.coalesce(Product.stock_qty, 0) + case(deltas, value=Product.id))
+        .returning(Product.id, Product.stock_qty, Product.version, Product.catalog_version)
+        .execution_options(synchronize_session=False)
+    )
+    for pid, stock_qty, version, catalog_version in rows:
+        product = products[pid]
+        set_committed_value(product, "stock_qty", stock_qty)
+        set_committed_value(product, "version", version)
+        set_committed_value(product, "catalog_version", catalog_version)
 
 
 def add_movement(
@@ -26,24 +83,24 @@ def add_movement(
     unit_price: Optional[float] = None,  # Novo: preço unitário para atualizar produto
     invoice_number: Optional[str] = None,  # Número da nota fiscal
     invoice_date: Optional[datetime] = None,  # Data da nota fiscal
-    commit: bool = True,  # Se False, não faz commit (para uso em batch)
 ) -> StockMovement:
     if qty <= 0:
         raise ValueError("qty must be > 0")
-    product = db.get(Product, product_id)
+    product = db.get(Product, product_id, options=[lazyload(Product.order_items)])
     if not product:
         raise ValueError("Product not found")
 
-    delta = qty if type == MovementType.ENTRADA else -qty
-    apply_stock_change(db, product, delta)
-    
-    # Se for ENTRADA e informou novo preço, atualizar preço do produto e recalcular pedidos abertos
+    delta = type.sign * qty
+    # Se for ENTRADA e informou novo preço, o preço do produto muda no mesmo UPDATE do estoque
+    new_price = None
     if type == MovementType.ENTRADA and unit_price is not None and unit_price > 0:
         from decimal import Decimal
-        old_price = product.price
         new_price = Decimal(str(unit_price))
-        product.price = new_price
-        
+        apply_stock_change(db, product, delta, price=new_price)
+    else:
+        apply_stock_change(db, product, delta)
+    
+    if new_price is not None:
         # Recalcular pedidos PENDENTES e APROVADOS (não ENTREGUE)
         from app.models.order import Order, OrderItem, OrderStatus
         pending_or_approved_orders = db.query(Order).filter(
@@ -65,15 +122,10 @@ def add_movement(
         unit_price=unit_price,
         invoice_number=invoice_number,
         invoice_date=invoice_date,
-        created_at=datetime.utcnow(),
+        created_at=datetime.now(timezone.utc),
     )
-    db.add(mv)
-    if commit:
-        db.commit()
-        db.refresh(mv)
-    else:
-        db.flush()  # Gera o ID sem fazer commit
-    return mv
+    # só flush (gera o ID); o commit é o da requisição
+    return save(db, mv)
 
 
 def list_movements(
@@ -0,0 +1,204 @@
+"""Stock ledger: stock at any instant from snapshots and movements.
+
+``stock_movements`` is append-only. Every change of ``products.stock_qty`` is
+written together with a movement in the same transaction: ``add_movement``,
+order approval, edits and cancellations (SAIDA_PEDIDO / ESTORNO rows instead of
+deleting the order's movements), the initial stock and manual adjustments of
+the product form. Only archiving removes movements, and only months that a
+snapshot already covers.
+
+``stock_snapshots`` holds the stock of a product at ``taken_at``: the sum of
+every movement created before it. The stock at an instant ``at`` is
+
+- the last snapshot at or before ``at`` + the movements in [snapshot, at);
+- before the first snapshot of a product, that snapshot - the movements in
+  [at, snapshot);
+- for a product without snapshots, its movements before ``at``.
+
+``stock_at`` computes it for all products in a single query: two lookups on
+the snapshots primary key and one range scan of
+``ix_stock_movements_product_created`` per product.
+
+- ``take_snapshots`` (daily, ``python -m app.stock_maintenance snapshot``)
+  stores the stock at the start of the day of the products that moved since
+  their last snapshot. The values come from the ledger, not from stock_qty.
+- ``reconcile`` (``python -m app.stock_maintenance reconcile``) compares
+  stock_qty with the ledger.
+- ``ensure_stock_ledger`` writes the opening snapshot, stock_qty at the time
+  the ledger starts. Order cancellations and edits used to delete their
+  movements, so the history before it is approximate.
+"""
+from __future__ import annotations
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import DateTime, and_, bindparam, case, cast, func, literal, or_, select, text, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.product import Product
+from app.models.stock_movement import MovementType, StockMovement
+from app.models.stock_snapshot import StockSnapshot
+
+logger = logging.getLogger(__name__)
+
+# a snapshot is only taken of a past instant: requests still writing
+# movements created before it must have committed
+SNAPSHOT_MARGIN = timedelta(minutes=5)
+
+SIGNED_QTY = case(
+    (StockMovement.type.in_([t for t in MovementType if t.sign > 0]), StockMovement.qty),
+    else_=-StockMovement.qty,
+)
+# after every movement (reconciliation against the current stock)
+END_OF_LEDGER = cast(literal("infinity"), DateTime(timezone=True))
+
+
+def end_of_day(day: date) -> datetime:
+    """The instant (UTC) the stock of ``day`` is read at: the start of the next day."""
+    return datetime.combine(day + timedelta(days=1), time.min, tzinfo=timezone.utc)
+
+
+def stock_at(at: Union[datetime, ColumnElement]) -> Select:
+    """Select of (product_id, name, unit, category_id, qty, snapshot_at, movements) at instant ``at``.
+
+    ``snapshot_at`` is the snapshot the stock started from (None when it was
+    computed back from a later one, or from the movements alone) and
+    ``movements`` the number of movements applied to it.
+    """
+    if isinstance(at, datetime):
+        at = literal(at, DateTime(timezone=True))
+    prev = (
+        select(StockSnapshot.taken_at, StockSnapshot.qty)
+        .where(StockSnapshot.product_id == Product.id, StockSnapshot.taken_at <= at)
+        .order_by(StockSnapshot.taken_at.desc())
+        .limit(1)
+        .lateral("prev")
+    )
+    after = (
+        select(StockSnapshot.taken_at, StockSnapshot.qty)
+        .where(StockSnapshot.product_id == Product.id, StockSnapshot.taken_at > at)
+        .order_by(StockSnapshot.taken_at)
+        .limit(1)
+        .lateral("after")
+    )
+    backward = and_(prev.c.taken_at.is_(None), after.c.taken_at.isnot(None))
+    lower = case(
+        (prev.c.taken_at.isnot(None), prev.c.taken_at),
+        (after.c.taken_at.isnot(None), at),
+        else_=cast(literal("-infinity"), DateTime(timezone=True)),
+    )
+    upper = case((backward, after.c.taken_at), else_=at)
+    moved = (
+        select(func.coalesce(func.sum(SIGNED_QTY), 0).label("delta"), func.count().label("movements"))
+        .where(
+            StockMovement.product_id == Product.id,
+            StockMovement.created_at >= lower,
+            StockMovement.created_at < upper,
+        )
+        .lateral("moved")
+    )
+    qty = func.coalesce(prev.c.qty, after.c.qty, 0) + case((backward, -moved.c.delta), else_=moved.c.delta)
+    return (
+        select(
+            Product.id.label("product_id"),
+            Product.name,
+            Product.unit,
+            Product.category_id,
+            qty.label("qty"),
+            prev.c.taken_at.label("snapshot_at"),
+            moved.c.movements,
+        )
+        .select_from(Product)
+        .outerjoin(prev, true())
+        .outerjoin(after, true())
+        .join(moved, true())
+        # products created after ``at`` did not exist yet
+        .where(or_(Product.created_at.is_(None), Product.created_at < at))
+    )
+
+
+def stock_as_of(
+    db: Session,
+    at: datetime,
+    *,
+    product_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Stock of every product (or one product / category) at instant ``at``, by name."""
+    stmt = stock_at(at).order_by(Product.name)
+    if product_id is not None:
+        stmt = stmt.where(Product.id == product_id)
+    if category_id is not None:
+        stmt = stmt.where(Product.category_id == category_id)
+    return [
+        {"product_id": r.product_id, "name": r.name, "unit": r.unit, "category_id": r.category_id, "qty": r.qty}
+        for r in db.execute(stmt)
+    ]
+
+
+def snapshot_horizon(conn: Connection) -> Optional[datetime]:
+    """Latest snapshot instant: every movement created before it is covered by a snapshot."""
+    return conn.scalar(select(func.max(StockSnapshot.taken_at)))
+
+
+def take_snapshots(engine: Engine, at: Optional[datetime] = None, now: Optional[datetime] = None) -> int:
+    """Snapshot, at ``at`` (default: start of the current UTC day), the products that moved since their last one."""
+    now = now or datetime.now(timezone.utc)
+    at = at or datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+    if at > now - SNAPSHOT_MARGIN:
+        raise ValueError(f"snapshots are taken at least {SNAPSHOT_MARGIN} in the past")
+    stock = stock_at(at).subquery()
+    stmt = (
+        insert(StockSnapshot)
+        .from_select(
+            ["product_id", "taken_at", "qty"],
+            select(stock.c.product_id, literal(at, DateTime(timezone=True)), stock.c.qty)
+            .where(or_(stock.c.snapshot_at.is_(None), stock.c.movements > 0)),
+        )
+        .on_conflict_do_nothing()
+    )
+    with engine.begin() as conn:
+        return conn.execute(stmt).rowcount
+
+
+def reconcile(engine: Engine) -> List[Dict[str, Any]]:
+    """Products whose stock_qty differs from the ledger (last snapshot + movements since)."""
+    ledger = stock_at(END_OF_LEDGER).subquery()
+    stmt = (
+        select(ledger.c.product_id, ledger.c.name, Product.stock_qty, ledger.c.qty.label("ledger_qty"))
+        .join(Product, Product.id == ledger.c.product_id)
+        .where(func.coalesce(Product.stock_qty, 0) != ledger.c.qty)
+        .order_by(ledger.c.product_id)
+    )
+    # one statement: stock_qty and the movements come from the same database snapshot
+    with engine.connect() as conn:
+        return [dict(r._mapping) for r in conn.execute(stmt)]
+
+
+def create_opening_snapshot(conn: Connection, at: Optional[datetime] = None) -> int:
+    """Snapshot of the current stock_qty of the products that have none yet.
+
+    Stamped with the clock of the movements (aware UTC from Python), not the
+    server's now().
+    """
+    return conn.execute(text("""
+        INSERT INTO stock_snapshots (product_id, taken_at, qty)
+        SELECT p.id, :at, coalesce(p.stock_qty, 0) FROM products p
+        WHERE NOT EXISTS (SELECT 1 FROM stock_snapshots s WHERE s.product_id = p.id)
+    """).bindparams(bindparam("at", at or datetime.now(timezone.utc), DateTime(timezone=True)))).rowcount
+
+
+def ensure_stock_ledger(engine: Engine) -> None:
+    """The opening snapshot, when the ledger has none (no-op afterwards).
+
+    Products created later have their whole history in the ledger and need
+    no opening snapshot.
+    """
+    with engine.begin() as conn:
+        if conn.scalar(text("SELECT NOT EXISTS (SELECT 1 FROM stock_snapshots)")):
+            logger.info("stock ledger: %d opening snapshots", create_opening_snapshot(conn))
@@ -4,8 +4,8 @@ from botocore.exceptions import ClientError
 from app.core.config import settings
 
 
-def get_s3_client():
-    """Get configured S3 client."""
+def get_s3_client(config=None):
+    """Get configured S3 client (``config``: optional botocore Config, e.g. timeouts)."""
     if not settings.aws_access_key_id or not settings.aws_secret_access_key:
         raise ValueError("AWS credentials not configured")
     
@@ -13,7 +13,8 @@ def get_s3_client():
         's3',
         aws_access_key_id=settings.aws_access_key_id,
         aws_secret_access_key=settings.aws_secret_access_key,
-        region_name=settings.aws_s3_region
+        region_name=settings.aws_s3_region,
+        config=config
     )
 
 
@@ -54,6 +55,27 @@ def upload_file_to_s3(file_content: bytes, filename: str, content_type: str = No
         raise Exception(f"Failed to upload to S3: {e}")
 
 
+def upload_fileobj_to_s3(fileobj, filename: str, content_type: str = None) -> str:
+    """
+    Upload a file object to S3 without reading it into memory (multipart for large files).
+    
+    Returns:
+        The S3 key (filename) on success
+    """
+    client = get_s3_client()
+    bucket = settings.aws_s3_bucket
+    
+    if not bucket:
+        raise ValueError("S3 bucket not configured")
+    
+    extra_args = {'ContentType': content_type} if content_type else None
+    try:
+        client.upload_fileobj(fileobj, bucket, filename, ExtraArgs=extra_args)
+        return filename
+    except ClientError as e:
+        raise Exception(f"Failed to upload to S3: {e}")
+
+
 def download_file_from_s3(filename: str) -> bytes:
     """
     Download a file from S3.
@@ -41,8 +41,7 @@ def create_user(
         churches = list(db.scalars(select(Church).where(Church.id.in_(church_ids))))
         # assign the relationship explicitly
         user.churches = churches
-    db.commit()
-    db.refresh(user)
+    db.flush()
     return user
 
 
@@ -71,18 +70,16 @@ def update_user(
         churches = list(db.scalars(select(Church).where(Church.id.in_(church_ids))))
         # clear existing associations and set new ones
         user.churches = churches
-    db.commit()
-    db.refresh(user)
+    db.flush()
     return user
 
 
 def delete_user(db: Session, user: User) -> None:
     db.delete(user)
-    db.commit()
+    db.flush()
 
 
 def toggle_active(db: Session, user: User) -> User:
     user.is_active = not user.is_active
-    db.commit()
-    db.refresh(user)
+    db.flush()
     return user
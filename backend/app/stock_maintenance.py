@@ -0,0 +1,39 @@
+from __future__ import annotations
+import argparse
+from datetime import date, datetime, time, timezone
+
+from app.db.session import engine
+from app.services import stock_ledger
+
+
+def run_snapshot(day: date | None) -> None:
+    at = datetime.combine(day, time.min, tzinfo=timezone.utc) if day else None
+    print(f"snapshots taken: {stock_ledger.take_snapshots(engine, at)}")
+
+
+def run_reconcile() -> None:
+    drift = stock_ledger.reconcile(engine)
+    for row in drift:
+        print(f"#{row['product_id']:<6} {row['name']:<40} stock_qty={row['stock_qty']:<8} ledger={row['ledger_qty']}")
+    if drift:
+        print(f"{len(drift)} product(s) differ from the ledger")
+        raise SystemExit(1)
+    print("stock_qty matches the ledger")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="stock ledger snapshots and reconciliation")
+    sub = parser.add_subparsers(dest="command", required=True)
+    snapshot = sub.add_parser("snapshot", help="snapshot the stock of the products that moved (run daily)")
+    snapshot.add_argument("--day", type=date.fromisoformat, help="snapshot at the start of this day (YYYY-MM-DD, default today)")
+    sub.add_parser("reconcile", help="compare products.stock_qty with snapshots + movements")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        run_snapshot(args.day)
+    else:
+        run_reconcile()
+
+
+if __name__ == "__main__":
+    main()
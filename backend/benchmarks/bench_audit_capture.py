@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Custo da captura de alterações por coluna do audit_operation.
+
+Mede update_product (uma coluna alterada) e update_order (a quantidade de
+todos os itens muda: N updates de order_items) sem decorator e com audit_update. O
+decorator lê o histórico dos atributos no flush que o service já faz; a
+diferença entre os dois caminhos é o custo da captura, e o número de
+comandos SQL por chamada tem que ser o mesmo nos dois.
+
+Cada chamada termina com o commit da requisição, quando a entrada vai para o
+AuditWriter. A gravação do audit_log em lote roda fora da requisição; aqui as
+entradas montadas são apenas coletadas. Tudo roda dentro de uma transação
+desfeita no final: nenhum dado fica no banco.
+
+Uso: DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_audit_capture.py [--rounds 5 --calls 200]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, event, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.models.audit_log import AuditResource  # noqa: E402
+from app.models.church import Church  # noqa: E402
+from app.models.order import Order  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.order import OrderItemCreate, OrderUpdate  # noqa: E402
+from app.services.audit_decorators import audit_update  # noqa: E402
+from app.services.audit_writer import audit_writer  # noqa: E402
+from app.services.orders import create_order, update_order  # noqa: E402
+from app.services.products import update_product  # noqa: E402
+
+
+def product_call(fn):
+    def call(db: Session, target: Product, i: int) -> None:
+        fn(db, target, low_stock_threshold=i % 7)
+        db.commit()
+    return call
+
+
+def order_call(fn):
+    def call(db: Session, target: Order, i: int) -> None:
+        items = [OrderItemCreate(product_id=it.product_id, qty=1 + i % 2) for it in target.items]
+        fn(db, order=target, data=OrderUpdate(items=items))
+        db.commit()
+    return call
+
+
+def measure(db: Session, call, target, calls: int):
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        t0 = time.perf_counter()
+        for i in range(calls):
+            call(db, target, i)
+        elapsed = time.perf_counter() - t0
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    return elapsed / calls * 1e6, len(statements) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("DATABASE_URL must be set")
+    engine = create_engine(url)
+
+    captured = []
+    audit_writer.record = captured.append
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        # commits viram savepoints; o rollback externo limpa tudo
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            products = db.scalars(
+                select(Product).where(Product.is_active == True, Product.stock_qty >= 1)  # noqa: E712
+                .order_by(Product.id).limit(5)
+            ).all()
+            church_id = db.scalar(select(Church.id).order_by(Church.id).limit(1))
+            user_id = db.scalar(select(User.id).order_by(User.id).limit(1))
+            if not products or church_id is None or user_id is None:
+                raise SystemExit("São necessários produtos com estoque, uma igreja e um usuário (rode o seed).")
+            product = products[0]
+            order = create_order(db, requester_id=user_id, church_id=church_id, items=[(p.id, 1) for p in products])
+            cases = [
+                ("update_product", product, product_call(update_product),
+                 product_call(audit_update(AuditResource.PRODUCT)(update_product))),
+                (f"update_order ({len(order.items)} itens)", order, order_call(update_order),
+                 order_call(audit_update(AuditResource.ORDER)(update_order))),
+            ]
+            for label, target, plain, audited in cases:
+                # aquecimento
+                measure(db, plain, target, 10)
+                measure(db, audited, target, 10)
+                best = {"plain": (float("inf"), 0.0), "audited": (float("inf"), 0.0)}
+                for _ in range(args.rounds):
+                    for key, call in (("plain", plain), ("audited", audited)):
+                        result = measure(db, call, target, args.calls)
+                        best[key] = min(best[key], result)
+                (t_plain, q_plain), (t_audit, q_audit) = best["plain"], best["audited"]
+                print(f"{label:<26} sem auditoria {t_plain:>8.0f} µs/chamada ({q_plain:.1f} SQL)   "
+                      f"audit_update {t_audit:>8.0f} µs/chamada ({q_audit:.1f} SQL)   "
+                      f"overhead {(t_audit / t_plain - 1) * 100:+.1f}%")
+                if q_plain != q_audit:
+                    raise SystemExit("A captura emitiu comandos SQL a mais!")
+            sample = captured[-1]
+            print(f"{len(captured)} entradas capturadas; última: old={sample['old_values']} "
+                  f"related={len(sample['extra_metadata'].get('related', []))}")
+        finally:
+            db.close()
+            trans.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark da criação de inventário com 10k e 100k produtos.
+
+Compara o caminho antigo (carrega todos os Product + um InventoryItem ORM por
+produto + leitura de item.product.name) com o caminho atual
+(INSERT ... SELECT + uma consulta com JOIN para montar a resposta).
+
+Tudo roda dentro de uma transação que é desfeita no final: nenhum dado fica
+no banco.
+
+Uso: DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_inventory_create.py [--sizes 10000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, select, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.models.inventory import InventoryCount, InventoryItem, InventoryStatus  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.inventory import InventoryCreate  # noqa: E402
+from app.services import inventory as inventory_service  # noqa: E402
+
+
+def seed_products(db: Session, n: int) -> None:
+    db.execute(
+        text(
+            """
+            INSERT INTO products (name, unit, price, stock_qty, low_stock_threshold, is_active, created_at)
+            SELECT 'Bench produto ' || g, 'UN', 1.00, g % 200, 0, true, now()
+            FROM generate_series(1, :n) g
+            """
+        ),
+        {"n": n},
+    )
+    db.flush()
+
+
+def legacy_create(db: Session, user_id: int) -> int:
+    """Implementação anterior de create_inventory + montagem da resposta na rota."""
+    products = db.scalars(select(Product)).all()
+    inventory = InventoryCount(created_by_id=user_id, status=InventoryStatus.EM_ANDAMENTO, notes="bench")
+    db.add(inventory)
+    db.flush()
+    for product in products:
+        db.add(
+            InventoryItem(
+                inventory_id=inventory.id,
+                product_id=product.id,
+                expected_qty=product.stock_qty,
+                counted_qty=None,
+                difference=None,
+                adjusted=False,
+            )
+        )
+    db.flush()
+    items = db.scalars(select(InventoryItem).where(InventoryItem.inventory_id == inventory.id)).all()
+    return len([item.product.name if item.product else None for item in items])
+
+
+def bulk_create(db: Session, user_id: int) -> int:
+    inventory = inventory_service.create_inventory(db, user_id, InventoryCreate(notes="bench"))
+    return len(inventory_service.list_inventory_items(db, inventory.id))
+
+
+def run(engine, size: int, fn, label: str) -> None:
+    with engine.connect() as conn:
+        trans = conn.begin()
+        # o rollback externo limpa tudo
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            user_id = db.scalar(select(User.id).order_by(User.id).limit(1))
+            if user_id is None:
+                raise SystemExit("É necessário ao menos um usuário (rode o bootstrap do admin).")
+            seed_products(db, size)
+            db.expunge_all()
+            t0 = time.perf_counter()
+            rows = fn(db, user_id)
+            elapsed = time.perf_counter() - t0
+            print(f"{size:>8} produtos  {label:<8} {elapsed * 1000:>10.0f} ms  ({rows} itens)")
+        finally:
+            db.close()
+            trans.rollback()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("DATABASE_URL must be set")
+    engine = create_engine(url)
+
+    for size in args.sizes:
+        run(engine, size, legacy_create, "legado")
+        run(engine, size, bulk_create, "bulk")
+
+
+if __name__ == "__main__":
+    main()
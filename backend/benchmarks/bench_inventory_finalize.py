@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark da finalização de inventário com 10k e 100k produtos.
+
+Compara o caminho antigo (loop em inventory.items com um db.get(Product) e um
+StockMovement ORM por diferença) com o caminho atual (INSERT ... SELECT dos
+movimentos + UPDATE products ... FROM inventory_items). Antes de medir, cada
+cenário confere que os dois caminhos deixam exatamente o mesmo estoque,
+movimentos e flags `adjusted`.
+
+Tudo roda dentro de uma transação que é desfeita no final: nenhum dado fica
+no banco.
+
+Uso: DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_inventory_finalize.py [--sizes 10000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, select, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.models.inventory import InventoryCount, InventoryStatus  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.stock_movement import MovementType, StockMovement  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.inventory import InventoryCreate  # noqa: E402
+from app.services import inventory as inventory_service  # noqa: E402
+
+
+def seed_inventory(db: Session, user_id: int, n: int) -> int:
+    """Cria n produtos e um inventário contado onde ~1/3 dos itens tem diferença."""
+    db.execute(
+        text(
+            """
+            INSERT INTO products (name, unit, price, stock_qty, low_stock_threshold, is_active, created_at)
+            SELECT 'Bench produto ' || g, 'UN', 1.00, g % 200, 0, true, now()
+            FROM generate_series(1, :n) g
+            """
+        ),
+        {"n": n},
+    )
+    inventory = inventory_service.create_inventory(db, user_id, InventoryCreate(notes="bench"))
+    first_id = db.scalar(text("SELECT min(id) FROM inventory_items WHERE inventory_id = :inv"), {"inv": inventory.id})
+    db.execute(
+        text(
+            """
+            UPDATE inventory_items
+            SET counted_qty = greatest(expected_qty + (id - :first) % 3 - 1, 0),
+                difference = greatest(expected_qty + (id - :first) % 3 - 1, 0) - expected_qty
+            WHERE inventory_id = :inv
+            """
+        ),
+        {"inv": inventory.id, "first": first_id},
+    )
+    db.flush()
+    return inventory.id
+
+
+def legacy_finalize(db: Session, inventory_id: int) -> None:
+    """Implementação anterior de finalize_inventory (sem o audit_log)."""
+    inventory = db.get(InventoryCount, inventory_id)
+    uncounted = [item for item in inventory.items if item.counted_qty is None]
+    if uncounted:
+        raise ValueError(f"{len(uncounted)} items not counted yet")
+    for item in inventory.items:
+        if item.difference != 0:
+            movement_type = MovementType.ENTRADA if item.difference > 0 else MovementType.SAIDA_MANUAL
+            qty = abs(item.difference)
+            db.add(StockMovement(product_id=item.product_id, type=movement_type, qty=qty,
+                                 note=f"Ajuste de inventário #{inventory.id}"))
+            product = db.get(Product, item.product_id)
+            if product:
+                if movement_type == MovementType.ENTRADA:
+                    product.stock_qty = (product.stock_qty or 0) + qty
+                else:
+                    product.stock_qty = (product.stock_qty or 0) - qty
+            item.adjusted = True
+    inventory.status = InventoryStatus.FINALIZADO
+    inventory.finalized_at = datetime.utcnow()
+    db.commit()
+
+
+def set_based_finalize(db: Session, inventory_id: int, user_id: int) -> None:
+    inventory_service.finalize_inventory(db, inventory_id, user_id)
+    db.commit()  # o commit da requisição
+
+
+def snapshot(db: Session, inventory_id: int):
+    """Estado resultante comparável entre os dois caminhos."""
+    stock = db.execute(
+        text(
+            """
+            SELECT i.id - min(i.id) OVER (), p.stock_qty, i.adjusted
+            FROM inventory_items i JOIN products p ON p.id = i.product_id
+            WHERE i.inventory_id = :inv ORDER BY i.id
+            """
+        ),
+        {"inv": inventory_id},
+    ).all()
+    movements = db.execute(
+        text(
+            """
+            SELECT count(*), coalesce(sum(CASE WHEN type = 'ENTRADA' THEN qty ELSE -qty END), 0)
+            FROM stock_movements WHERE note = :note
+            """
+        ),
+        {"note": f"Ajuste de inventário #{inventory_id}"},
+    ).one()
+    return stock, tuple(movements)
+
+
+def run(engine, size: int, label: str, user_id: int, legacy: bool):
+    with engine.connect() as conn:
+        trans = conn.begin()
+        # commits viram savepoints; o rollback externo limpa tudo
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            inventory_id = seed_inventory(db, user_id, size)
+            db.expunge_all()
+            t0 = time.perf_counter()
+            if legacy:
+                legacy_finalize(db, inventory_id)
+            else:
+                set_based_finalize(db, inventory_id, user_id)
+            elapsed = time.perf_counter() - t0
+            state = snapshot(db, inventory_id)
+            print(f"{size:>8} produtos  {label:<10} {elapsed * 1000:>10.0f} ms  ({state[1][0]} ajustes)")
+            return state
+        finally:
+            db.close()
+            trans.rollback()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("DATABASE_URL must be set")
+    engine = create_engine(url)
+
+    with Session(engine) as db:
+        user_id = db.scalar(select(User.id).order_by(User.id).limit(1))
+    if user_id is None:
+        raise SystemExit("É necessário ao menos um usuário (rode o bootstrap do admin).")
+
+    for size in args.sizes:
+        before = run(engine, size, "legado", user_id, legacy=True)
+        after = run(engine, size, "set-based", user_id, legacy=False)
+        if before != after:
+            raise SystemExit("Resultados divergentes entre legado e set-based!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark da edição de um pedido APROVADO em que só uma linha muda.
+
+Compara o caminho antigo de update_order (devolve todos os itens ao estoque
+com um db.get por produto, apaga as movimentações do pedido, recria todos os
+order_items e chama add_movement por item) com reconcile_order_items (delta
+por produto, um UPDATE dos produtos travados, movimentações compensatórias e
+só a linha alterada tocada). Mede tempo e comandos SQL por edição.
+
+O caminho antigo descontava do estoque duas vezes ao reaplicar os itens
+(prod.stock_qty em memória e de novo em add_movement), por isso o estoque
+final dos dois não é comparado; o do atual é conferido com o ledger.
+
+Tudo roda dentro de uma transação desfeita no final: nenhum dado fica no banco.
+
+Uso: DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_order_edit.py [--items 10 50 --edits 50]
+"""
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, event, select, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.models.church import Church  # noqa: E402
+from app.models.order import Order, OrderItem  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.stock_movement import MovementType, StockMovement  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.order import OrderItemCreate, OrderUpdate  # noqa: E402
+from app.services.orders import approve_order, create_order, update_order  # noqa: E402
+from app.services.stock import add_movement  # noqa: E402
+
+
+def seed_order(db: Session, n: int) -> Order:
+    """n produtos com estoque folgado e um pedido aprovado com uma linha de cada."""
+    ids = db.scalars(
+        text(
+            """
+            INSERT INTO products (name, unit, price, stock_qty, low_stock_threshold, is_active, created_at)
+            SELECT 'Bench edição ' || g, 'UN', 2.50, 100000, 0, true, now()
+            FROM generate_series(1, :n) g
+            RETURNING id
+            """
+        ),
+        {"n": n},
+    ).all()
+    order = create_order(
+        db,
+        requester_id=db.scalar(select(User.id).order_by(User.id).limit(1)),
+        church_id=db.scalar(select(Church.id).order_by(Church.id).limit(1)),
+        items=[(pid, 1) for pid in ids],
+    )
+    return approve_order(db, order=order)
+
+
+def legacy_update_items(db: Session, order: Order, items) -> None:
+    """Ramo APROVADO da implementação anterior de update_order."""
+    for old_item in order.items:
+        prod = db.get(Product, old_item.product_id)
+        if prod:
+            prod.stock_qty = (prod.stock_qty or 0) + old_item.qty
+    db.query(StockMovement).filter(StockMovement.related_order_id == order.id).delete()
+    prods = {p.id: p for p in db.scalars(select(Product).where(Product.id.in_([it.product_id for it in items])))}
+    new_items = []
+    for it in items:
+        prod = prods[it.product_id]
+        new_items.append(OrderItem(product_id=it.product_id, qty=it.qty, unit_price=prod.price,
+                                   subtotal=prod.price * Decimal(it.qty)))
+    order.items = new_items
+    for it in order.items:
+        prod = db.get(Product, it.product_id)
+        if prod:
+            prod.stock_qty = (prod.stock_qty or 0) - it.qty
+            add_movement(db, product_id=it.product_id, type=MovementType.SAIDA_PEDIDO, qty=it.qty,
+                         note=f"Pedido #{order.id} editado", related_order_id=order.id)
+    db.flush()
+
+
+def ledger_matches(db: Session, order: Order) -> bool:
+    """Saídas menos estornos do pedido = quantidade atual dos itens, por produto."""
+    rows = db.execute(
+        text(
+            """
+            SELECT product_id, sum(CASE WHEN type = 'ESTORNO' THEN -qty ELSE qty END)
+            FROM stock_movements WHERE related_order_id = :o GROUP BY product_id
+            """
+        ),
+        {"o": order.id},
+    ).all()
+    return dict(rows) == {it.product_id: it.qty for it in order.items}
+
+
+def run(engine, n: int, edits: int, label: str, legacy: bool) -> None:
+    with engine.connect() as conn:
+        trans = conn.begin()
+        # commits viram savepoints; o rollback externo limpa tudo
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        try:
+            order = seed_order(db, n)
+            db.commit()
+            event.listen(conn, "before_cursor_execute", listener)
+            t0 = time.perf_counter()
+            for i in range(edits):
+                # a primeira linha alterna entre 1 e 2; as outras ficam iguais
+                items = [OrderItemCreate(product_id=it.product_id, qty=it.qty) for it in order.items]
+                items[0] = OrderItemCreate(product_id=items[0].product_id, qty=2 - i % 2)
+                if legacy:
+                    legacy_update_items(db, order, items)
+                else:
+                    update_order(db, order=order, data=OrderUpdate(items=items), is_admin=True)
+                db.commit()
+            elapsed = time.perf_counter() - t0
+            event.remove(conn, "before_cursor_execute", listener)
+            check = "" if legacy else f"  ledger ok: {ledger_matches(db, order)}"
+            print(f"{n:>5} itens  {label:<10} {elapsed / edits * 1000:>8.2f} ms/edição  "
+                  f"{len(statements) / edits:>6.1f} SQL/edição{check}")
+        finally:
+            db.close()
+            trans.rollback()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--edits", type=int, default=50)
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("DATABASE_URL must be set")
+    engine = create_engine(url)
+
+    with Session(engine) as db:
+        if db.scalar(select(User.id).limit(1)) is None or db.scalar(select(Church.id).limit(1)) is None:
+            raise SystemExit("É necessário ao menos um usuário e uma igreja (rode o seed).")
+
+    for n in args.items:
+        run(engine, n, args.edits, "legado", legacy=True)
+        run(engine, n, args.edits, "delta", legacy=False)
+
+
+if __name__ == "__main__":
+    main()
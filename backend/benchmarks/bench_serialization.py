@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialização das maiores respostas da API.
+
+Compara o caminho padrão do FastAPI (validação do response_model +
+serialização + JSONResponse) com o caminho rápido de
+app.core.serialization (TypeAdapter em cache + dump_json, sem revalidação
+para objetos já montados pelas rotas).
+
+Payloads (tamanhos máximos permitidos pelas rotas):
+  - InventoryRead com 10.000 itens       (GET /inventory/{id})
+  - OrderListResponse com 50 pedidos x 30 itens (GET /orders?limit=50)
+  - List[AuditLogRead] com 1.000 registros (GET /audit?limit=1000)
+
+Uso: python benchmarks/bench_serialization.py [--repeat 20]
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from app.core.serialization import dump_json  # noqa: E402
+from app.schemas.audit import AuditLogRead  # noqa: E402
+from app.schemas.inventory import InventoryRead  # noqa: E402
+from app.schemas.order import OrderListResponse  # noqa: E402
+
+
+NOW = datetime(2025, 12, 10, 16, 42, 15)
+
+
+def build_inventory(items: int = 10_000):
+    """Objeto no formato do ORM (atributos) como a rota recebe do service."""
+    return SimpleNamespace(
+        id=1,
+        created_at=NOW,
+        created_by_id=1,
+        created_by_name="Admin",
+        status="EM_ANDAMENTO",
+        notes="Inventário anual",
+        finalized_at=None,
+        version=1,
+        items=[
+            SimpleNamespace(
+                id=i,
+                inventory_id=1,
+                product_id=i,
+                product_name=f"Produto de limpeza {i}",
+                expected_qty=i % 250,
+                counted_qty=(i % 250) - (i % 3) if i % 2 else None,
+                difference=-(i % 3) if i % 2 else None,
+                adjusted=False,
+            )
+            for i in range(1, items + 1)
+        ],
+    )
+
+
+def build_orders(orders: int = 50, items_per_order: int = 30) -> OrderListResponse:
+    data = []
+    for o in range(1, orders + 1):
+        data.append(
+            SimpleNamespace(
+                id=o,
+                requester_id=2,
+                church_id=o % 40 + 1,
+                church_name=f"Casa de Oração {o}",
+                church_city="Santa Isabel",
+                whatsapp_phone="+5511999999999",
+                status="APROVADO",
+                created_at=NOW - timedelta(days=o),
+                approved_at=NOW,
+                delivered_at=None,
+                signed_by_id=None,
+                signed_at=None,
+                signed_receipt_path=None,
+                version=1,
+                items=[
+                    SimpleNamespace(
+                        id=o * 100 + i,
+                        product_id=i,
+                        product_name=f"Produto {i}",
+                        qty=i % 7 + 1,
+                        unit_price=Decimal("12.90"),
+                        subtotal=Decimal("12.90") * (i % 7 + 1),
+                    )
+                    for i in range(1, items_per_order + 1)
+                ],
+            )
+        )
+    # a rota monta o OrderListResponse antes de retornar
+    return OrderListResponse(data=data, total=orders, page=1, limit=orders)
+
+
+def build_audit(rows: int = 1_000) -> List[AuditLogRead]:
+    return [
+        AuditLogRead(
+            id=i,
+            timestamp=NOW - timedelta(seconds=i),
+            user_id=1,
+            user_name="Admin",
+            action="GET_REQUEST",
+            resource="ORDER",
+            resource_id=None,
+            old_values=None,
+            new_values={"status": "APROVADO", "approved_at": NOW.isoformat()},
+            ip_address="10.0.0.1",
+            user_agent="Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
+            session_id="1",
+            success=True,
+            error_message=None,
+            extra_metadata={
+                "method": "GET",
+                "path": "/orders",
+                "status_code": 200,
+                "query_params": {"page": "1", "limit": "10"},
+            },
+        )
+        for i in range(rows)
+    ]
+
+
+def fastapi_default(schema, content) -> bytes:
+    """Reproduz fastapi.routing.serialize_response + JSONResponse."""
+    field = create_model_field("response", schema, mode="serialization")
+    value, errors = field.validate(content, {}, loc=("response",))
+    assert not errors, errors
+    return JSONResponse(field.serialize(value)).body
+
+
+def timeit(fn, repeat: int) -> float:
+    fn()  # warm-up (cria o validator / adapter em cache)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("InventoryRead (10k itens)", InventoryRead, build_inventory(), False),
+        ("OrderListResponse (50x30)", OrderListResponse, build_orders(), True),
+        ("List[AuditLogRead] (1000)", List[AuditLogRead], build_audit(), True),
+    ]
+
+    print(f"{'payload':<28} {'KiB':>7} {'default ms':>11} {'fast ms':>9} {'speedup':>8}")
+    for name, schema, content, trusted in cases:
+        body_default = fastapi_default(schema, content)
+        body_fast = dump_json(schema, content, trusted=trusted)
+        default_ms = timeit(lambda: fastapi_default(schema, content), args.repeat)
+        fast_ms = timeit(lambda: dump_json(schema, content, trusted=trusted), args.repeat)
+        print(
+            f"{name:<28} {len(body_fast) / 1024:>7.0f} {default_ms:>11.2f} {fast_ms:>9.2f} "
+            f"{default_ms / fast_ms:>7.1f}x"
+        )
+        assert len(body_default) > 0
+
+    # rotas sem response_model (dicts): JSONResponse x ORJSONResponse
+    payload = {"data": [{"month": f"2025-{m:02d}", "count": m * 10} for m in range(1, 13)] * 500}
+    json_ms = timeit(lambda: JSONResponse(payload).body, args.repeat)
+    orjson_ms = timeit(lambda: ORJSONResponse(payload).body, args.repeat)
+    print(f"{'dict 6000 linhas':<28} {'':>7} {json_ms:>11.2f} {orjson_ms:>9.2f} {json_ms / orjson_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
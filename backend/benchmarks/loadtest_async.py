@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Teste de carga dos endpoints de leitura (relatórios, dashboard e listagens).
+
+Cada endpoint recebe `--concurrency` clientes simultâneos durante
+`--duration` segundos; o script imprime throughput, p50, p95 e p99 por
+endpoint. Para comparar as rotas sync (threadpool + psycopg2) com as async
+(asyncpg), rode o mesmo teste contra o servidor antes e depois da mudança,
+com o mesmo banco e o mesmo seed.
+
+Uso:
+    python benchmarks/loadtest_async.py --base http://127.0.0.1:8000 \\
+        [--concurrency 200] [--duration 15] [--json resultado.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/reports/dashboard",
+    "/reports/products",
+    "/reports/churches",
+    "/dash/overview",
+    "/products",
+    "/categories",
+    "/churches",
+    "/stock/movements",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    r = await client.post("/auth/login", json={"username": email, "password": password})
+    r.raise_for_status()
+    return r.json()["access"]
+
+
+async def hammer(client: httpx.AsyncClient, path: str, headers: dict, concurrency: int, duration: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(path, headers=headers)
+                ok = r.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - t0) * 1000)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "mean_ms": round(statistics.fmean(latencies), 1) if latencies else 0.0,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default=os.getenv("API_BASE", "http://127.0.0.1:8000"))
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15.0, help="segundos por endpoint")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base, limits=limits, timeout=60.0) as client:
+        token = await login(
+            client,
+            os.getenv("ADMIN_EMAIL", "admin@example.com"),
+            os.getenv("ADMIN_PASSWORD", "changeme"),
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+
+        results = []
+        print(f"{'endpoint':<24} {'req':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for path in args.paths:
+            # aquecimento: abre conexões do pool antes de medir
+            await client.get(path, headers=headers)
+            res = await hammer(client, path, headers, args.concurrency, args.duration)
+            results.append(res)
+            print(
+                f"{path:<24} {res['requests']:>7} {res['errors']:>5} {res['rps']:>8} "
+                f"{res['p50_ms']:>7}ms {res['p95_ms']:>7}ms {res['p99_ms']:>7}ms"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"base": args.base, "concurrency": args.concurrency, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
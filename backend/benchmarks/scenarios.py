@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Cenários de carga sobre a massa gerada por benchmarks/seed.py.
+
+- lifecycle: usuário cria o pedido -> ADM aprova -> ADM entrega -> usuário
+  baixa o recibo em PDF (o ciclo de vida real de um pedido);
+- dashboard: polling dos painéis (ADM: /dash/overview e /reports/dashboard;
+  usuário: /dash/user-overview e /reports/my-orders);
+- reports: relatórios e exportações do ADM (pedidos, Excel, movimentos,
+  produtos, igrejas) dos últimos `--report-days` dias.
+
+Cada cenário roda com `--concurrency` clientes durante `--duration` segundos.
+Para cada passo saem throughput, p50/p95/p99 e consultas SQL por requisição;
+as consultas vêm do cabeçalho X-DB-Queries, então suba o servidor com
+DEBUG=true (sem ele o campo fica null).
+
+`--json` grava os resultados (com commit e parâmetros) para acompanhar
+regressões entre versões; `--compare base.json` compara com uma execução
+anterior e sai com código 1 se algum passo piorou além de `--tolerance`.
+
+Uso:
+    DATABASE_URL=... python benchmarks/seed.py
+    DEBUG=true uvicorn app.main:app &
+    python benchmarks/scenarios.py --base http://127.0.0.1:8000 \\
+        [--scenarios lifecycle dashboard reports] [--concurrency 20] [--duration 30] \\
+        [--json benchmarks/results/atual.json] [--compare benchmarks/results/base.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+from loadtest_async import login, percentile
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCENARIOS = ("lifecycle", "dashboard", "reports")
+
+
+class Recorder:
+    """Latências, erros e consultas SQL por passo de um cenário."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.flows = 0
+
+    async def call(self, client, step, method, url, headers, expected=200, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            r = await client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            self.errors[step] += 1
+            return None
+        if r.status_code != expected:
+            self.errors[step] += 1
+            return r
+        self.latencies[step].append((time.perf_counter() - t0) * 1000)
+        if "x-db-queries" in r.headers:
+            self.queries[step].append(int(r.headers["x-db-queries"]))
+        return r
+
+    def summary(self, elapsed):
+        steps = {}
+        for step in sorted(set(self.latencies) | set(self.errors)):
+            lat = self.latencies[step]
+            queries = self.queries[step]
+            steps[step] = {
+                "requests": len(lat),
+                "errors": self.errors[step],
+                "rps": round(len(lat) / elapsed, 1),
+                "p50_ms": round(percentile(lat, 50), 1),
+                "p95_ms": round(percentile(lat, 95), 1),
+                "p99_ms": round(percentile(lat, 99), 1),
+                "mean_ms": round(statistics.fmean(lat), 1) if lat else 0.0,
+                "queries_per_request": round(statistics.fmean(queries), 1) if queries else None,
+                "max_queries": max(queries) if queries else None,
+            }
+        total = sum(s["requests"] for s in steps.values())
+        result = {"elapsed_s": round(elapsed, 1), "requests": total, "rps": round(total / elapsed, 1), "steps": steps}
+        if self.flows:
+            result["flows"] = self.flows
+            result["flows_per_s"] = round(self.flows / elapsed, 2)
+        return result
+
+
+class Context:
+    def __init__(self, client, admin, users, manifest, args):
+        self.client = client
+        self.admin = admin
+        self.users = users  # [(headers, church_ids)]
+        self.first_product, self.last_product = manifest["product_id_range"]
+        self.args = args
+        self.create_as_admin = False
+
+
+async def lifecycle(ctx, rec, rng, deadline):
+    while time.perf_counter() < deadline:
+        headers, church_ids = rng.choice(ctx.users)
+        items = [
+            {"product_id": pid, "qty": rng.randint(1, 3)}
+            for pid in rng.sample(range(ctx.first_product, ctx.last_product + 1), rng.randint(1, 4))
+        ]
+        body = {"church_id": rng.choice(church_ids), "items": items}
+        r = await rec.call(ctx.client, "create", "POST", "/orders", ctx.admin if ctx.create_as_admin else headers,
+                           expected=201, json=body)
+        if r is not None and r.status_code == 403 and not ctx.create_as_admin:
+            # depois do dia 20 só o ADM cria pedidos; segue o cenário como ADM
+            print("  (período de pedidos encerrado para usuários: criando como ADM)")
+            ctx.create_as_admin = True
+            rec.errors["create"] -= 1
+            continue
+        if r is None or r.status_code != 201:
+            continue
+        order_id = r.json()["id"]
+        r = await rec.call(ctx.client, "approve", "PUT", f"/orders/{order_id}/approve", ctx.admin)
+        if r is None or r.status_code != 200:
+            continue
+        r = await rec.call(ctx.client, "deliver", "PUT", f"/orders/{order_id}/deliver", ctx.admin)
+        if r is None or r.status_code != 200:
+            continue
+        r = await rec.call(ctx.client, "receipt", "GET", f"/orders/{order_id}/receipt",
+                           ctx.admin if ctx.create_as_admin else headers)
+        if r is not None and r.status_code == 200:
+            rec.flows += 1
+
+
+async def dashboard(ctx, rec, rng, deadline):
+    while time.perf_counter() < deadline:
+        headers, _ = rng.choice(ctx.users)
+        await rec.call(ctx.client, "dash_overview", "GET", "/dash/overview", ctx.admin)
+        await rec.call(ctx.client, "reports_dashboard", "GET", "/reports/dashboard", ctx.admin)
+        await rec.call(ctx.client, "dash_user_overview", "GET", "/dash/user-overview", headers)
+        await rec.call(ctx.client, "reports_my_orders", "GET", "/reports/my-orders", headers)
+        if ctx.args.poll_interval:
+            await asyncio.sleep(ctx.args.poll_interval)
+
+
+async def reports(ctx, rec, rng, deadline):
+    end = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    period = {"start_date": (end - timedelta(days=ctx.args.report_days)).isoformat(), "end_date": end.isoformat()}
+    while time.perf_counter() < deadline:
+        await rec.call(ctx.client, "orders", "GET", "/reports/orders", ctx.admin, params=period)
+        await rec.call(ctx.client, "orders_excel", "GET", "/reports/orders/excel", ctx.admin, params=period)
+        await rec.call(ctx.client, "stock_movements", "GET", "/reports/stock-movements", ctx.admin, params=period)
+        await rec.call(ctx.client, "products", "GET", "/reports/products", ctx.admin)
+        await rec.call(ctx.client, "churches", "GET", "/reports/churches", ctx.admin)
+
+
+async def run_scenario(ctx, name, seed):
+    rec = Recorder()
+    fn = globals()[name]
+    deadline = time.perf_counter() + ctx.args.duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        fn(ctx, rec, random.Random(seed + i), deadline) for i in range(ctx.args.concurrency)
+    ))
+    return rec.summary(time.perf_counter() - started)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, tolerance):
+    """Imprime a variação de p95 e req/s por passo; devolve os passos que pioraram."""
+    regressions = []
+    print(f"\n{'passo':<36} {'p95 base':>9} {'p95':>9} {'Δ':>7} {'req/s base':>11} {'req/s':>8} {'Δ':>7}")
+    for scenario, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not base:
+            continue
+        for step, s in result["steps"].items():
+            b = base["steps"].get(step)
+            if not b or not b["requests"] or not s["requests"]:
+                continue
+            d_p95 = (s["p95_ms"] - b["p95_ms"]) / b["p95_ms"] * 100 if b["p95_ms"] else 0.0
+            d_rps = (s["rps"] - b["rps"]) / b["rps"] * 100 if b["rps"] else 0.0
+            worse = d_p95 > tolerance or d_rps < -tolerance
+            if worse:
+                regressions.append(f"{scenario}.{step}")
+            print(
+                f"{scenario + '.' + step:<36} {b['p95_ms']:>7.1f}ms {s['p95_ms']:>7.1f}ms {d_p95:>+6.1f}% "
+                f"{b['rps']:>11.1f} {s['rps']:>8.1f} {d_rps:>+6.1f}%{'  <- regressão' if worse else ''}"
+            )
+    return regressions
+
+
+def print_result(name, result):
+    flows = f", {result['flows_per_s']} fluxos/s" if "flows_per_s" in result else ""
+    print(f"\n[{name}] {result['requests']} requisições, {result['rps']} req/s{flows}")
+    print(f"  {'passo':<20} {'req':>6} {'err':>4} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'SQL/req':>8}")
+    for step, s in result["steps"].items():
+        q = "-" if s["queries_per_request"] is None else s["queries_per_request"]
+        print(
+            f"  {step:<20} {s['requests']:>6} {s['errors']:>4} {s['rps']:>7} "
+            f"{s['p50_ms']:>6}ms {s['p95_ms']:>6}ms {s['p99_ms']:>6}ms {q:>8}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default=os.getenv("API_BASE", "http://127.0.0.1:8000"))
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos por cenário")
+    parser.add_argument("--users", type=int, default=20, help="usuários da massa que fazem login")
+    parser.add_argument("--poll-interval", type=float, default=0.0, help="pausa entre ciclos do dashboard")
+    parser.add_argument("--report-days", type=int, default=30)
+    parser.add_argument("--manifest", default=str(BENCH_DIR / "results" / "seed.json"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--compare", help="resultado anterior (--json) para comparar")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="piora máxima aceita em %% (p95 e req/s)")
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.base, limits=limits, timeout=120.0) as client:
+        admin = {"Authorization": "Bearer " + await login(
+            client, os.getenv("ADMIN_EMAIL", "admin@example.com"), os.getenv("ADMIN_PASSWORD", "changeme"),
+        )}
+        users = []
+        for u in random.Random(args.seed).sample(manifest["users"], min(args.users, len(manifest["users"]))):
+            token = await login(client, u["email"], manifest["password"])
+            users.append(({"Authorization": f"Bearer {token}"}, u["church_ids"]))
+        ctx = Context(client, admin, users, manifest, args)
+
+        probe = await client.get("/health", headers=admin)
+        if "x-db-queries" not in probe.headers:
+            print("aviso: servidor sem DEBUG=true, consultas por requisição não serão medidas")
+
+        output = {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "base": args.base,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "dataset": manifest["counts"],
+            "scenarios": {},
+        }
+        for i, name in enumerate(args.scenarios):
+            result = await run_scenario(ctx, name, args.seed + i * 1000)
+            output["scenarios"][name] = result
+            print_result(name, result)
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(output, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} passo(s) com regressão acima de {args.tolerance}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
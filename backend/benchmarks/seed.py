@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Gerador de massa de dados para os testes de carga (benchmarks/scenarios.py).
+
+Cria, com SQL set-based (INSERT ... SELECT generate_series), volumes parecidos
+com os de produção depois de alguns anos de uso:
+
+- igrejas, categorias e 10k produtos;
+- usuários USUARIO ligados a 1 ou 2 igrejas (mesma senha para todos);
+- pedidos espalhados pelos últimos `--days` dias, com 1 a 2*`--items` itens e
+  status 10% PENDENTE / 15% APROVADO / 70% ENTREGUE / 5% CANCELADO;
+- uma SAIDA_PEDIDO por item de pedido aprovado/entregue (como approve_order)
+  e `--restocks` ENTRADAs por produto, dimensionadas para que o estoque final
+  seja a soma dos movimentos e sobre folga para aprovar novos pedidos.
+
+Com os valores padrão são ~500k pedidos, ~1M itens e ~1M movimentos de estoque.
+As linhas geradas usam prefixos próprios ("Carga ...", carga-usuario-N@carga.local),
+então `--clean` remove só elas (e os pedidos/movimentos criados pelos cenários).
+O random() é semeado (`--seed`) para a massa ser a mesma entre execuções.
+
+Ao final grava um manifesto JSON (usuários, igrejas de cada um, senha, faixa
+de produtos) usado por scenarios.py.
+
+Uso: DATABASE_URL=postgresql+psycopg2://... python benchmarks/seed.py \\
+        [--orders 500000] [--products 10000] [--users 600] [--churches 200] \\
+        [--manifest benchmarks/results/seed.json] [--clean]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, insert, text  # noqa: E402
+
+from app.core.security import get_password_hash  # noqa: E402
+from app.models.user import user_church  # noqa: E402
+
+CHURCH_PREFIX = "Carga Igreja "
+CATEGORY_PREFIX = "Carga Categoria "
+PRODUCT_PREFIX = "Carga produto "
+EMAIL_DOMAIN = "@carga.local"
+CITIES = ["Santa Isabel", "Arujá", "Mogi das Cruzes", "Guarulhos", "Igaratá", "Jacareí"]
+UNITS = ["UN", "CX", "PCT", "KG", "L"]
+
+
+@contextmanager
+def step(label):
+    """Imprime o rótulo e, ao fim do bloco, o tempo gasto."""
+    start = time.perf_counter()
+    print(f"  {label:<44}", end="", flush=True)
+    yield
+    print(f"{time.perf_counter() - start:>8.1f} s")
+
+
+# Colunas de FK sem índice: sem eles cada linha apagada de orders/products/users
+# varre as tabelas filhas inteiras. Criados e removidos dentro da transação do --clean
+CLEAN_INDEXES = [
+    ("stock_movements", "related_order_id"),
+    ("stock_movements", "product_id"),
+    ("order_items", "order_id"),
+    ("order_items", "product_id"),
+    ("inventory_items", "product_id"),
+    ("orders", "requester_id"),
+    ("orders", "signed_by_id"),
+    ("audit_log", "user_id"),
+]
+
+
+def clean(engine):
+    with engine.begin() as conn:
+        with step("identificando a massa de carga"):
+            conn.execute(text("""
+                CREATE TEMP TABLE carga_churches ON COMMIT DROP AS SELECT id FROM churches WHERE name LIKE :churches;
+                CREATE TEMP TABLE carga_products ON COMMIT DROP AS SELECT id FROM products WHERE name LIKE :products;
+                CREATE TEMP TABLE carga_users ON COMMIT DROP AS SELECT id FROM users WHERE email LIKE :emails;
+                CREATE TEMP TABLE carga_orders ON COMMIT DROP AS
+                    SELECT id FROM orders WHERE church_id IN (SELECT id FROM carga_churches);
+            """), {
+                "churches": CHURCH_PREFIX + "%",
+                "products": PRODUCT_PREFIX + "%",
+                "emails": "%" + EMAIL_DOMAIN,
+            })
+        with step("índices auxiliares"):
+            for table, column in CLEAN_INDEXES:
+                conn.execute(text(f"CREATE INDEX carga_tmp_{table}_{column} ON {table} ({column})"))
+        statements = [
+            ("movimentos", """
+                DELETE FROM stock_movements
+                WHERE product_id IN (SELECT id FROM carga_products) OR related_order_id IN (SELECT id FROM carga_orders)
+            """),
+            ("itens de pedido", "DELETE FROM order_items WHERE order_id IN (SELECT id FROM carga_orders)"),
+            ("pedidos", "DELETE FROM orders WHERE id IN (SELECT id FROM carga_orders)"),
+            ("itens de inventário", "DELETE FROM inventory_items WHERE product_id IN (SELECT id FROM carga_products)"),
+            ("produtos", "DELETE FROM products WHERE id IN (SELECT id FROM carga_products)"),
+            ("categorias", "DELETE FROM categories WHERE name LIKE :categories"),
+            # logins e pedidos dos cenários ficam na auditoria com o id do usuário de carga
+            ("auditoria dos usuários", "DELETE FROM audit_log WHERE user_id IN (SELECT id FROM carga_users)"),
+            ("usuários", "DELETE FROM users WHERE id IN (SELECT id FROM carga_users)"),
+            ("igrejas", "DELETE FROM churches WHERE id IN (SELECT id FROM carga_churches)"),
+        ]
+        for label, sql in statements:
+            with step(f"removendo {label}"):
+                conn.execute(text(sql), {"categories": CATEGORY_PREFIX + "%"})
+        for table, column in CLEAN_INDEXES:
+            conn.execute(text(f"DROP INDEX carga_tmp_{table}_{column}"))
+
+
+def seed(engine, args):
+    with engine.begin() as conn:
+        existing = conn.scalar(text("SELECT count(*) FROM churches WHERE name LIKE :p"), {"p": CHURCH_PREFIX + "%"})
+        if existing:
+            raise SystemExit("Já existe massa de carga neste banco; rode com --clean antes.")
+        conn.execute(text("SELECT setseed(:s)"), {"s": args.seed})
+
+        with step(f"{args.churches} igrejas, {args.categories} categorias"):
+            church_ids = conn.scalars(text("""
+                INSERT INTO churches (name, city, created_at)
+                SELECT :prefix || g, (CAST(:cities AS text[]))[1 + g % cardinality(CAST(:cities AS text[]))],
+                       now() - :days * interval '1 day'
+                FROM generate_series(1, :n) g
+                RETURNING id
+            """), {"prefix": CHURCH_PREFIX, "cities": CITIES, "days": args.days, "n": args.churches}).all()
+            category_ids = conn.scalars(text("""
+                INSERT INTO categories (name) SELECT :prefix || g FROM generate_series(1, :n) g RETURNING id
+            """), {"prefix": CATEGORY_PREFIX, "n": args.categories}).all()
+
+        with step(f"{args.products} produtos"):
+            conn.execute(text("""
+                INSERT INTO products (name, category_id, unit, price, stock_qty, low_stock_threshold, is_active, created_at)
+                SELECT :prefix || g, (CAST(:cats AS integer[]))[1 + g % cardinality(CAST(:cats AS integer[]))],
+                       (CAST(:units AS text[]))[1 + g % cardinality(CAST(:units AS text[]))],
+                       round((1 + random() * 99)::numeric, 2), 0, 10, true, now() - :days * interval '1 day'
+                FROM generate_series(1, :n) g
+            """), {"prefix": PRODUCT_PREFIX, "cats": category_ids, "units": UNITS, "days": args.days, "n": args.products})
+
+        with step(f"{args.users} usuários"):
+            user_ids = conn.scalars(text("""
+                INSERT INTO users (name, email, password_hash, role, is_active, created_at)
+                SELECT 'Usuário carga ' || g, 'carga-usuario-' || g || :domain, :hash, 'USUARIO', true, now()
+                FROM generate_series(1, :n) g
+                ORDER BY g
+                RETURNING id
+            """), {"domain": EMAIL_DOMAIN, "hash": get_password_hash(args.password), "n": args.users}).all()
+            memberships = {}
+            for i, user_id in enumerate(user_ids):
+                churches = [church_ids[i % len(church_ids)]]
+                if i % 4 == 0 and len(church_ids) > 1:
+                    churches.append(church_ids[(i + 1) % len(church_ids)])
+                memberships[user_id] = churches
+            conn.execute(insert(user_church), [
+                {"user_id": u, "church_id": c} for u, churches in memberships.items() for c in churches
+            ])
+
+        conn.execute(text("""
+            CREATE TEMP TABLE carga_members ON COMMIT DROP AS
+            SELECT row_number() OVER (ORDER BY uc.user_id, uc.church_id) AS rn, uc.user_id, uc.church_id
+            FROM user_church uc JOIN users u ON u.id = uc.user_id WHERE u.email LIKE :emails
+        """), {"emails": "%" + EMAIL_DOMAIN})
+        conn.execute(text("""
+            CREATE TEMP TABLE carga_products ON COMMIT DROP AS
+            SELECT row_number() OVER (ORDER BY id) AS rn, id, price FROM products WHERE name LIKE :products
+        """), {"products": PRODUCT_PREFIX + "%"})
+        conn.execute(text("CREATE INDEX ON carga_products (rn)"))
+        conn.execute(text("ANALYZE carga_members; ANALYZE carga_products"))
+        n_members = conn.scalar(text("SELECT count(*) FROM carga_members"))
+
+        done = 0
+        with step(f"{args.orders} pedidos (+ itens e saídas)"):
+            while done < args.orders:
+                batch = min(args.batch, args.orders - done)
+                last_id = conn.scalar(text("SELECT coalesce(max(id), 0) FROM orders"))
+                conn.execute(text("""
+                    INSERT INTO orders (requester_id, church_id, status, created_at, approved_at, delivered_at)
+                    SELECT m.user_id, m.church_id, CAST(s.status AS order_status), s.created_at,
+                           CASE WHEN s.status IN ('APROVADO', 'ENTREGUE') THEN s.created_at + s.to_approve END,
+                           CASE WHEN s.status = 'ENTREGUE' THEN s.created_at + s.to_approve + s.to_deliver END
+                    FROM (
+                        SELECT 1 + floor(random() * :members)::int AS member,
+                               CASE WHEN r < 0.10 THEN 'PENDENTE' WHEN r < 0.25 THEN 'APROVADO'
+                                    WHEN r < 0.95 THEN 'ENTREGUE' ELSE 'CANCELADO' END AS status,
+                               now() - random() * :days * interval '1 day' AS created_at,
+                               random() * interval '3 days' AS to_approve,
+                               random() * interval '7 days' AS to_deliver
+                        FROM (SELECT random() AS r FROM generate_series(1, :n)) g
+                    ) s
+                    JOIN carga_members m ON m.rn = s.member
+                """), {"members": n_members, "days": args.days, "n": batch})
+                # produtos com popularidade desigual (random()^2 concentra nos primeiros)
+                conn.execute(text("""
+                    INSERT INTO order_items (order_id, product_id, qty, unit_price, subtotal)
+                    SELECT x.order_id, p.id, x.qty, p.price, x.qty * p.price
+                    FROM (
+                        SELECT o.id AS order_id, 1 + (o.base + i * 7919) % :products AS rn,
+                               1 + floor(random() * 10)::int AS qty
+                        FROM (
+                            SELECT id, floor(:products * random() ^ 2)::int AS base,
+                                   1 + floor(random() * (2 * :items - 1))::int AS n
+                            FROM orders WHERE id > :last_id
+                        ) o
+                        CROSS JOIN LATERAL generate_series(0, o.n - 1) i
+                    ) x
+                    JOIN carga_products p ON p.rn = x.rn
+                """), {"products": args.products, "items": args.items, "last_id": last_id})
+                # estatísticas atualizadas: sem elas o planner estima ~0 linhas novas e
+                # escolhe nested loop com seq scan em order_items (quadrático)
+                conn.execute(text("ANALYZE orders; ANALYZE order_items"))
+                conn.execute(text("""
+                    INSERT INTO stock_movements (product_id, type, qty, note, related_order_id, created_at)
+                    SELECT oi.product_id, 'SAIDA_PEDIDO', oi.qty, 'Order #' || o.id, o.id, o.approved_at
+                    FROM order_items oi JOIN orders o ON o.id = oi.order_id
+                    WHERE oi.order_id > :last_id AND o.status IN ('APROVADO', 'ENTREGUE')
+                """), {"last_id": last_id})
+                done += batch
+
+        # somas materializadas em tabelas temporárias: como subconsulta, o planner
+        # (com estatísticas de antes da carga) pode reexecutá-la por produto
+        conn.execute(text("ANALYZE stock_movements"))
+        with step(f"{args.restocks} entradas por produto"):
+            conn.execute(text("""
+                CREATE TEMP TABLE carga_outflow ON COMMIT DROP AS
+                SELECT m.product_id, sum(m.qty) AS qty
+                FROM stock_movements m JOIN carga_products p ON p.id = m.product_id
+                WHERE m.type = 'SAIDA_PEDIDO'
+                GROUP BY m.product_id
+            """))
+            conn.execute(text("""
+                INSERT INTO stock_movements (product_id, type, qty, unit_price, note, invoice_number, invoice_date, created_at)
+                SELECT p.id, 'ENTRADA', ceil((coalesce(s.qty, 0) + :buffer)::numeric / :restocks)::int, p.price,
+                       'Reposição (carga)', 'NF-' || p.id || '-' || k, t.ts::date, t.ts
+                FROM carga_products p
+                LEFT JOIN carga_outflow s ON s.product_id = p.id
+                CROSS JOIN generate_series(0, :restocks - 1) k
+                CROSS JOIN LATERAL (SELECT now() - :days * (k + 1)::numeric / :restocks * interval '1 day' AS ts) t
+            """), {"buffer": args.stock_buffer, "restocks": args.restocks, "days": args.days})
+
+        with step("estoque = soma dos movimentos"):
+            conn.execute(text("""
+                CREATE TEMP TABLE carga_stock ON COMMIT DROP AS
+                SELECT m.product_id, sum(CASE WHEN m.type = 'ENTRADA' THEN m.qty ELSE -m.qty END) AS qty
+                FROM stock_movements m JOIN carga_products p ON p.id = m.product_id
+                GROUP BY m.product_id
+            """))
+            conn.execute(text("UPDATE products p SET stock_qty = s.qty FROM carga_stock s WHERE p.id = s.product_id"))
+        product_range = conn.execute(text("SELECT min(id), max(id) FROM carga_products")).one()
+
+    with step("ANALYZE"):
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+
+    with engine.connect() as conn:
+        counts = {
+            table: conn.scalar(text(f"SELECT count(*) FROM {table}"))
+            for table in ("churches", "users", "products", "orders", "order_items", "stock_movements")
+        }
+        users = conn.execute(text("""
+            SELECT u.id, u.email, array_agg(uc.church_id ORDER BY uc.church_id)
+            FROM users u JOIN user_church uc ON uc.user_id = u.id
+            WHERE u.email LIKE :emails GROUP BY u.id, u.email ORDER BY u.id
+        """), {"emails": "%" + EMAIL_DOMAIN}).all()
+    return {
+        "password": args.password,
+        "seed": args.seed,
+        "params": {k: getattr(args, k) for k in ("churches", "categories", "products", "users", "orders", "items", "days")},
+        "counts": counts,
+        "church_ids": list(church_ids),
+        "product_id_range": list(product_range),
+        "users": [{"id": u, "email": e, "church_ids": list(c)} for u, e, c in users],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--churches", type=int, default=200)
+    parser.add_argument("--categories", type=int, default=30)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=600)
+    parser.add_argument("--orders", type=int, default=500_000)
+    parser.add_argument("--items", type=int, default=2, help="itens médios por pedido")
+    parser.add_argument("--days", type=int, default=730, help="período coberto pelos pedidos")
+    parser.add_argument("--restocks", type=int, default=24, help="entradas por produto no período")
+    parser.add_argument("--stock-buffer", type=int, default=100_000, help="estoque final aproximado por produto")
+    parser.add_argument("--batch", type=int, default=50_000, help="pedidos por INSERT")
+    parser.add_argument("--password", default="carga123")
+    parser.add_argument("--seed", type=float, default=0.42)
+    parser.add_argument("--manifest", default=str(Path(__file__).resolve().parent / "results" / "seed.json"))
+    parser.add_argument("--clean", action="store_true", help="remove a massa de carga (e o que os cenários criaram) e sai")
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("DATABASE_URL must be set")
+    engine = create_engine(url)
+
+    started = time.perf_counter()
+    if args.clean:
+        clean(engine)
+        print(f"massa de carga removida em {time.perf_counter() - started:.1f} s")
+        return
+
+    manifest = seed(engine, args)
+    Path(args.manifest).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"\nconcluído em {time.perf_counter() - started:.1f} s; totais no banco:")
+    for table, count in manifest["counts"].items():
+        print(f"  {table:<16} {count:>10}")
+    print(f"manifesto: {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -122,8 +122,25 @@ from app.db.session import engine
 import app.models  # noqa: F401
 
 Base.metadata.create_all(bind=engine)
+
+# pg_trgm + trigram index for product search (no-op if already there)
+from app.services.product_search import ensure_search_index
+ensure_search_index(engine)
+
+# audit_log JSONB columns, search column and indexes (no-op if already there)
+from app.services.audit_search import ensure_audit_search
+ensure_audit_search(engine)
+
+# opening snapshot of the stock ledger (no-op once it has snapshots)
+from app.services.stock_ledger import ensure_stock_ledger
+ensure_stock_ledger(engine)
 PY
 
+# audit_log created before partitioning: switch to the partitioned table and
+# copy the old rows in the background (new audit rows already go to the new table),
+# then backfill the daily audit counters if they were just created
+(python -m app.audit_maintenance convert && python -m app.audit_maintenance rebuild-counters --if-empty) &
+
 # Auto-generate initial migration if no revision files exist (ignore .gitkeep)
 # if ! find migrations/versions -maxdepth 1 -name "*.py" | grep -q .; then
 #   echo "No Alembic revision files found. Autogenerating initial migration..."
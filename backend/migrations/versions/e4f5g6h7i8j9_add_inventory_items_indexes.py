@@ -0,0 +1,34 @@
+"""add inventory_items (inventory_id, id) indexes
+
+Revision ID: e4f5g6h7i8j9
+Revises: d3e4f5g6h7i8
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4f5g6h7i8j9'
+down_revision = 'd3e4f5g6h7i8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_inventory_items_inventory_id_id', 'inventory_items', ['inventory_id', 'id'], unique=False)
+    op.create_index(
+        'ix_inventory_items_uncounted', 'inventory_items', ['inventory_id', 'id'], unique=False,
+        postgresql_where=sa.text('counted_qty IS NULL'),
+    )
+    op.create_index(
+        'ix_inventory_items_with_difference', 'inventory_items', ['inventory_id', 'id'], unique=False,
+        postgresql_where=sa.text('difference <> 0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_items_with_difference', table_name='inventory_items')
+    op.drop_index('ix_inventory_items_uncounted', table_name='inventory_items')
+    op.drop_index('ix_inventory_items_inventory_id_id', table_name='inventory_items')
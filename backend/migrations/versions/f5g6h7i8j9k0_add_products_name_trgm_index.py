@@ -0,0 +1,35 @@
+"""add pg_trgm index on products.name
+
+Revision ID: f5g6h7i8j9k0
+Revises: e4f5g6h7i8j9
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5g6h7i8j9k0'
+down_revision = 'e4f5g6h7i8j9'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic")
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    available = conn.scalar(sa.text("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')"))
+    if not available:
+        # Servers without the contrib package: search keeps working with ILIKE
+        logger.warning("pg_trgm not available, skipping ix_products_name_trgm")
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_products_name_trgm")
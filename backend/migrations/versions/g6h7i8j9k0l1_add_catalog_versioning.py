@@ -0,0 +1,52 @@
+"""add catalog versioning (catalog_state, tombstones, catalog_version columns)
+
+Revision ID: g6h7i8j9k0l1
+Revises: f5g6h7i8j9k0
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'g6h7i8j9k0l1'
+down_revision = 'f5g6h7i8j9k0'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('products', 'categories', 'churches')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'catalog_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute("INSERT INTO catalog_state (id, version) VALUES (1, 0)")
+
+    op.create_table(
+        'catalog_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('catalog_version', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_catalog_tombstones_catalog_version'), 'catalog_tombstones', ['catalog_version'], unique=False)
+
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('catalog_version', sa.BigInteger(), server_default='0', nullable=False))
+        op.create_index(op.f(f'ix_{table}_catalog_version'), table, ['catalog_version'], unique=False)
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.drop_index(op.f(f'ix_{table}_catalog_version'), table_name=table)
+        op.drop_column(table, 'catalog_version')
+    op.drop_index(op.f('ix_catalog_tombstones_catalog_version'), table_name='catalog_tombstones')
+    op.drop_table('catalog_tombstones')
+    op.drop_table('catalog_state')
@@ -0,0 +1,99 @@
+"""partition audit_log by month (range on timestamp)
+
+Revision ID: h7i8j9k0l1m2
+Revises: g6h7i8j9k0l1
+Create Date: 2026-10-19 12:00:00.000000
+
+The plain audit_log is renamed to audit_log_legacy and a partitioned
+audit_log takes its place in one short transaction, so new audit rows go to
+the partitioned table right away. The old rows are then copied newest first
+in batches, each committed on its own, and the legacy table is dropped. If
+the copy is interrupted, running the upgrade again resumes it.
+
+Mirrors app.services.audit_partitions.convert_to_partitioned, which does the
+same for databases created with create_all.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'h7i8j9k0l1m2'
+down_revision = 'g6h7i8j9k0l1'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 50_000
+MONTHS_AHEAD = 3
+
+
+def _create_partitions(conn) -> None:
+    """Monthly partitions from the oldest legacy row to MONTHS_AHEAD months ahead, plus the default one."""
+    conn.execute(sa.text("SET LOCAL TimeZone = 'UTC'"))
+    first = conn.scalar(sa.text(
+        "SELECT date_trunc('month', coalesce(min(timestamp), now())) FROM audit_log_legacy"
+    ))
+    last = conn.scalar(sa.text(
+        f"SELECT date_trunc('month', now()) + interval '{MONTHS_AHEAD} months'"
+    ))
+    months = conn.execute(sa.text(
+        "SELECT m FROM generate_series(CAST(:first AS timestamptz), CAST(:last AS timestamptz), interval '1 month') m"
+    ), {"first": first, "last": last}).scalars().all()
+    for month in months:
+        name = f"audit_log_p{month:%Y_%m}"
+        conn.execute(sa.text(f"""
+            CREATE TABLE IF NOT EXISTS {name} PARTITION OF audit_log
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{month.isoformat()}'::timestamptz + interval '1 month')
+        """))
+    conn.execute(sa.text("CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log DEFAULT"))
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    relkind = conn.scalar(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass('audit_log')"))
+    if relkind == 'r':
+        op.execute("ALTER TABLE audit_log RENAME TO audit_log_legacy")
+        op.execute("ALTER TABLE audit_log_legacy RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey")
+        indexes = conn.execute(sa.text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'audit_log_legacy' AND indexname <> 'audit_log_legacy_pkey'"
+        )).scalars().all()
+        for index in indexes:
+            op.execute(f"DROP INDEX {index}")
+        op.execute("""
+            CREATE TABLE audit_log (LIKE audit_log_legacy INCLUDING DEFAULTS, PRIMARY KEY (id, timestamp))
+            PARTITION BY RANGE (timestamp)
+        """)
+        op.execute("ALTER TABLE audit_log_legacy ALTER COLUMN id DROP DEFAULT")
+        op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+        op.execute("ALTER TABLE audit_log ADD FOREIGN KEY (user_id) REFERENCES users (id)")
+        op.execute("CREATE INDEX ix_audit_log_timestamp ON audit_log (timestamp)")
+        op.execute("CREATE INDEX ix_audit_log_user_id ON audit_log (user_id)")
+        op.execute("CREATE INDEX ix_audit_log_resource ON audit_log (resource, resource_id)")
+        _create_partitions(conn)
+
+    if conn.scalar(sa.text("SELECT to_regclass('audit_log_legacy') IS NULL")):
+        return
+
+    with op.get_context().autocommit_block():
+        lo, hi = conn.execute(sa.text("SELECT min(id), max(id) FROM audit_log_legacy")).one()
+        upper = hi
+        while lo is not None and upper >= lo:
+            conn.execute(sa.text("""
+                INSERT INTO audit_log SELECT * FROM audit_log_legacy WHERE id > :lower AND id <= :upper
+                ON CONFLICT DO NOTHING
+            """), {"lower": upper - BATCH_SIZE, "upper": upper})
+            upper -= BATCH_SIZE
+        conn.execute(sa.text("DROP TABLE audit_log_legacy"))
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_partitioned")
+    op.execute("CREATE TABLE audit_log (LIKE audit_log_partitioned INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO audit_log SELECT * FROM audit_log_partitioned")
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+    op.execute("DROP TABLE audit_log_partitioned CASCADE")
+    op.execute("ALTER TABLE audit_log ADD CONSTRAINT audit_log_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE audit_log ADD FOREIGN KEY (user_id) REFERENCES users (id)")
+    op.create_index('ix_audit_log_timestamp', 'audit_log', ['timestamp'], unique=False)
+    op.create_index('ix_audit_log_user_id', 'audit_log', ['user_id'], unique=False)
+    op.create_index('ix_audit_log_resource', 'audit_log', ['resource', 'resource_id'], unique=False)
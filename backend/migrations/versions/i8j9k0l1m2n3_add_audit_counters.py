@@ -0,0 +1,39 @@
+"""add audit_counters (daily audit_log counts per action, resource and success)
+
+Revision ID: i8j9k0l1m2n3
+Revises: h7i8j9k0l1m2
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'i8j9k0l1m2n3'
+down_revision = 'h7i8j9k0l1m2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_counters',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('action', sa.String(50), nullable=False),
+        sa.Column('resource', sa.String(100), nullable=False),
+        sa.Column('success', sa.Boolean(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'action', 'resource', 'success'),
+    )
+    # Backfill; later corrections: python -m app.audit_maintenance rebuild-counters
+    op.execute("""
+        INSERT INTO audit_counters (day, action, resource, success, count)
+        SELECT (timestamp AT TIME ZONE 'UTC')::date, action, resource, success, count(*)
+        FROM audit_log
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('audit_counters')
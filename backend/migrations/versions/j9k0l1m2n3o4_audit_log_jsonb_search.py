@@ -0,0 +1,52 @@
+"""audit_log: JSONB columns, generated search_text column and search indexes
+
+Revision ID: j9k0l1m2n3o4
+Revises: i8j9k0l1m2n3
+Create Date: 2026-10-19 12:00:00.000000
+
+Databases created by the migrations already have JSONB columns; those created
+with create_all have JSON ones. Changing the type and adding the stored
+column rewrite audit_log.
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'j9k0l1m2n3o4'
+down_revision = 'i8j9k0l1m2n3'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic")
+
+JSONB_COLUMNS = ('old_values', 'new_values', 'extra_metadata')
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    types = dict(conn.execute(sa.text("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_name = 'audit_log' AND column_name IN ('old_values', 'new_values', 'extra_metadata')
+    """)).all())
+    for column in JSONB_COLUMNS:
+        if types.get(column) == 'json':
+            op.execute(f"ALTER TABLE audit_log ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb")
+    op.execute("""
+        ALTER TABLE audit_log ADD COLUMN search_text text
+        GENERATED ALWAYS AS (coalesce(error_message, '') || ' ' || coalesce(extra_metadata::text, '')) STORED
+    """)
+    op.execute("CREATE INDEX ix_audit_log_extra_metadata ON audit_log USING gin (extra_metadata jsonb_path_ops)")
+    if conn.scalar(sa.text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")):
+        op.execute("CREATE INDEX ix_audit_log_search_text_trgm ON audit_log USING gin (search_text gin_trgm_ops)")
+    else:
+        # Servers without the contrib package: search uses ILIKE on search_text without an index
+        logger.warning("pg_trgm not available, skipping ix_audit_log_search_text_trgm")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_audit_log_search_text_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_audit_log_extra_metadata")
+    op.execute("ALTER TABLE audit_log DROP COLUMN search_text")
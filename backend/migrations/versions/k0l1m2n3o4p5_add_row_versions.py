@@ -0,0 +1,29 @@
+"""add version columns to orders, products and inventory_counts (optimistic concurrency)
+
+Revision ID: k0l1m2n3o4p5
+Revises: j9k0l1m2n3o4
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'k0l1m2n3o4p5'
+down_revision = 'j9k0l1m2n3o4'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('orders', 'products', 'inventory_counts')
+
+
+def upgrade() -> None:
+    # a constant default: existing rows get version 1 without a table rewrite
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.drop_column(table, 'version')
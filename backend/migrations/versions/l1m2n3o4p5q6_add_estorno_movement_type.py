@@ -0,0 +1,24 @@
+"""add ESTORNO to movement_type (compensating movements of edited orders)
+
+Revision ID: l1m2n3o4p5q6
+Revises: k0l1m2n3o4p5
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'l1m2n3o4p5q6'
+down_revision = 'k0l1m2n3o4p5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE movement_type ADD VALUE IF NOT EXISTS 'ESTORNO'")
+
+
+def downgrade() -> None:
+    # Cannot remove enum value in PostgreSQL easily
+    pass
@@ -0,0 +1,44 @@
+"""add stock_snapshots and the (product_id, created_at) index of stock_movements (stock ledger)
+
+Revision ID: m2n3o4p5q6r7
+Revises: l1m2n3o4p5q6
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'm2n3o4p5q6r7'
+down_revision = 'l1m2n3o4p5q6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stock_snapshots',
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('qty', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('product_id', 'taken_at'),
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_stock_movements_product_created ON stock_movements (product_id, created_at)"
+    )
+    # opening snapshot: the ledger starts from the current stock, stamped with
+    # the same aware UTC clock as stock_movements.created_at (not the server's now())
+    op.execute(
+        sa.text(
+            "INSERT INTO stock_snapshots (product_id, taken_at, qty) "
+            "SELECT id, :at, coalesce(stock_qty, 0) FROM products"
+        ).bindparams(sa.bindparam("at", datetime.now(timezone.utc), sa.DateTime(timezone=True)))
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_movements_product_created', table_name='stock_movements')
+    op.drop_table('stock_snapshots')
@@ -0,0 +1,36 @@
+"""drop catalog_state: catalog versions are the writing transaction's id
+
+Revision ID: n3o4p5q6r7s8
+Revises: m2n3o4p5q6r7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'n3o4p5q6r7s8'
+down_revision = 'm2n3o4p5q6r7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # every counter value was taken by a transaction with a larger id, so
+    # clients holding an old version still get every row written from now on
+    op.drop_table('catalog_state')
+
+
+def downgrade() -> None:
+    op.create_table(
+        'catalog_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute(
+        "INSERT INTO catalog_state (id, version) SELECT 1, greatest("
+        "(SELECT max(catalog_version) FROM products), (SELECT max(catalog_version) FROM categories), "
+        "(SELECT max(catalog_version) FROM churches), (SELECT max(catalog_version) FROM catalog_tombstones), 0)"
+    )
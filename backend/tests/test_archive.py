@@ -0,0 +1,132 @@
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import delete, insert, select, text
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.models.audit_log import AuditLog
+from app.models.product import Product
+from app.models.stock_movement import StockMovement
+from app.services import archive, audit_partitions
+
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+MARKER = "archive-test"
+MONTH = datetime(2002, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "archive_backend", "local")
+    monkeypatch.setattr(settings, "archive_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "archive_compression", "gzip")
+    monkeypatch.setattr(settings, "archive_batch_size", 2)
+    monkeypatch.setattr(archive, "_manifest_cache", None)
+    yield tmp_path
+    archive._manifest_cache = None
+
+
+def _seed():
+    with engine.begin() as conn:
+        audit_partitions.create_partition(conn, MONTH)
+    with SessionLocal() as db:
+        product_id = db.scalar(select(Product.id).limit(1))
+        db.execute(insert(AuditLog), [
+            {
+                "timestamp": MONTH.replace(day=day), "action": "UPDATE", "resource": "ORDER", "user_agent": MARKER,
+                "success": day != 20, "error_message": "falhou" if day == 20 else None,
+                "extra_metadata": {"path": f"/orders/{day}", "status_code": 500 if day == 20 else 200},
+            }
+            for day in (5, 10, 20)
+        ])
+        db.execute(insert(StockMovement), [
+            {"product_id": product_id, "type": "ENTRADA", "qty": 1, "note": MARKER,
+             "created_at": datetime(2002, 2, day, tzinfo=timezone.utc)}
+            for day in (1, 2, 3, 4, 5)
+        ])
+        db.commit()
+
+
+def _cleanup():
+    with SessionLocal() as db:
+        db.execute(delete(StockMovement).where(StockMovement.note == MARKER))
+        db.execute(delete(AuditLog).where(AuditLog.user_agent == MARKER))
+        db.commit()
+    with engine.begin() as conn:
+        name = audit_partitions.partition_name(MONTH)
+        if conn.scalar(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": name}):
+            conn.execute(text(f"DROP TABLE {name}"))
+
+
+def test_archive_exports_verifies_and_purges(archive_dir, monkeypatch):
+    _cleanup()
+    try:
+        _seed()
+        now = datetime(2002, 6, 1, tzinfo=timezone.utc)
+        # no stock snapshot yet: the movements are still needed for the stock at a date
+        monkeypatch.setattr(archive, "snapshot_horizon", lambda conn: None)
+        assert archive.archive(engine, after_months=2, now=now, tables=["stock_movements"], log=lambda _: None) == []
+        monkeypatch.setattr(archive, "snapshot_horizon", lambda conn: datetime(2002, 3, 15, tzinfo=timezone.utc))
+        segments = archive.archive(engine, after_months=2, now=now, log=lambda _: None)
+        assert {(s["table"], s["month"], s["rows"]) for s in segments} == {
+            ("audit_log", "2002-01", 3), ("stock_movements", "2002-02", 5),
+        }
+
+        manifest = json.loads((archive_dir / "manifest.json").read_text())
+        assert all(s["purged"] for s in manifest["segments"])
+        for segment in manifest["segments"]:
+            archive.verify_segment(archive.get_store(), segment)
+        movements = [
+            json.loads(line)
+            for line in gzip.decompress((archive_dir / segments[1]["key"]).read_bytes()).splitlines()
+        ]
+        assert [m["note"] for m in movements] == [MARKER] * 5
+
+        with SessionLocal() as db:
+            # the audit_log month was a partition: dropped, movements deleted in batches
+            assert db.scalar(text("SELECT to_regclass('audit_log_p2002_01')")) is None
+            assert db.scalar(select(StockMovement.id).where(StockMovement.note == MARKER)) is None
+
+        # a corrupted file is detected
+        (archive_dir / segments[0]["key"]).write_bytes(b"x")
+        with pytest.raises(ValueError):
+            archive.verify_segment(archive.get_store(), segments[0])
+    finally:
+        _cleanup()
+
+
+def test_audit_listing_reads_archived_months(archive_dir, client):
+    _cleanup()
+    try:
+        _seed()
+        archive.archive(engine, after_months=2, now=datetime(2002, 6, 1, tzinfo=timezone.utc), log=lambda _: None)
+        # a row of the same month still in the database (written after the export)
+        with SessionLocal() as db:
+            db.execute(insert(AuditLog), [{
+                "timestamp": MONTH.replace(day=25), "action": "UPDATE", "resource": "ORDER",
+                "user_agent": MARKER, "success": True, "extra_metadata": {"path": "/orders/25", "status_code": 200},
+            }])
+            db.commit()
+
+        r = client.post("/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+        h = {"Authorization": f"Bearer {r.json()['access']}"}
+
+        def listed(**params):
+            r = client.get("/audit", headers=h, params={
+                "start_date": "2002-01-01T00:00:00+00:00", "end_date": "2002-02-01T00:00:00+00:00", **params,
+            })
+            assert r.status_code == 200
+            return [row["extra_metadata"]["path"] for row in r.json() if row["user_agent"] == MARKER]
+
+        assert listed() == ["/orders/25", "/orders/20", "/orders/10", "/orders/5"]
+        assert listed(skip=1, limit=2) == ["/orders/20", "/orders/10"]
+        assert listed(status_code=500) == ["/orders/20"]
+        assert listed(search="FALHOU") == ["/orders/20"]
+        assert listed(success=True, path="/orders/5") == ["/orders/5"]
+    finally:
+        _cleanup()
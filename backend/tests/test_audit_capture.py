@@ -0,0 +1,110 @@
+from sqlalchemy import delete, event, select
+
+from app.db.session import SessionLocal
+from app.models.audit_log import AuditLog, AuditResource
+from app.models.category import Category
+from app.models.church import Church
+from app.models.order import Order
+from app.models.product import Product
+from app.models.user import User
+from app.schemas.order import OrderItemCreate, OrderUpdate
+from app.services.audit_decorators import audit_update
+from app.services.audit_writer import audit_writer
+from app.services.categories import update_category
+from app.services.orders import create_order, update_order
+from app.services.products import update_product
+
+
+def _entries(operation):
+    assert audit_writer.flush()
+    with SessionLocal() as db:
+        return db.scalars(
+            select(AuditLog).where(AuditLog.extra_metadata.contains({"operation": operation})).order_by(AuditLog.id)
+        ).all()
+
+
+def _cleanup(operation):
+    with SessionLocal() as db:
+        db.execute(delete(AuditLog).where(AuditLog.extra_metadata.contains({"operation": operation})))
+        db.commit()
+
+
+def test_update_records_only_changed_columns_without_extra_queries():
+    audited = audit_update(AuditResource.PRODUCT)(update_product)
+    with SessionLocal() as db:
+        product = db.scalar(select(Product).where(Product.is_active == True).limit(1))  # noqa: E712
+        original = product.low_stock_threshold
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.get_bind(), "before_cursor_execute", listener)
+        try:
+            update_product(db, product, low_stock_threshold=original + 1)
+            db.commit()
+            plain = len(statements)
+            statements.clear()
+            audited(db, product, low_stock_threshold=original + 2, name=product.name)
+            db.commit()
+            assert len(statements) == plain
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", listener)
+            update_product(db, product, low_stock_threshold=original)
+            db.commit()
+
+    try:
+        entries = _entries("update_product")
+        assert len(entries) == 1
+        entry = entries[0]
+        assert entry.action == "UPDATE" and entry.resource == "PRODUCT" and entry.resource_id == product.id
+        # the unchanged name is not recorded; catalog_version is bumped by the same flush
+        assert entry.old_values["low_stock_threshold"] == original + 1
+        assert entry.new_values["low_stock_threshold"] == original + 2
+        assert "name" not in entry.new_values
+        assert set(entry.new_values) <= {"low_stock_threshold", "catalog_version"}
+    finally:
+        _cleanup("update_product")
+
+
+def test_update_order_records_changed_items_as_related_rows():
+    audited = audit_update(AuditResource.ORDER)(update_order)
+    with SessionLocal() as db:
+        products = db.scalars(
+            select(Product).where(Product.is_active == True, Product.stock_qty >= 2).order_by(Product.id).limit(3)  # noqa: E712
+        ).all()
+        order = create_order(
+            db,
+            requester_id=db.scalar(select(User.id).order_by(User.id).limit(1)),
+            church_id=db.scalar(select(Church.id).order_by(Church.id).limit(1)),
+            items=[(p.id, 1) for p in products[:2]],
+        )
+        kept, removed = order.items
+        # one line changes, one goes away, one is added
+        items = [OrderItemCreate(product_id=kept.product_id, qty=2), OrderItemCreate(product_id=products[2].id, qty=1)]
+        audited(db, order=order, data=OrderUpdate(items=items))
+        db.commit()
+    try:
+        entry = _entries("update_order")[0]
+        assert entry.resource_id == order.id
+        related = [r for r in entry.extra_metadata["related"] if r["table"] == "order_items"]
+        deleted = [r["id"] for r in related if r["new"] is None]
+        inserted = [r for r in related if r["old"] is None]
+        updated = [r for r in related if r["old"] and r["new"]]
+        assert deleted == [removed.id]
+        assert len(inserted) == 1 and inserted[0]["new"]["order_id"] == order.id
+        assert [(r["id"], r["old"]["qty"], r["new"]["qty"]) for r in updated] == [(kept.id, 1, 2)]
+        # the order row itself only had its version bumped
+        assert entry.old_values is None and entry.new_values is None
+    finally:
+        _cleanup("update_order")
+        with SessionLocal() as db:
+            db.delete(db.get(Order, order.id))
+            db.commit()
+
+
+def test_rolled_back_operation_records_no_entry():
+    audited = audit_update(AuditResource.CATEGORY)(update_category)
+    with SessionLocal() as db:
+        category = db.scalar(select(Category).limit(1))
+        audited(db, category.id, category.name + " (rollback)")
+        db.rollback()
+    assert _entries("update_category") == []
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.services import audit_partitions
+
+
+def _drop(conn, name):
+    if conn.scalar(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": name}):
+        conn.execute(text(f"DROP TABLE {name}"))
+
+
+def _insert(conn, ts):
+    conn.execute(text(
+        "INSERT INTO audit_log (timestamp, action, resource, success) VALUES (:ts, 'TEST', 'partition-test', true)"
+    ), {"ts": ts})
+
+
+def test_audit_log_is_partitioned_by_month():
+    with engine.connect() as conn:
+        assert audit_partitions.is_partitioned(conn)
+        names = {p["name"] for p in audit_partitions.list_partitions(conn)}
+    current = audit_partitions.month_start(datetime.now(timezone.utc))
+    assert audit_partitions.partition_name(current) in names
+    assert audit_partitions.partition_name(audit_partitions.add_months(current, 1)) in names
+    assert audit_partitions.DEFAULT_PARTITION in names
+
+
+def test_rows_in_default_partition_move_to_new_partition():
+    month = datetime(2099, 1, 1, tzinfo=timezone.utc)
+    name = audit_partitions.partition_name(month)
+    try:
+        with engine.begin() as conn:
+            _insert(conn, month + timedelta(days=3))
+            assert conn.scalar(text(
+                "SELECT count(*) FROM audit_log_default WHERE resource = 'partition-test'"
+            )) == 1
+            assert audit_partitions.ensure_partitions(conn, 0, now=month) == [name]
+            assert conn.scalar(text(
+                "SELECT count(*) FROM audit_log_default WHERE resource = 'partition-test'"
+            )) == 0
+            assert conn.scalar(text(f"SELECT count(*) FROM {name}")) == 1
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM audit_log WHERE resource = 'partition-test'"))
+            if name in {p["name"] for p in audit_partitions.list_partitions(conn)}:
+                conn.execute(text(f"ALTER TABLE audit_log DETACH PARTITION {name}"))
+            _drop(conn, name)
+
+
+def test_retention_detaches_or_drops_old_partitions():
+    month = datetime(2001, 1, 1, tzinfo=timezone.utc)
+    name = audit_partitions.partition_name(month)
+    now = datetime(2001, 6, 15, tzinfo=timezone.utc)
+    try:
+        with engine.begin() as conn:
+            audit_partitions.create_partition(conn, month)
+            _insert(conn, month + timedelta(days=1))
+            assert audit_partitions.apply_retention(conn, 2, "detach", now=now) == [name]
+            assert name not in {p["name"] for p in audit_partitions.list_partitions(conn)}
+            # detached, not lost: kept for archival
+            assert conn.scalar(text(f"SELECT count(*) FROM {name}")) == 1
+
+            conn.execute(text(f"ALTER TABLE audit_log ATTACH PARTITION {name} "
+                              "FOR VALUES FROM ('2001-01-01+00') TO ('2001-02-01+00')"))
+            assert audit_partitions.apply_retention(conn, 2, "drop", now=now) == [name]
+            assert not conn.scalar(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": name})
+            assert audit_partitions.apply_retention(conn, 0, "drop", now=now) == []
+    finally:
+        with engine.begin() as conn:
+            _drop(conn, name)
+
+
+def test_recent_time_filter_prunes_old_partitions():
+    month = datetime(2001, 1, 1, tzinfo=timezone.utc)
+    name = audit_partitions.partition_name(month)
+    try:
+        with engine.begin() as conn:
+            audit_partitions.create_partition(conn, month)
+            plan = "\n".join(conn.execute(text(
+                "EXPLAIN SELECT * FROM audit_log WHERE timestamp >= now() - interval '7 days'"
+            )).scalars())
+        assert name not in plan
+        assert audit_partitions.partition_name(audit_partitions.month_start(datetime.now(timezone.utc))) in plan
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE audit_log DETACH PARTITION {name}"))
+            _drop(conn, name)
@@ -0,0 +1,73 @@
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, text
+
+from app.db.session import SessionLocal
+from app.models.audit_log import AuditLog
+
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+MARKER = "audit-search-test"
+
+
+def _seed():
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"path": "/orders", "status_code": 200, "query_params": {"church_id": "7"}, "error": None},
+        {"path": "/orders", "status_code": 409, "query_params": {"church_id": "8"}, "error": "Estoque insuficiente"},
+        {"path": "/products", "status_code": 200, "query_params": {}, "error": None},
+    ]
+    with SessionLocal() as db:
+        db.execute(insert(AuditLog), [
+            {
+                "timestamp": now, "action": "GET_REQUEST", "resource": "ORDER", "user_agent": MARKER,
+                "success": r["error"] is None, "error_message": r["error"], "old_values": None, "new_values": None,
+                "extra_metadata": {"method": "GET", "path": r["path"], "status_code": r["status_code"],
+                                   "query_params": r["query_params"]},
+            }
+            for r in rows
+        ])
+        db.commit()
+
+
+def _cleanup():
+    with SessionLocal() as db:
+        db.execute(delete(AuditLog).where(AuditLog.user_agent == MARKER))
+        db.commit()
+
+
+def test_audit_metadata_columns_are_jsonb_and_indexed():
+    with SessionLocal() as db:
+        types = dict(db.execute(text("""
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_name = 'audit_log' AND column_name IN ('old_values', 'new_values', 'extra_metadata')
+        """)).all())
+        assert set(types.values()) == {"jsonb"}
+        assert db.scalar(text("SELECT to_regclass('ix_audit_log_extra_metadata') IS NOT NULL"))
+
+
+def test_structured_filters_and_search(client):
+    _cleanup()
+    try:
+        _seed()
+        r = client.post("/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+        h = {"Authorization": f"Bearer {r.json()['access']}"}
+
+        def paths(**params):
+            r = client.get("/audit", headers=h, params={"limit": 100, **params})
+            assert r.status_code == 200
+            return sorted(
+                (row["extra_metadata"]["path"], row["extra_metadata"]["status_code"])
+                for row in r.json() if row["user_agent"] == MARKER
+            )
+
+        assert paths(path="/orders") == [("/orders", 200), ("/orders", 409)]
+        assert paths(path="/orders", status_code=409) == [("/orders", 409)]
+        assert paths(**{"query_params.church_id": "7"}) == [("/orders", 200)]
+        assert paths(status_code=404) == []
+        assert paths(search="insuficiente") == [("/orders", 409)]
+        assert paths(search="/products") == [("/products", 200)]
+    finally:
+        _cleanup()
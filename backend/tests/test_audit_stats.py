@@ -0,0 +1,104 @@
+import os
+from datetime import date, datetime, timezone
+
+from sqlalchemy import delete, insert, select
+
+from app.db.session import SessionLocal, engine
+from app.models.audit_log import AuditCounter, AuditLog
+from app.services import audit_counters
+
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+RESOURCE = "STATS_TEST"
+# 2003-03-10 .. 2003-03-12, UTC
+TIMESTAMPS = [
+    datetime(2003, 3, 10, 8, tzinfo=timezone.utc),
+    datetime(2003, 3, 10, 20, tzinfo=timezone.utc),
+    datetime(2003, 3, 11, 12, tzinfo=timezone.utc),
+    datetime(2003, 3, 12, 1, tzinfo=timezone.utc),
+    datetime(2003, 3, 12, 23, tzinfo=timezone.utc),
+]
+
+
+def _ms(value: datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def _cleanup():
+    with SessionLocal() as db:
+        db.execute(delete(AuditLog).where(AuditLog.resource == RESOURCE))
+        db.execute(delete(AuditCounter).where(AuditCounter.resource == RESOURCE))
+        db.commit()
+
+
+def _seed():
+    entries = [
+        {"timestamp": ts, "action": "UPDATE", "resource": RESOURCE, "success": i != 2}
+        for i, ts in enumerate(TIMESTAMPS)
+    ]
+    with SessionLocal() as db:
+        db.execute(insert(AuditLog), entries)
+        audit_counters.count_entries(db, entries)
+        db.commit()
+
+
+def _total(db, start=None, end=None):
+    return sum(n for _, resource, _, n in audit_counters.grouped_counts(db, start, end) if resource == RESOURCE)
+
+
+def test_counters_follow_inserts_and_ranges():
+    _cleanup()
+    try:
+        _seed()
+        with SessionLocal() as db:
+            days = dict(db.execute(
+                select(AuditCounter.day, AuditCounter.count)
+                .where(AuditCounter.resource == RESOURCE, AuditCounter.success.is_(True))
+            ).all())
+            assert days == {date(2003, 3, 10): 2, date(2003, 3, 12): 2}
+
+            assert _total(db) == 5
+            # whole days only
+            assert _total(db, datetime(2003, 3, 10, tzinfo=timezone.utc), datetime(2003, 3, 12, tzinfo=timezone.utc)) == 3
+            # partial days at both edges
+            assert _total(db, datetime(2003, 3, 10, 12, tzinfo=timezone.utc), datetime(2003, 3, 12, 12, tzinfo=timezone.utc)) == 3
+            # inside a single day
+            assert _total(db, datetime(2003, 3, 12, 0, 30, tzinfo=timezone.utc), datetime(2003, 3, 12, 2, tzinfo=timezone.utc)) == 1
+    finally:
+        _cleanup()
+
+
+def test_rebuild_recomputes_days_from_audit_log():
+    _cleanup()
+    try:
+        _seed()
+        with SessionLocal() as db:
+            db.execute(delete(AuditCounter).where(AuditCounter.resource == RESOURCE))
+            db.commit()
+            assert _total(db) == 0
+        audit_counters.rebuild(engine, since=date(2003, 3, 1), log=lambda _: None)
+        with SessionLocal() as db:
+            assert _total(db) == 5
+    finally:
+        _cleanup()
+
+
+def test_stats_endpoint_range_in_milliseconds(client):
+    _cleanup()
+    try:
+        _seed()
+        r = client.post("/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+        h = {"Authorization": f"Bearer {r.json()['access']}"}
+        r = client.get("/audit/stats", headers=h, params={
+            "start_ms": _ms(datetime(2003, 3, 10, 12, tzinfo=timezone.utc)),
+            "end_ms": _ms(datetime(2003, 3, 13, tzinfo=timezone.utc)),
+        })
+        assert r.status_code == 200
+        body = r.json()
+        assert body["resource_stats"] == {RESOURCE: 4}
+        assert body["total_logs"] == 4
+        assert body["success_stats"] == {"true": 3, "false": 1}
+        assert [f["timestamp"][:10] for f in body["recent_failures"]] == ["2003-03-11"]
+    finally:
+        _cleanup()
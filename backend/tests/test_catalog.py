@@ -0,0 +1,110 @@
+import os
+import uuid
+import requests
+import pytest
+from sqlalchemy import delete
+
+from app.db.session import SessionLocal
+from app.models.product import Product
+from app.services import catalog as catalog_service
+
+BASE = os.getenv("API_BASE", "http://127.0.0.1:8000")
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+
+@pytest.fixture(scope="session")
+def admin_token():
+    r = requests.post(f"{BASE}/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    assert r.status_code == 200
+    return r.json()["access"]
+
+
+def test_catalog_delta_sync(admin_token):
+    h = {"Authorization": f"Bearer {admin_token}"}
+
+    full = requests.get(f"{BASE}/catalog")
+    assert full.status_code == 200
+    snap = full.json()
+    assert snap["full"] is True and len(snap["products"]) > 0
+    etag = full.headers["ETag"]
+
+    # Nothing changed: 304
+    r = requests.get(f"{BASE}/catalog", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    v0 = snap["version"]
+    r = requests.get(f"{BASE}/catalog", params={"since": v0})
+    assert r.status_code == 200
+    assert r.json()["products"] == [] and r.json()["full"] is False
+
+    # Writes show up in the delta, in a newer version
+    cat = requests.post(f"{BASE}/categories", headers=h, json={"name": f"Cat {uuid.uuid4().hex[:6]}"}).json()
+    prod = requests.post(f"{BASE}/products", headers=h, json={
+        "name": f"Catalog {uuid.uuid4().hex[:6]}", "unit": "UN", "price": "2.00", "category_id": cat["id"]
+    }).json()
+    r = requests.get(f"{BASE}/catalog", params={"since": v0}, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    delta = r.json()
+    assert delta["version"] > v0
+    assert [p["id"] for p in delta["products"]] == [prod["id"]]
+    assert [c["id"] for c in delta["categories"]] == [cat["id"]]
+
+    # Stock changes bump the product too
+    v1 = delta["version"]
+    r = requests.post(f"{BASE}/stock/movements", headers=h, json={"product_id": prod["id"], "type": "ENTRADA", "qty": 4})
+    assert r.status_code == 201
+    delta = requests.get(f"{BASE}/catalog", params={"since": v1}).json()
+    assert [(p["id"], p["stock_qty"]) for p in delta["products"]] == [(prod["id"], 4)]
+
+    # Deletes are reported as tombstones
+    v2 = delta["version"]
+    assert requests.delete(f"{BASE}/products/{prod['id']}", headers=h).status_code == 204
+    delta = requests.get(f"{BASE}/catalog", params={"since": v2}).json()
+    assert delta["deleted"]["products"] == [prod["id"]]
+    assert delta["products"] == []
+
+
+def _sync(since=None):
+    with SessionLocal() as db:
+        version, _ = catalog_service.begin_snapshot(db)
+        return catalog_service.get_catalog(db, version=version, since=since)
+
+
+def test_delta_does_not_miss_a_writer_that_commits_late():
+    name = f"Late {uuid.uuid4().hex[:6]}"
+    early = SessionLocal()
+    try:
+        # the first writer takes its version, then commits after a later writer
+        early.add(Product(name=name, unit="UN", price=1))
+        early.flush()
+        with SessionLocal() as db:
+            db.add(Product(name=f"{name} b", unit="UN", price=1))
+            db.commit()
+        synced = _sync()
+        assert name not in [p["name"] for p in synced["products"]]
+        early.commit()
+
+        delta = _sync(since=synced["version"])
+        assert name in [p["name"] for p in delta["products"]]
+    finally:
+        early.rollback()
+        early.close()
+        with SessionLocal() as db:
+            db.execute(delete(Product).where(Product.name.like(f"{name}%")))
+            db.commit()
+
+
+def test_savepoint_keeps_the_transaction_version():
+    with SessionLocal() as db:
+        product = Product(name=f"Savepoint {uuid.uuid4().hex[:6]}", unit="UN", price=1)
+        db.add(product)
+        db.flush()
+        version = product.catalog_version
+        with db.begin_nested():
+            product.unit = "CX"
+        # the savepoint ending does not make the next flush ask for the version again
+        assert db.info["catalog_version"] == version
+        db.flush()
+        assert product.catalog_version == version
+        db.rollback()
@@ -0,0 +1,129 @@
+import os
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.db.session import SessionLocal
+from app.db.unit_of_work import unit_of_work
+from app.models.product import Product
+from app.services.stock import add_movement, apply_stock_changes, lock_products
+from app.models.stock_movement import MovementType
+
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+
+@pytest.fixture()
+def admin(client):
+    r = client.post("/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access']}"}
+
+
+@pytest.fixture()
+def product():
+    with unit_of_work() as db:
+        prod = Product(name="Versioned prod", unit="UN", price=1, stock_qty=10)
+        db.add(prod)
+        db.flush()
+        pid = prod.id
+    yield pid
+    with unit_of_work() as db:
+        db.execute(text("DELETE FROM stock_movements WHERE product_id = :p"), {"p": pid})
+        db.execute(text("DELETE FROM orders WHERE id IN (SELECT order_id FROM order_items WHERE product_id = :p)"), {"p": pid})
+        db.execute(text("DELETE FROM products WHERE id = :p"), {"p": pid})
+
+
+def test_product_if_match(client, admin, product):
+    r = client.put(f"/products/{product}", json={"low_stock_threshold": 2}, headers=admin)
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+    assert etag == f'"{r.json()["version"]}"'
+
+    # another admin edits first: the old ETag no longer matches
+    r = client.put(f"/products/{product}", json={"low_stock_threshold": 3}, headers={**admin, "If-Match": etag})
+    assert r.status_code == 200
+    r = client.put(f"/products/{product}", json={"low_stock_threshold": 4}, headers={**admin, "If-Match": etag})
+    assert r.status_code == 409
+    assert r.headers["ETag"] != etag
+
+    r = client.put(f"/products/{product}", json={"low_stock_threshold": 4}, headers={**admin, "If-Match": r.headers["ETag"]})
+    assert r.status_code == 200 and r.json()["low_stock_threshold"] == 4
+
+
+def test_stock_change_bumps_product_version(product):
+    with unit_of_work() as db:
+        version = db.get(Product, product).version
+        add_movement(db, product_id=product, type=MovementType.ENTRADA, qty=5)
+        assert db.get(Product, product).version == version + 1
+
+
+def test_concurrent_write_is_stale(product):
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        mine = first.get(Product, product)
+        theirs = second.get(Product, product)
+        theirs.stock_qty = 7
+        second.commit()
+
+        # read-modify-write on the old row: no silent overwrite
+        mine.stock_qty = 3
+        with pytest.raises(StaleDataError):
+            first.flush()
+    finally:
+        first.rollback()
+        first.close()
+        second.close()
+    with SessionLocal() as db:
+        assert db.get(Product, product).stock_qty == 7
+
+
+def test_order_if_match(client, admin, product):
+    church = client.post("/churches", json={"name": "Versioned church", "city": "V"}, headers=admin).json()
+    try:
+        order = client.post("/orders", json={"church_id": church["id"], "items": [{"product_id": product, "qty": 1}]},
+                            headers=admin).json()
+        r = client.get(f"/orders/{order['id']}", headers=admin)
+        etag = r.headers["ETag"]
+
+        # editing only the items still changes the version
+        r = client.put(f"/orders/{order['id']}", json={"items": [{"product_id": product, "qty": 2}]},
+                       headers={**admin, "If-Match": etag})
+        assert r.status_code == 200 and r.headers["ETag"] != etag
+
+        r = client.put(f"/orders/{order['id']}/approve", headers={**admin, "If-Match": etag})
+        assert r.status_code == 409
+        r = client.put(f"/orders/{order['id']}/approve", headers={**admin, "If-Match": r.headers["ETag"]})
+        assert r.status_code == 200 and r.json()["status"] == "APROVADO"
+    finally:
+        with unit_of_work() as db:
+            db.execute(text("DELETE FROM stock_movements WHERE product_id = :p"), {"p": product})
+            db.execute(text("DELETE FROM orders WHERE church_id = :c"), {"c": church["id"]})
+            db.execute(text("DELETE FROM churches WHERE id = :c"), {"c": church["id"]})
+
+
+def test_locked_stock_change_and_movement_do_not_deadlock(product):
+    """An order edit (products locked first) and a movement on the same product wait for each other."""
+    errors = []
+
+    def movement():
+        try:
+            with unit_of_work() as db:
+                add_movement(db, product_id=product, type=MovementType.ENTRADA, qty=1)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    with unit_of_work() as db:
+        prods = lock_products(db, [product])
+        worker = threading.Thread(target=movement)
+        worker.start()
+        # the movement now waits for the product row
+        worker.join(0.5)
+        apply_stock_changes(db, prods, {product: -2})
+    worker.join(10)
+
+    assert not worker.is_alive() and errors == []
+    with SessionLocal() as db:
+        assert db.get(Product, product).stock_qty == 9
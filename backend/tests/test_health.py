@@ -1,5 +1,12 @@
+import time
+
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, instrument_engine, pool_stats, recommended_pool_settings
 from app.main import app
+from app.services import health as health_checks
 
 
 def test_health():
@@ -7,3 +14,100 @@ def test_health():
     r = client.get("/health")
     assert r.status_code == 200
     assert r.json() == {"status": "healthy"}
+
+
+def test_pool_stats():
+    client = TestClient(app)
+    r = client.get("/health/pool")
+    assert r.status_code == 200
+    body = r.json()
+    assert {"primary", "async"} <= set(body["engines"])
+    primary = body["engines"]["primary"]
+    for key in ("checkout_wait", "pre_ping", "checked_out", "overflow", "timeouts"):
+        assert key in primary
+
+
+def test_recommended_pool_settings_fit_max_connections():
+    for workers in (1, 2, 4, 8):
+        rec = recommended_pool_settings(workers, 100)
+        # 2 engines per worker, 10 connections reserved
+        assert workers * 2 * (rec["pool_size"] + rec["max_overflow"]) <= 90
+
+
+def test_leak_detection_reports_acquisition_stack():
+    engine = create_engine(settings.database_url, poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0)
+    stats = instrument_engine(engine, "test-leak", leak_threshold=0.05)
+    try:
+        conn = engine.connect()
+        conn.execute(text("SELECT 1"))
+        time.sleep(0.1)
+        held = stats.long_held()
+        assert len(held) == 1
+        assert "test_leak_detection_reports_acquisition_stack" in held[0]["stack"]
+        conn.close()
+        assert stats.long_held(0) == []
+        assert stats.snapshot()["checkout_wait"]["count"] == 1
+    finally:
+        pool_stats.pop("test-leak", None)
+        engine.dispose()
+
+
+def test_pre_ping_timed_on_reused_connections():
+    engine = create_engine(
+        settings.database_url, poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=2, pool_pre_ping=True
+    )
+    stats = instrument_engine(engine, "test-ping")
+    try:
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        snapshot = stats.snapshot()
+        # the first checkout opened the connection: not pinged
+        assert snapshot["connect"]["count"] == 1 and snapshot["pre_ping"]["count"] == 2
+        assert snapshot["max_overflow"] == 2
+    finally:
+        pool_stats.pop("test-ping", None)
+        engine.dispose()
+
+
+def test_ready_and_deep():
+    for check in list(health_checks.ready_checks.values()) + list(health_checks.deep_checks.values()):
+        check.reset()
+    client = TestClient(app)
+    r = client.get("/health/ready")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] in ("ok", "degraded")
+    assert body["checks"]["database"]["status"] == "ok"
+    assert body["checks"]["database"]["latency_ms"] >= 0
+    assert "primary" in body["checks"]["pool"]["engines"]
+    assert "depth" in body["checks"]["audit_queue"]
+
+    r = client.get("/health/deep")
+    assert r.status_code == 200
+    checks = r.json()["checks"]
+    assert checks["storage"]["status"] in ("ok", "skipped", "fail")
+    assert {"database", "pool", "audit_queue", "smtp"} <= set(checks)
+
+
+def test_health_checks_are_cached():
+    calls = []
+    check = health_checks.CachedCheck(lambda: calls.append(1) or {"status": "ok"}, lambda: 60)
+    assert check.get()["status"] == "ok"
+    check.get()
+    assert len(calls) == 1
+    failing = health_checks.CachedCheck(lambda: 1 / 0, lambda: 60)
+    result = failing.get()
+    assert result["status"] == "fail" and "ZeroDivisionError" in result["error"]
+
+
+def test_ready_fails_when_database_is_down(monkeypatch):
+    down = create_engine("postgresql+psycopg2://nobody@127.0.0.1:1/x")
+    monkeypatch.setitem(
+        health_checks.ready_checks, "database",
+        health_checks.CachedCheck(lambda: health_checks.check_database(down, "down"), lambda: 60),
+    )
+    client = TestClient(app)
+    r = client.get("/health/ready")
+    assert r.status_code == 503
+    assert r.json()["checks"]["database"]["status"] == "fail"
@@ -0,0 +1,141 @@
+import os
+import requests
+import pytest
+
+BASE = os.getenv("API_BASE", "http://127.0.0.1:8000")
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+
+@pytest.fixture(scope="session")
+def admin_token():
+    r = requests.post(f"{BASE}/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    assert r.status_code == 200
+    return r.json()["access"]
+
+
+def test_bulk_count_submission(admin_token):
+    h = {"Authorization": f"Bearer {admin_token}"}
+
+    inv = requests.post(f"{BASE}/inventory", headers=h, json={"notes": "bulk count test"})
+    assert inv.status_code == 201
+    inv = inv.json()
+    assert len(inv["items"]) >= 3
+    a, b, c = inv["items"][:3]
+
+    # JSON: unknown item and negative qty are reported, repeated item keeps the last value
+    r = requests.patch(f"{BASE}/inventory/{inv['id']}/items", headers=h, json={"items": [
+        {"item_id": a["id"], "counted_qty": 1},
+        {"item_id": 999999999, "counted_qty": 1},
+        {"item_id": b["id"], "counted_qty": -1},
+        {"item_id": a["id"], "counted_qty": 4},
+    ]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["updated"] == 1
+    assert [e["row"] for e in body["errors"]] == [2, 3]
+
+    # CSV from scanner, keyed by product id and separated by ';'
+    csv_data = f"product_id;counted_qty\n{b['product_id']};2\nxyz;5\n{c['product_id']};0\n"
+    r = requests.patch(f"{BASE}/inventory/{inv['id']}/items/csv", headers=h,
+                       files={"file": ("counts.csv", csv_data.encode(), "text/csv")})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["updated"] == 2
+    assert [e["row"] for e in body["errors"]] == [3]
+
+    items = {it["id"]: it for it in requests.get(f"{BASE}/inventory/{inv['id']}", headers=h).json()["items"]}
+    assert items[a["id"]]["counted_qty"] == 4
+    assert items[a["id"]]["difference"] == 4 - a["expected_qty"]
+    assert items[b["id"]]["counted_qty"] == 2
+    assert items[c["id"]]["counted_qty"] == 0
+
+
+def test_finalize_applies_adjustments(admin_token):
+    h = {"Authorization": f"Bearer {admin_token}"}
+
+    inv = requests.post(f"{BASE}/inventory", headers=h, json={"notes": "finalize test"}).json()
+    items = inv["items"]
+    assert len(items) >= 3
+    up, down = items[0], next(it for it in items[1:] if it["expected_qty"] >= 2)
+
+    # Finalizing with uncounted items is refused
+    r = requests.post(f"{BASE}/inventory/{inv['id']}/finalize", headers=h)
+    assert r.status_code == 400
+
+    counts = {it["id"]: it["expected_qty"] for it in items}
+    counts[up["id"]] += 3
+    counts[down["id"]] -= 2
+    r = requests.patch(f"{BASE}/inventory/{inv['id']}/items", headers=h, json={
+        "items": [{"item_id": k, "counted_qty": v} for k, v in counts.items()]
+    })
+    assert r.status_code == 200 and r.json()["errors"] == []
+
+    r = requests.post(f"{BASE}/inventory/{inv['id']}/finalize", headers=h)
+    assert r.status_code == 200
+    fin = r.json()
+    assert fin["status"] == "FINALIZADO"
+    adjusted = {it["id"] for it in fin["items"] if it["adjusted"]}
+    assert adjusted == {up["id"], down["id"]}
+
+    # Stock now matches the counted quantities
+    prods = {p["id"]: p for p in requests.get(f"{BASE}/products", headers=h, params={"limit": 500}).json()["data"]}
+    assert prods[up["product_id"]]["stock_qty"] == up["expected_qty"] + 3
+    assert prods[down["product_id"]]["stock_qty"] == down["expected_qty"] - 2
+
+    # One adjustment movement per product with a difference
+    note = f"Ajuste de inventário #{inv['id']}"
+    for item, mtype, qty in ((up, "ENTRADA", 3), (down, "SAIDA_MANUAL", 2)):
+        movs = requests.get(f"{BASE}/stock/movements", headers=h,
+                            params={"product_id": item["product_id"], "type": mtype, "limit": 50}).json()["data"]
+        movs = [m for m in movs if m["note"] == note]
+        assert len(movs) == 1 and movs[0]["qty"] == qty
+
+    # Second finalize is rejected and does not adjust again
+    r = requests.post(f"{BASE}/inventory/{inv['id']}/finalize", headers=h)
+    assert r.status_code == 400
+
+
+def test_inventory_summary_and_item_pages(admin_token):
+    h = {"Authorization": f"Bearer {admin_token}"}
+
+    inv = requests.post(f"{BASE}/inventory", headers=h, json={"notes": "pagination test"}).json()
+    items = inv["items"]
+    first = items[0]
+    r = requests.patch(f"{BASE}/inventory/{inv['id']}/items", headers=h, json={
+        "items": [{"item_id": first["id"], "counted_qty": first["expected_qty"] + 5}]
+    })
+    assert r.status_code == 200
+
+    # Summary listing carries counts instead of items
+    r = requests.get(f"{BASE}/inventory", headers=h, params={"limit": 5})
+    assert r.status_code == 200
+    summary = next(s for s in r.json()["data"] if s["id"] == inv["id"])
+    assert "items" not in summary
+    assert summary["total_items"] == len(items)
+    assert summary["counted_items"] == 1
+    assert summary["pending_items"] == len(items) - 1
+    assert summary["total_difference"] == 5
+
+    # Cursor pagination walks every item exactly once
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 7}
+        if cursor is not None:
+            params["cursor"] = cursor
+        page = requests.get(f"{BASE}/inventory/{inv['id']}/items", headers=h, params=params).json()
+        seen += [it["id"] for it in page["data"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [it["id"] for it in items]
+
+    # Filters
+    page = requests.get(f"{BASE}/inventory/{inv['id']}/items", headers=h, params={"differences": True}).json()
+    assert [it["id"] for it in page["data"]] == [first["id"]]
+    page = requests.get(f"{BASE}/inventory/{inv['id']}/items", headers=h, params={"uncounted": True}).json()
+    assert first["id"] not in [it["id"] for it in page["data"]]
+    page = requests.get(f"{BASE}/inventory/{inv['id']}/items", headers=h, params={"search": first["product_name"]}).json()
+    assert first["id"] in [it["id"] for it in page["data"]]
+
+    assert requests.get(f"{BASE}/inventory/999999999/items", headers=h).status_code == 404
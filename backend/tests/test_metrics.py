@@ -0,0 +1,86 @@
+import os
+
+from sqlalchemy import delete, select
+
+from app.core.metrics import Histogram, stock_movements
+from app.db.session import SessionLocal
+from app.models.audit_log import AuditLog
+from app.models.product import Product
+from app.services.audit_writer import AuditWriter, audit_entry
+
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("t_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        h.labels("/x").observe(value)
+    lines = h.render()
+    assert 't_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{route="/x",le="1"} 3' in lines
+    assert 't_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 't_seconds_count{route="/x"} 4' in lines
+
+
+def test_metrics_endpoint_and_stock_counter(client):
+    r = client.post("/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    h = {"Authorization": f"Bearer {r.json()['access']}"}
+    with SessionLocal() as db:
+        product_id = db.scalar(select(Product.id).limit(1))
+    assert product_id is not None
+
+    before = stock_movements.labels("ENTRADA").value
+    r = client.post("/stock/movements", headers=h, json={"product_id": product_id, "type": "ENTRADA", "qty": 1})
+    assert r.status_code == 201
+    assert stock_movements.labels("ENTRADA").value == before + 1
+
+    client.get("/audit", headers=h, params={"limit": 1})
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert 'ccb_http_request_duration_seconds_bucket{method="GET",route="/audit",status="200",le="+Inf"}' in body
+    assert 'ccb_stock_movements_total{type="ENTRADA"}' in body
+    assert "ccb_db_pool_checked_out" in body
+    assert "ccb_audit_queue_depth" in body
+
+
+def test_audit_writer_batches_entries():
+    writer = AuditWriter(SessionLocal, batch_size=10, flush_interval=0.05)
+    marker = "metrics-test-writer"
+    try:
+        for i in range(25):
+            assert writer.submit(audit_entry(
+                action="READ", resource="AUDIT", ip_address="127.0.0.1",
+                user_agent=marker, extra_metadata={"path": f"/t/{i}"},
+            ))
+        assert writer.flush()
+        assert writer.depth() == 0
+        with SessionLocal() as db:
+            rows = db.scalars(select(AuditLog).where(AuditLog.user_agent == marker)).all()
+            assert len(rows) == 25
+    finally:
+        writer.stop()
+        with SessionLocal() as db:
+            db.execute(delete(AuditLog).where(AuditLog.user_agent == marker))
+            db.commit()
+
+
+def test_audit_writer_keeps_the_good_rows_of_a_rejected_batch():
+    writer = AuditWriter(SessionLocal, batch_size=10, flush_interval=0.05)
+    marker = "metrics-test-bad-row"
+    try:
+        for i in range(5):
+            # resource_id is an integer column: the third row is rejected
+            resource_id = "not-a-number" if i == 2 else i
+            assert writer.submit(audit_entry(action="READ", resource="AUDIT", resource_id=resource_id, user_agent=marker))
+        assert writer.flush()
+        with SessionLocal() as db:
+            rows = db.scalars(select(AuditLog.resource_id).where(AuditLog.user_agent == marker)).all()
+        assert sorted(rows) == [0, 1, 3, 4]
+    finally:
+        writer.stop()
+        with SessionLocal() as db:
+            db.execute(delete(AuditLog).where(AuditLog.user_agent == marker))
+            db.commit()
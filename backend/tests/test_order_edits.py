@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import event, select, text
+
+from app.db.session import SessionLocal
+from app.db.unit_of_work import unit_of_work
+from app.models.church import Church
+from app.models.order import Order
+from app.models.product import Product
+from app.models.stock_movement import StockMovement
+from app.models.user import User
+from app.schemas.order import OrderItemCreate, OrderUpdate
+from app.services.orders import approve_order, create_order, update_order
+
+
+@pytest.fixture()
+def approved_order():
+    """Approved order with 2 x A and 3 x B; C is not in it. All stock starts at 10."""
+    with unit_of_work() as db:
+        products = [Product(name=f"Edit prod {n}", unit="UN", price=2, stock_qty=10) for n in "ABC"]
+        db.add_all(products)
+        db.flush()
+        a, b, c = (p.id for p in products)
+        order = create_order(
+            db,
+            requester_id=db.scalar(select(User.id).order_by(User.id).limit(1)),
+            church_id=db.scalar(select(Church.id).order_by(Church.id).limit(1)),
+            items=[(a, 2), (b, 3)],
+        )
+        approve_order(db, order=order)
+        order_id = order.id
+    yield order_id, a, b, c
+    with unit_of_work() as db:
+        params = {"o": order_id, "p": [a, b, c]}
+        db.execute(text("DELETE FROM stock_movements WHERE product_id = ANY(:p)"), params)
+        db.execute(text("DELETE FROM orders WHERE id = :o"), params)
+        db.execute(text("DELETE FROM products WHERE id = ANY(:p)"), params)
+
+
+def _state(order_id, products):
+    with SessionLocal() as db:
+        stock = dict(db.execute(select(Product.id, Product.stock_qty).where(Product.id.in_(products))).all())
+        items = {it.product_id: (it.id, it.qty) for it in db.get(Order, order_id).items}
+        movements = db.execute(
+            select(StockMovement.product_id, StockMovement.type, StockMovement.qty)
+            .where(StockMovement.related_order_id == order_id)
+            .order_by(StockMovement.id)
+        ).all()
+        return stock, items, [(pid, t.value, qty) for pid, t, qty in movements]
+
+
+def _edit(order_id, lines):
+    with unit_of_work() as db:
+        order = db.get(Order, order_id)
+        data = OrderUpdate(items=[OrderItemCreate(product_id=pid, qty=qty) for pid, qty in lines])
+        update_order(db, order=order, data=data, is_admin=True)
+
+
+def test_edit_applies_only_the_net_change(approved_order):
+    order_id, a, b, c = approved_order
+    _, items_before, _ = _state(order_id, [a, b, c])
+
+    _edit(order_id, [(a, 4), (c, 1)])
+
+    stock, items, movements = _state(order_id, [a, b, c])
+    assert stock == {a: 6, b: 10, c: 9}
+    # A keeps its row, B's row is gone, C gets a new one
+    assert items[a] == (items_before[a][0], 4)
+    assert set(items) == {a, c} and items[c][1] == 1
+    # approval movements stay; the edit appends compensating ones
+    assert movements == [
+        (a, "SAIDA_PEDIDO", 2), (b, "SAIDA_PEDIDO", 3),
+        (a, "SAIDA_PEDIDO", 2), (b, "ESTORNO", 3), (c, "SAIDA_PEDIDO", 1),
+    ]
+
+
+def test_unchanged_edit_writes_nothing(approved_order):
+    order_id, a, b, c = approved_order
+    before = _state(order_id, [a, b, c])
+    with unit_of_work() as db:
+        order = db.get(Order, order_id)
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.get_bind(), "before_cursor_execute", listener)
+        try:
+            data = OrderUpdate(items=[OrderItemCreate(product_id=a, qty=2), OrderItemCreate(product_id=b, qty=3)])
+            update_order(db, order=order, data=data, is_admin=True)
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert statements == []
+    assert _state(order_id, [a, b, c]) == before
+
+
+def test_insufficient_stock_changes_nothing(approved_order):
+    order_id, a, b, c = approved_order
+    before = _state(order_id, [a, b, c])
+    # 8 left in stock + the 2 already taken by the order: 11 does not fit
+    with pytest.raises(ValueError):
+        _edit(order_id, [(a, 11), (b, 1)])
+    assert _state(order_id, [a, b, c]) == before
+
+    _edit(order_id, [(a, 10), (b, 3)])
+    stock, items, _ = _state(order_id, [a, b, c])
+    assert stock[a] == 0 and items[a][1] == 10
@@ -0,0 +1,50 @@
+import os
+import uuid
+import requests
+import pytest
+
+BASE = os.getenv("API_BASE", "http://127.0.0.1:8000")
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+
+@pytest.fixture(scope="session")
+def admin_token():
+    r = requests.post(f"{BASE}/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    assert r.status_code == 200
+    return r.json()["access"]
+
+
+def test_product_search_and_autocomplete(admin_token):
+    h = {"Authorization": f"Bearer {admin_token}"}
+    tag = uuid.uuid4().hex[:6]
+
+    # Warm the autocomplete index, then create a product: the write must show up
+    requests.get(f"{BASE}/products/autocomplete", params={"q": "a"})
+    name = f"P\u00e3o Franc\u00eas {tag}"
+    r = requests.post(f"{BASE}/products", headers=h, json={"name": name, "unit": "UN", "price": "1.00", "max_qty_per_order": 3})
+    assert r.status_code == 201
+    pid = r.json()["id"]
+
+    # Accent-insensitive, every word matched by prefix
+    r = requests.get(f"{BASE}/products/autocomplete", params={"q": f"pao fran {tag}"})
+    assert r.status_code == 200
+    assert [s["id"] for s in r.json()] == [pid]
+
+    # Rename is picked up too
+    r = requests.put(f"{BASE}/products/{pid}", headers=h, json={"name": f"Biscoito {tag}"})
+    assert r.status_code == 200
+    # without the tag: "Biscoito <tag>" shares its trigrams and may still match "pao fran <tag>" by similarity
+    old_name = requests.get(f"{BASE}/products/autocomplete", params={"q": "pao frances"}).json()
+    assert pid not in [s["id"] for s in old_name]
+    assert [s["id"] for s in requests.get(f"{BASE}/products/autocomplete", params={"q": f"bisc {tag}"}).json()] == [pid]
+
+    # Listing returns page and total together
+    r = requests.get(f"{BASE}/products", params={"search": tag})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["total"] == 1
+    assert [p["id"] for p in body["data"]] == [pid]
+    assert body["data"][0]["max_qty_per_order"] == 3
+    r = requests.get(f"{BASE}/products", params={"search": tag, "page": 2})
+    assert r.json()["total"] == 1 and r.json()["data"] == []
@@ -0,0 +1,56 @@
+import logging
+import os
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.profiling import fingerprint, route_profiles
+from app.db.query_stats import QueryBudget, QueryStats, current_query_stats
+from app.db.session import SessionLocal
+
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+
+def test_fingerprint_normalizes_values():
+    a = fingerprint("SELECT * FROM products WHERE id IN (%(id_1_1)s, %(id_1_2)s) AND name = 'Arroz' LIMIT 10")
+    b = fingerprint("SELECT *\n  FROM products WHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s) AND name = 'Feijão' LIMIT 50")
+    assert a == b == "SELECT * FROM products WHERE id IN (...) AND name = ? LIMIT ?"
+    assert fingerprint("SELECT $1::integer, t1.id FROM t1") == "SELECT ?::integer, t1.id FROM t1"
+    assert fingerprint("INSERT INTO x (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)") == "INSERT INTO x (a, b) VALUES (...), ..."
+
+
+def test_slow_queries_are_logged(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_query_ms", 50)
+    # alembic's fileConfig (run by the migration fixture) disables existing loggers
+    monkeypatch.setattr(logging.getLogger("app.slow_queries"), "disabled", False)
+    stats = QueryStats(QueryBudget("test", 0, 0, 0), route="GET /test")
+    token = current_query_stats.set(stats)
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+            with SessionLocal() as db:
+                db.execute(text("SELECT 1"))
+                db.execute(text("SELECT pg_sleep(0.1)"))
+    finally:
+        current_query_stats.reset(token)
+    slow = [r.getMessage() for r in caplog.records if r.name == "app.slow_queries"]
+    assert len(slow) == 1
+    assert "route=GET /test" in slow[0] and "pg_sleep(?)" in slow[0]
+    assert stats.slowest[0][1] == "SELECT pg_sleep(0.1)"
+
+
+def test_server_timing_and_route_profile(client, monkeypatch):
+    r = client.post("/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    h = {"Authorization": f"Bearer {r.json()['access']}"}
+    monkeypatch.setattr(settings, "debug", True)
+    route_profiles.reset()
+
+    r = client.get("/audit", headers=h, params={"limit": 5})
+    assert r.status_code == 200
+    assert int(r.headers["X-DB-Queries"]) >= 1
+    assert r.headers["Server-Timing"].startswith("db;dur=")
+
+    body = client.get("/health/queries", headers=h).json()
+    audit = next(route for route in body["routes"] if route["route"] == "GET /audit")
+    assert audit["requests"] == 1
+    assert any("audit_log" in s["sql"] for s in audit["slowest"])
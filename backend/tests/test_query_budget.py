@@ -0,0 +1,82 @@
+import os
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.core.config import settings
+from app.db.query_stats import (
+    QueryBudget,
+    QueryBudgetExceeded,
+    QueryStats,
+    ReportTooLarge,
+    current_query_stats,
+    fetch_limited,
+)
+from app.db.session import SessionLocal
+
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+
+@pytest.fixture()
+def stats():
+    s = QueryStats(QueryBudget("test", statement_timeout_ms=200, max_queries=3, max_db_ms=0))
+    token = current_query_stats.set(s)
+    yield s
+    current_query_stats.reset(token)
+
+
+def test_counts_statements_of_the_request(stats):
+    with SessionLocal() as db:
+        for _ in range(3):
+            db.execute(text("SELECT 1"))
+        # SET LOCAL statement_timeout is not charged to the request
+        assert db.execute(text("SHOW statement_timeout")).scalar() == "200ms"
+    assert stats.count == 4
+    assert stats.db_time > 0
+    assert stats.over_budget()
+
+
+def test_statement_timeout_is_a_budget_error(stats):
+    with SessionLocal() as db:
+        with pytest.raises(QueryBudgetExceeded, match="tempo limite"):
+            db.execute(text("SELECT pg_sleep(2)"))
+
+
+def test_enforced_budget_rejects_extra_queries(stats, monkeypatch):
+    monkeypatch.setattr(settings, "query_budget_enforce", True)
+    with SessionLocal() as db:
+        for _ in range(4):
+            db.execute(text("SELECT 1"))
+        with pytest.raises(QueryBudgetExceeded):
+            db.execute(text("SELECT 1"))
+
+
+def test_report_max_rows():
+    query = select(func.generate_series(1, 5).label("n"))
+    with SessionLocal() as db:
+        assert len(fetch_limited(db, query, max_rows=5)) == 5
+        with pytest.raises(ReportTooLarge):
+            fetch_limited(db, query, max_rows=3)
+
+
+def test_report_too_large_is_a_400(client, monkeypatch):
+    r = client.post("/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    h = {"Authorization": f"Bearer {r.json()['access']}"}
+    monkeypatch.setattr(settings, "report_max_rows", 1)
+    r = client.get("/reports/products", headers=h)
+    assert r.status_code == 400
+    assert "refine os filtros" in r.json()["detail"]
+
+
+def test_over_budget_request_is_rejected(client, monkeypatch):
+    r = client.post("/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    assert r.status_code == 200
+    h = {"Authorization": f"Bearer {r.json()['access']}"}
+    assert client.get("/audit", headers=h).status_code == 200
+
+    monkeypatch.setattr(settings, "query_budget_enforce", True)
+    monkeypatch.setattr(settings, "report_query_budget_max_queries", 1)
+    r = client.get("/audit", headers=h)
+    assert r.status_code == 503
+    assert "orçamento" in r.json()["detail"]
@@ -0,0 +1,76 @@
+import os
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.security import decode_token
+from app.db import session as db_session
+from app.db.replica import RecentWriters, recent_writers
+from app.db.session import async_database_url
+
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+
+@pytest.fixture()
+def stub_replica(monkeypatch):
+    """A "replica" pointing at the test database, counting the statements it runs."""
+    counter = {"statements": 0}
+    sync_engine = create_engine(settings.database_url, poolclass=NullPool)
+    async_engine = create_async_engine(async_database_url(settings.database_url), poolclass=NullPool)
+
+    def _count(*args):
+        counter["statements"] += 1
+
+    event.listen(sync_engine, "before_cursor_execute", _count)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count)
+    monkeypatch.setattr(db_session, "replica_enabled", True)
+    monkeypatch.setattr(db_session, "ReplicaSessionLocal", sessionmaker(bind=sync_engine, autoflush=False))
+    monkeypatch.setattr(db_session, "AsyncReplicaSessionLocal", async_sessionmaker(bind=async_engine, expire_on_commit=False))
+    yield counter
+    sync_engine.dispose()
+
+
+def test_recent_writers_window():
+    writers = RecentWriters(window=0.1)
+    assert not writers.wrote_recently("1")
+    writers.mark("1")
+    assert writers.wrote_recently("1")
+    assert not writers.wrote_recently("2")
+    assert not writers.wrote_recently(None)
+    time.sleep(0.15)
+    assert not writers.wrote_recently("1")
+
+
+def test_reads_go_to_replica_until_user_writes(client, stub_replica, monkeypatch):
+    monkeypatch.setattr(recent_writers, "window", 60.0)
+    r = client.post("/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    assert r.status_code == 200
+    token = r.json()["access"]
+    h = {"Authorization": f"Bearer {token}"}
+    admin = decode_token(token)["sub"]
+    recent_writers._until.pop(admin, None)
+
+    # anonymous and authenticated reads hit the replica
+    assert client.get("/categories").status_code == 200
+    assert client.get("/audit", headers=h).status_code == 200
+    on_replica = stub_replica["statements"]
+    assert on_replica > 0
+
+    # after a write, the same user reads from the primary
+    r = client.post("/categories", headers=h, json={"name": f"Replica RYW {time.time()}"})
+    assert r.status_code == 201
+    assert recent_writers.wrote_recently(admin)
+    assert client.get("/audit", headers=h).status_code == 200
+    assert stub_replica["statements"] == on_replica
+
+    # other (anonymous) readers keep using the replica
+    assert client.get("/categories").status_code == 200
+    assert stub_replica["statements"] > on_replica
+
+    client.delete(f"/categories/{r.json()['id']}", headers=h)
@@ -0,0 +1,54 @@
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.serialization import use_fast_json_without_response_model
+
+
+class Item(BaseModel):
+    id: int
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/typed", response_model=Item)
+    def typed():
+        return {"id": 1}
+
+    @app.get("/untyped")
+    def untyped():
+        return {"id": 2}
+
+    @app.get("/text", response_class=PlainTextResponse)
+    def plain():
+        return "ok"
+
+    return app
+
+
+def _classes(app):
+    return {
+        route.path: getattr(route.response_class, "value", route.response_class)
+        for route in app.routes
+        if route.path in ("/typed", "/untyped", "/text")
+    }
+
+
+def test_only_routes_without_response_model_use_orjson(monkeypatch):
+    monkeypatch.setattr(settings, "fast_json_responses", True)
+    app = _app()
+    use_fast_json_without_response_model(app)
+    assert _classes(app) == {"/typed": JSONResponse, "/untyped": ORJSONResponse, "/text": PlainTextResponse}
+    client = TestClient(app)
+    assert client.get("/untyped").json() == {"id": 2}
+    assert client.get("/typed").json() == {"id": 1}
+
+
+def test_disabled_keeps_json_response(monkeypatch):
+    monkeypatch.setattr(settings, "fast_json_responses", False)
+    app = _app()
+    use_fast_json_without_response_model(app)
+    assert _classes(app)["/untyped"] is JSONResponse
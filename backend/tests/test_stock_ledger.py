@@ -0,0 +1,166 @@
+import os
+from datetime import date, datetime, timezone
+
+import pytest
+import requests
+from sqlalchemy import select, text
+
+from app.db.session import SessionLocal, engine
+from app.db.unit_of_work import unit_of_work
+from app.models.church import Church
+from app.models.order import Order
+from app.models.product import Product
+from app.models.stock_movement import MovementType, StockMovement
+from app.models.stock_snapshot import StockSnapshot
+from app.models.user import User
+from app.services.orders import approve_order, cancel_order, create_order
+from app.services.products import create_product
+from app.services.reports import get_user_movements_report
+from app.services.stock_ledger import create_opening_snapshot, end_of_day, reconcile, stock_as_of, take_snapshots
+
+BASE = os.getenv("API_BASE", "http://127.0.0.1:8000")
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+
+def _at(day):
+    return datetime(2003, 1, day, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def product_ids():
+    ids = []
+    yield ids
+    with unit_of_work() as db:
+        params = {"p": ids}
+        db.execute(text("DELETE FROM stock_movements WHERE product_id = ANY(:p)"), params)
+        db.execute(text(
+            "DELETE FROM orders WHERE id IN (SELECT order_id FROM order_items WHERE product_id = ANY(:p))"
+        ), params)
+        db.execute(text("DELETE FROM products WHERE id = ANY(:p)"), params)
+
+
+@pytest.fixture()
+def history(product_ids):
+    """Product created on 2003-01-01 with 10 in stock: -3 on the 2nd, +5 on the 4th, -2 (ESTORNO +2) on the 6th."""
+    with unit_of_work() as db:
+        product = Product(name="Ledger prod", unit="UN", price=1, stock_qty=12, created_at=_at(1))
+        db.add(product)
+        db.flush()
+        db.add_all([
+            StockMovement(product_id=product.id, type=t, qty=qty, created_at=_at(day))
+            for day, t, qty in [
+                (1, MovementType.ENTRADA, 10),
+                (2, MovementType.SAIDA_MANUAL, 3),
+                (4, MovementType.ENTRADA, 5),
+                (6, MovementType.SAIDA_PEDIDO, 2),
+                (6, MovementType.ESTORNO, 2),
+            ]
+        ])
+        product_ids.append(product.id)
+    return product_ids[0]
+
+
+def _levels(product_id, day):
+    with SessionLocal() as db:
+        return [r["qty"] for r in stock_as_of(db, end_of_day(date(2003, 1, day)), product_id=product_id)]
+
+
+def _drift(products):
+    return [(r["product_id"], r["stock_qty"], r["ledger_qty"]) for r in reconcile(engine) if r["product_id"] in products]
+
+
+def test_stock_as_of_replays_the_ledger(history):
+    assert _levels(history, 1) == [10]
+    assert _levels(history, 3) == [7]
+    assert _levels(history, 6) == [12]
+    # the product did not exist yet
+    with SessionLocal() as db:
+        assert stock_as_of(db, datetime(2002, 12, 31, tzinfo=timezone.utc), product_id=history) == []
+
+
+def test_snapshots_give_the_same_stock(history):
+    now = datetime.now(timezone.utc)
+    take_snapshots(engine, datetime(2003, 1, 3, tzinfo=timezone.utc), now=now)
+    # nothing moved since: no new snapshot
+    take_snapshots(engine, datetime(2003, 1, 3, 6, tzinfo=timezone.utc), now=now)
+    with SessionLocal() as db:
+        snapshots = db.execute(
+            select(StockSnapshot.taken_at, StockSnapshot.qty).where(StockSnapshot.product_id == history)
+        ).all()
+    assert snapshots == [(datetime(2003, 1, 3, tzinfo=timezone.utc), 7)]
+    # from the snapshot forward, and back from it before
+    assert [_levels(history, day) for day in (1, 3, 6)] == [[10], [7], [12]]
+    assert _drift([history]) == []
+
+    with pytest.raises(ValueError):
+        take_snapshots(engine, now, now=now)
+
+
+def test_snapshot_and_movements_share_the_clock_on_a_non_utc_session(product_ids):
+    with unit_of_work() as db:
+        # a naive UTC created_at would be read as Tokyo time, 9 h before the snapshot
+        db.execute(text("SET LOCAL TimeZone = 'Asia/Tokyo'"))
+        product = Product(name="Ledger tz", unit="UN", price=1, stock_qty=4)
+        db.add(product)
+        db.flush()
+        product_ids.append(product.id)
+        create_opening_snapshot(db.connection())
+        db.add(StockMovement(product_id=product.id, type=MovementType.ENTRADA, qty=1))
+        product.stock_qty = 5
+    assert _drift(product_ids) == []
+
+
+def test_cancel_appends_reversals_and_reconciles(product_ids):
+    with unit_of_work() as db:
+        a = create_product(db, name="Ledger cancel A", unit="UN", price=1, stock_qty=10)
+        b = create_product(db, name="Ledger cancel B", unit="UN", price=1, stock_qty=5)
+        product_ids.extend([a.id, b.id])
+        order = create_order(
+            db,
+            requester_id=db.scalar(select(User.id).order_by(User.id).limit(1)),
+            church_id=db.scalar(select(Church.id).order_by(Church.id).limit(1)),
+            items=[(a.id, 4), (b.id, 1)],
+        )
+        approve_order(db, order=order)
+        order_id, church_id = order.id, order.church_id
+    with unit_of_work() as db:
+        cancel_order(db, order=db.get(Order, order_id))
+
+    with SessionLocal() as db:
+        stock = dict(db.execute(select(Product.id, Product.stock_qty).where(Product.id.in_(product_ids))).all())
+        movements = db.execute(
+            select(StockMovement.product_id, StockMovement.type, StockMovement.qty)
+            .where(StockMovement.product_id.in_(product_ids))
+            .order_by(StockMovement.id)
+        ).all()
+    assert stock == {a.id: 10, b.id: 5}
+    assert [(pid, t.value, qty) for pid, t, qty in movements] == [
+        (a.id, "ENTRADA", 10), (b.id, "ENTRADA", 5),
+        (a.id, "SAIDA_PEDIDO", 4), (b.id, "SAIDA_PEDIDO", 1),
+        (a.id, "ESTORNO", 4), (b.id, "ESTORNO", 1),
+    ]
+    assert _drift(product_ids) == []
+
+    # the church sees the exits and their reversals
+    with SessionLocal() as db:
+        report = get_user_movements_report(db, church_id).model_dump(mode="json")
+    assert sorted((m["type"], m["quantity"]) for m in report["movements"] if m["order_id"] == order_id) == [
+        ("ESTORNO", 1), ("ESTORNO", 4), ("SAIDA_PEDIDO", 1), ("SAIDA_PEDIDO", 4),
+    ]
+
+    # a stock change outside the ledger is reported
+    with unit_of_work() as db:
+        db.execute(text("UPDATE products SET stock_qty = 7 WHERE id = :p"), {"p": b.id})
+    assert _drift(product_ids) == [(b.id, 7, 5)]
+
+
+def test_stock_as_of_endpoint(history):
+    r = requests.post(f"{BASE}/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    h = {"Authorization": f"Bearer {r.json()['access']}"}
+    r = requests.get(f"{BASE}/stock/as-of", params={"date": "2003-01-03", "product_id": history}, headers=h)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["date"] == "2003-01-03"
+    assert [(row["product_id"], row["qty"]) for row in body["data"]] == [(history, 7)]
+    assert requests.get(f"{BASE}/stock/as-of", params={"date": "2003-01-03"}).status_code in (401, 403)
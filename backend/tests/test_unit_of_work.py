@@ -0,0 +1,59 @@
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.db.unit_of_work import after_commit, savepoint, unit_of_work
+
+
+def _category_names(prefix):
+    with SessionLocal() as db:
+        return db.scalars(text("SELECT name FROM categories WHERE name LIKE :p ORDER BY name"), {"p": prefix + "%"}).all()
+
+
+def _cleanup(prefix):
+    with unit_of_work() as db:
+        db.execute(text("DELETE FROM categories WHERE name LIKE :p"), {"p": prefix + "%"})
+
+
+def test_unit_of_work_commits_once_and_runs_callbacks_after_commit():
+    calls = []
+    try:
+        with unit_of_work() as db:
+            db.execute(text("INSERT INTO categories (name) VALUES ('UoW commit')"))
+            after_commit(db, lambda: calls.append(_category_names("UoW commit")))
+            assert calls == []
+        # the callback ran after the commit: the row was already visible to another session
+        assert calls == [["UoW commit"]]
+    finally:
+        _cleanup("UoW commit")
+
+
+def test_unit_of_work_rolls_back_and_drops_callbacks():
+    calls = []
+    try:
+        with unit_of_work() as db:
+            db.execute(text("INSERT INTO categories (name) VALUES ('UoW rollback')"))
+            after_commit(db, lambda: calls.append("sent"))
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert calls == []
+    assert _category_names("UoW rollback") == []
+
+
+def test_savepoint_rolls_back_only_its_block():
+    calls = []
+    try:
+        with unit_of_work() as db:
+            db.execute(text("INSERT INTO categories (name) VALUES ('UoW sp kept')"))
+            after_commit(db, lambda: calls.append("kept"))
+            try:
+                with savepoint(db):
+                    db.execute(text("INSERT INTO categories (name) VALUES ('UoW sp dropped')"))
+                    after_commit(db, lambda: calls.append("dropped"))
+                    raise ValueError("item failed")
+            except ValueError:
+                pass
+        assert calls == ["kept"]
+        assert _category_names("UoW sp") == ["UoW sp kept"]
+    finally:
+        _cleanup("UoW sp")
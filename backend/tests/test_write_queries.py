@@ -0,0 +1,108 @@
+import os
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "changeme")
+
+# Statements per request (X-DB-Queries), SET LOCAL statement_timeout included.
+# Writes return the objects they wrote: no SELECT after the commit. Each write
+# request commits once (X-DB-Commits), when the route returns.
+BUDGETS = {
+    "POST /categories": 2,
+    "POST /churches": 2,
+    "POST /products": 2,
+    "PUT /products/{id}": 4,
+    "POST /stock/movements": 4,
+    "POST /orders": 4,
+    "PUT /orders/{id}/approve": 9,
+    "POST /orders/{id}/sign": 3,
+    "PUT /orders/{id}/deliver": 3,
+    "PUT /orders/{id}/cancel": 7,
+}
+
+
+@pytest.fixture()
+def admin(client, monkeypatch):
+    monkeypatch.setattr(settings, "debug", True)
+    r = client.post("/auth/login", json={"username": ADMIN_EMAIL, "password": ADMIN_PASS})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access']}"}
+
+
+def _check(r, endpoint, status=200):
+    assert r.status_code == status, r.text
+    assert int(r.headers["X-DB-Queries"]) <= BUDGETS[endpoint], endpoint
+    assert r.headers["X-DB-Commits"] == "1", endpoint
+    return r.json()
+
+
+def _stock(product_id):
+    with SessionLocal() as db:
+        return db.scalar(text("SELECT stock_qty FROM products WHERE id = :id"), {"id": product_id})
+
+
+def test_write_endpoints_query_counts(client, admin):
+    cat = _check(client.post("/categories", json={"name": "Queries cat"}, headers=admin), "POST /categories", 201)
+    church = _check(client.post("/churches", json={"name": "Queries church", "city": "Queries"}, headers=admin),
+                    "POST /churches", 201)
+    product = _check(client.post("/products", json={
+        "name": "Queries prod", "unit": "UN", "price": "2.00", "stock_qty": 0, "category_id": cat["id"],
+    }, headers=admin), "POST /products", 201)
+    pid = product["id"]
+    try:
+        assert product["is_active"] is True and product["category_id"] == cat["id"]
+        updated = _check(client.put(f"/products/{pid}", json={"low_stock_threshold": 3}, headers=admin),
+                         "PUT /products/{id}")
+        assert updated["low_stock_threshold"] == 3
+
+        mv = _check(client.post("/stock/movements", json={"product_id": pid, "type": "ENTRADA", "qty": 10},
+                                headers=admin), "POST /stock/movements", 201)
+        assert mv["id"] and mv["qty"] == 10
+        assert _stock(pid) == 10
+
+        order = _check(client.post("/orders", json={"church_id": church["id"], "items": [{"product_id": pid, "qty": 2}]},
+                                   headers=admin), "POST /orders", 201)
+        assert order["status"] == "PENDENTE" and order["items"][0]["id"]
+        approved = _check(client.put(f"/orders/{order['id']}/approve", headers=admin), "PUT /orders/{id}/approve")
+        assert approved["status"] == "APROVADO" and approved["approved_at"]
+        assert _stock(pid) == 8
+        signed = _check(client.post(f"/orders/{order['id']}/sign", headers=admin), "POST /orders/{id}/sign")
+        assert signed["signed_at"] and signed["signed_by_id"]
+        delivered = _check(client.put(f"/orders/{order['id']}/deliver", headers=admin), "PUT /orders/{id}/deliver")
+        assert delivered["status"] == "ENTREGUE" and len(delivered["items"]) == 1
+
+        other = client.post("/orders", json={"church_id": church["id"], "items": [{"product_id": pid, "qty": 3}]},
+                            headers=admin).json()
+        client.put(f"/orders/{other['id']}/approve", headers=admin)
+        assert _stock(pid) == 5
+        cancelled = _check(client.put(f"/orders/{other['id']}/cancel", headers=admin), "PUT /orders/{id}/cancel")
+        assert cancelled["status"] == "CANCELADO"
+        assert _stock(pid) == 8
+
+        # the stock guard is part of the UPDATE: nothing changes when it fails
+        r = client.post("/stock/movements", json={"product_id": pid, "type": "SAIDA_MANUAL", "qty": 9}, headers=admin)
+        assert r.status_code == 400
+        assert r.headers["X-DB-Commits"] == "0"
+        assert _stock(pid) == 8
+
+        # a failed item rolls back the whole batch, items already applied included
+        r = client.post("/stock/batch-entry", json={"items": [
+            {"product_id": pid, "qty": 5, "unit_price": 2.5},
+            {"product_id": 0, "qty": 1, "unit_price": 1.0},
+        ]}, headers=admin)
+        assert r.status_code == 400
+        assert _stock(pid) == 8
+    finally:
+        with SessionLocal() as db:
+            params = {"p": pid, "c": church["id"], "cat": cat["id"]}
+            db.execute(text("DELETE FROM stock_movements WHERE product_id = :p"), params)
+            db.execute(text("DELETE FROM orders WHERE church_id = :c"), params)
+            db.execute(text("DELETE FROM products WHERE id = :p"), params)
+            db.execute(text("DELETE FROM churches WHERE id = :c"), params)
+            db.execute(text("DELETE FROM categories WHERE id = :cat"), params)
+            db.commit()
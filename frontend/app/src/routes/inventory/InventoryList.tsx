@@ -11,7 +11,10 @@ type Inventory = {
   status: InventoryStatus
   notes?: string
   finalized_at?: string
-  items: any[]
+  total_items: number
+  counted_items: number
+  pending_items: number
+  total_difference: number
 }
 
 export default function InventoryList() {
@@ -115,7 +118,12 @@ export default function InventoryList() {
                       {getStatusText(inv.status)}
                     </span>
                   </td>
-                  <td className="p-3">{inv.items?.length || 0} produtos</td>
+                  <td className="p-3">
+                    {inv.total_items} produtos
+                    {inv.status === 'EM_ANDAMENTO' && inv.pending_items > 0 && (
+                      <span className="block text-xs text-gray-500">{inv.pending_items} pendentes</span>
+                    )}
+                  </td>
                   <td className="p-3 text-xs text-gray-600 dark:text-gray-300 truncate max-w-xs">
                     {inv.notes || '-'}
                   </td>
@@ -64,7 +64,7 @@ export default function MyMovementsReport(): JSX.Element {
     <div>
       <div className="mb-6">
         <h2 className="text-xl font-semibold">Minhas Movimentações</h2>
-        <p className="text-gray-600 mt-1">Histórico de saídas relacionadas aos seus pedidos</p>
+        <p className="text-gray-600 mt-1">Histórico de saídas e estornos relacionados aos seus pedidos</p>
       </div>
 
       {/* Resumo */}
@@ -89,9 +89,15 @@ export default function MyMovementsReport(): JSX.Element {
                 <div className="flex-1">
                   <div className="flex items-center space-x-3 mb-2">
                     <h3 className="text-lg font-semibold text-gray-900">{movement.product_name}</h3>
-                    <span className="px-3 py-1 bg-blue-100 text-blue-800 text-sm rounded-full">
-                      Saída Pedido
-                    </span>
+                    {movement.type === 'ESTORNO' ? (
+                      <span className="px-3 py-1 bg-green-100 text-green-800 text-sm rounded-full">
+                        Estorno
+                      </span>
+                    ) : (
+                      <span className="px-3 py-1 bg-blue-100 text-blue-800 text-sm rounded-full">
+                        Saída Pedido
+                      </span>
+                    )}
                   </div>
 
                   <div className="flex items-center space-x-4 text-sm text-gray-600">
@@ -110,8 +116,8 @@ export default function MyMovementsReport(): JSX.Element {
                 </div>
 
                 <div className="text-right">
-                  <div className="text-2xl mb-1">📦</div>
-                  <div className="text-xs text-gray-500">Saída</div>
+                  <div className="text-2xl mb-1">{movement.type === 'ESTORNO' ? '↩️' : '📦'}</div>
+                  <div className="text-xs text-gray-500">{movement.type === 'ESTORNO' ? 'Devolvido ao estoque' : 'Saída'}</div>
                 </div>
               </div>
             </div>
@@ -137,7 +143,7 @@ export default function MyMovementsReport(): JSX.Element {
                 </div>
                 <div className="flex-1 pb-4">
                   <div className="text-sm font-medium text-gray-900">
-                    {movement.quantity} un. de {movement.product_name}
+                    {movement.type === 'ESTORNO' ? 'Estorno de ' : ''}{movement.quantity} un. de {movement.product_name}
                   </div>
                   <div className="text-xs text-gray-500">
                     {new Date(movement.created_at).toLocaleDateString('pt-BR')} • Pedido #{movement.order_id}
@@ -158,6 +158,7 @@ export default function StockMovementsReport(): JSX.Element {
               <option value="SAIDA_MANUAL">Saída Manual</option>
               <option value="SAIDA_PEDIDO">Saída Pedido</option>
               <option value="PERDA">Perda</option>
+              <option value="ESTORNO">Estorno</option>
             </select>
           </div>
           <div className="flex items-end space-x-2">
@@ -224,6 +225,7 @@ export default function StockMovementsReport(): JSX.Element {
                     movement.type === 'ENTRADA' ? 'bg-green-100 text-green-800' :
                     movement.type === 'SAIDA_MANUAL' ? 'bg-blue-100 text-blue-800' :
                     movement.type === 'SAIDA_PEDIDO' ? 'bg-purple-100 text-purple-800' :
+                    movement.type === 'ESTORNO' ? 'bg-yellow-100 text-yellow-800' :
                     'bg-red-100 text-red-800'
                   }`}>
                     {movement.type}
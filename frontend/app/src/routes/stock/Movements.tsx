@@ -12,6 +12,7 @@ function MovementTypeBadge({ type }: { type: string }) {
     SAIDA_MANUAL: 'Saída Manual',
     SAIDA_PEDIDO: 'Saída Pedido',
     PERDA: 'Perda',
+    ESTORNO: 'Estorno',
   }
   return <span className="px-2 py-1 rounded text-xs font-semibold">{map[type] || type}</span>
 }
@@ -83,6 +84,7 @@ export default function Movements(): JSX.Element {
             <option value="SAIDA_MANUAL">Saída Manual</option>
             <option value="SAIDA_PEDIDO">Saída Pedido</option>
             <option value="PERDA">Perda</option>
+            <option value="ESTORNO">Estorno</option>
           </select>
           <button onClick={() => setShowBatchEntry(true)} className="px-3 py-1 bg-green-600 text-white rounded text-sm">📦 Entrada Múltipla</button>
           <button onClick={() => setShowForm(true)} className="px-3 py-1 bg-blue-600 text-white rounded text-sm">+ Nova</button>